@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 from datetime import timedelta
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 import os
 from pathlib import Path
@@ -31,8 +32,14 @@ DEBUG = True
 
 ALLOWED_HOSTS = ["*"]
 
+# JWT_STATELESS_AUTH=1 authenticates from the role/direction/course claims in
+# the token instead of loading the User row on every request (core.tokens).
+JWT_STATELESS_AUTH = os.getenv('JWT_STATELESS_AUTH', '0') == '1'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'core.tokens.ClaimsJWTAuthentication'
+        if JWT_STATELESS_AUTH else
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -43,6 +50,9 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'TOKEN_OBTAIN_SERIALIZER': 'core.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.tokens.ClaimsTokenRefreshSerializer',
+    'TOKEN_USER_CLASS': 'core.tokens.ClaimsUser',
 }
 
 # Application definition
@@ -60,6 +70,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -95,13 +106,121 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# DATABASE_PROFILE selects one of:
+#   sqlite          - tuned SQLite (default): WAL so readers don't block the
+#                     writer, a busy timeout and BEGIN IMMEDIATE instead of
+#                     "database is locked", synchronous=NORMAL, mmap I/O.
+#   sqlite-untuned  - Django's stock SQLite settings, kept as a benchmark baseline.
+#   postgres        - PostgreSQL with persistent connections, or a driver-side
+#                     pool when POSTGRES_POOL=1 (needs psycopg 3 with the pool extra).
+# Compare them with `manage.py benchmark_db`.
+
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'sqlite')
+CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 600))
+
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+)
+
+DATABASE_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+        },
+    },
+    'sqlite-untuned': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+    },
+    'postgres': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'devu'),
+        'USER': os.getenv('POSTGRES_USER', 'devu'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,
+        **(
+            # Django's pool hands connections back after each request, so
+            # persistent connections must be off.
+            {'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {
+                'min_size': int(os.getenv('POSTGRES_POOL_MIN', 2)),
+                'max_size': int(os.getenv('POSTGRES_POOL_MAX', 20)),
+            }}}
+            if os.getenv('POSTGRES_POOL', '0') == '1' else
+            {'CONN_MAX_AGE': CONN_MAX_AGE}
+        ),
+    },
+}
+
+if DATABASE_PROFILE not in DATABASE_PROFILES:
+    raise ImproperlyConfigured(
+        f'Unknown DATABASE_PROFILE {DATABASE_PROFILE!r}; choose one of: {", ".join(DATABASE_PROFILES)}.'
+    )
+
 DATABASES = {
+    'default': DATABASE_PROFILES[DATABASE_PROFILE],
+}
+
+
+# Cache
+# Local memory is per process; point CACHE_BACKEND at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) when running several workers
+# so that invalidation reaches all of them.
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'dev-u'),
     }
 }
 
+# Stateless JWT auth revokes tokens through markers in the cache, so every
+# worker process must see the same cache.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+if JWT_STATELESS_AUTH and CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+    raise ImproperlyConfigured(
+        'JWT_STATELESS_AUTH=1 needs a cache shared by all workers for token revocation; '
+        'set CACHE_BACKEND (e.g. django.core.cache.backends.redis.RedisCache) and CACHE_LOCATION.'
+    )
+
+ANALYTICS_CACHE_TIMEOUT = int(os.getenv('ANALYTICS_CACHE_TIMEOUT', 60 * 60))
+REFERENCE_CACHE_TIMEOUT = int(os.getenv('REFERENCE_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# Request profiling (core.profiling): the share of requests that get a
+# Server-Timing header and feed the /api/metrics/ histograms; 0 turns it off.
+# Set METRICS_TOKEN to require it as a bearer token on /api/metrics/; without
+# it only admins can read the metrics, unless DEBUG is on.
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '1.0' if DEBUG else '0.01'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Length of one class in the iCalendar schedule feed.
+SCHEDULE_CLASS_MINUTES = 80
+
+# Background jobs (core.jobs, `manage.py run_jobs`). Result files are kept
+# under MEDIA_ROOT and only served through /api/jobs/<id>/result/. A failed
+# job is retried after JOB_RETRY_DELAY seconds, doubling each attempt. A
+# worker sends a heartbeat every quarter of JOB_STALE_SECONDS while a job
+# runs; a job without one for JOB_STALE_SECONDS is handed to another worker.
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR / 'media')
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_DELAY = int(os.getenv('JOB_RETRY_DELAY', 30))
+JOB_STALE_SECONDS = int(os.getenv('JOB_STALE_SECONDS', 600))
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 1.0))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
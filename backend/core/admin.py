@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.contrib import messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Direction, Semester, Course, Attendance, Grade, Event, Schedule
+from .models import User, Direction, Semester, Course, Attendance, AttendanceArchive, AttendanceBitmap, Grade, Event, Schedule, Job
+from .calendars import rotate_feed
+from .rollover import AlreadyRolledOver, apply_rollover, describe, plan_rollover
 
 # Inline for Semesters under Direction
 class SemesterInline(admin.TabularInline):
@@ -43,6 +46,30 @@ class DirectionAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     ordering = ('name',)
     inlines = [SemesterInline]
+    actions = ['preview_rollover', 'run_rollover', 'rotate_calendar_feed']
+
+    @admin.action(description='Preview year-end rollover (dry run)')
+    def preview_rollover(self, request, queryset):
+        for line in describe(plan_rollover(queryset)):
+            self.message_user(request, line, messages.INFO)
+
+    @admin.action(description='Run year-end rollover: promote, graduate and clone missing semesters')
+    def run_rollover(self, request, queryset):
+        try:
+            promoted, graduated, course_ids = apply_rollover(plan_rollover(queryset))
+        except AlreadyRolledOver as exc:
+            self.message_user(request, str(exc), messages.ERROR)
+            return
+        self.message_user(
+            request,
+            f'Promoted {promoted}, graduated {graduated} and cloned {len(course_ids)} course(s).',
+            messages.SUCCESS,
+        )
+
+    @admin.action(description='Rotate calendar feed links (revokes the current URLs)')
+    def rotate_calendar_feed(self, request, queryset):
+        rotate_feed(list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, 'Calendar feed links rotated; students need to subscribe again.', messages.SUCCESS)
 
 # Semester Admin
 @admin.register(Semester)
@@ -70,6 +97,24 @@ class AttendanceAdmin(admin.ModelAdmin):
     ordering = ('-date',)
     date_hierarchy = 'date'
 
+# Attendance Archive Admin
+@admin.register(AttendanceArchive)
+class AttendanceArchiveAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'first_date', 'last_date', 'total', 'present')
+    list_filter = ('course__semester__direction',)
+    search_fields = ('student__fio', 'course__name')
+    ordering = ('-last_date',)
+    exclude = ('days',)
+
+# Attendance Bitmap Admin
+@admin.register(AttendanceBitmap)
+class AttendanceBitmapAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'sessions', 'unscheduled_total')
+    list_filter = ('course__semester__direction',)
+    search_fields = ('student__fio', 'course__name')
+    ordering = ('course', 'student')
+    exclude = ('recorded', 'present')
+
 # Grade Admin
 @admin.register(Grade)
 class GradeAdmin(admin.ModelAdmin):
@@ -98,4 +143,13 @@ class ScheduleAdmin(admin.ModelAdmin):
     list_filter = ('course__semester__direction', 'date')
     search_fields = ('course__name', 'topic')
     ordering = ('-date',)
-    date_hierarchy = 'date'
\ No newline at end of file
+    date_hierarchy = 'date'
+
+# Job Admin
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'attempts', 'progress_done', 'progress_total', 'created_by', 'created_at')
+    list_filter = ('status', 'kind')
+    ordering = ('-id',)
+    readonly_fields = ('attempts', 'progress_done', 'progress_total', 'result', 'result_file', 'error', 'worker',
+                       'heartbeat', 'created_at', 'started_at', 'finished_at')
\ No newline at end of file
@@ -0,0 +1,130 @@
+import hashlib
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from . import archive
+from .models import Attendance, AttendanceArchive, Course
+
+SCOPES = {
+    'student': ('student_id', 'student__fio'),
+    'course': ('course_id', 'course__name'),
+    'direction': ('course__semester__direction_id', 'course__semester__direction__name'),
+}
+
+ALL = 'all'
+
+
+def _version_key(kind, pk=ALL):
+    return f'analytics:attendance:v:{kind}:{pk}'
+
+
+def _versions(keys):
+    versions = cache.get_many(keys)
+    return [versions.get(key, 0) for key in keys]
+
+
+def _bump(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+
+def invalidate_attendance(course_ids):
+    """
+    Invalidate cached attendance analytics touching ``course_ids``.
+
+    Cached results are keyed by version counters rather than deleted: a
+    course-filtered result depends on the course's counter, a
+    direction-filtered one on the direction's, and unfiltered ones on the
+    global counter, so a change to one course leaves other courses' cached
+    results intact.
+    """
+    course_ids = set(course_ids)
+    if not course_ids:
+        return
+    directions = set(
+        Course.objects.filter(pk__in=course_ids).values_list('semester__direction_id', flat=True)
+    )
+    _bump(
+        [_version_key('course', pk) for pk in course_ids]
+        + [_version_key('direction', pk) for pk in directions if pk is not None]
+        + [_version_key(ALL)]
+    )
+
+
+def attendance_rates(scope, course=None, direction=None, date_from=None, date_to=None, below=None):
+    """
+    Attendance totals and percentage per ``scope`` (student, course or
+    direction), grouped and counted by the database. When ``below`` is given
+    only rows with a rate under that percentage are returned.
+    """
+    if course is not None:
+        dependency = _version_key('course', course)
+    elif direction is not None:
+        dependency = _version_key('direction', direction)
+    else:
+        dependency = _version_key(ALL)
+    params = [scope, course, direction, str(date_from), str(date_to), below]
+    digest = hashlib.md5(json.dumps(params).encode()).hexdigest()
+    key = f'analytics:attendance:{digest}:{_versions([dependency])[0]}'
+
+    results = cache.get(key)
+    if results is None:
+        results = _compute(scope, course, direction, date_from, date_to, below)
+        cache.set(key, results, timeout=settings.ANALYTICS_CACHE_TIMEOUT)
+    return results
+
+
+def _compute(scope, course, direction, date_from, date_to, below):
+    group, name = SCOPES[scope]
+    queryset = Attendance.objects.all()
+    archives = AttendanceArchive.objects.all()
+    if course is not None:
+        queryset = queryset.filter(course_id=course)
+        archives = archives.filter(course_id=course)
+    if direction is not None:
+        queryset = queryset.filter(course__semester__direction_id=direction)
+        archives = archives.filter(course__semester__direction_id=direction)
+    if date_from is not None:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to is not None:
+        queryset = queryset.filter(date__lte=date_to)
+
+    # Archived terms (core.archive) count alongside the live table.
+    counts = archive.archived_counts(archives, group, name, date_from, date_to)
+    rows = queryset.values_list(group, name).annotate(total=Count('id'), present=Count('id', filter=Q(status=True)))
+    for pk, label, total, present in rows:
+        counts[(pk, label)][0] += total
+        counts[(pk, label)][1] += present
+    results = [
+        {'id': pk, 'name': label, 'total': total, 'present': present, 'rate': round(present * 100.0 / total, 2)}
+        for (pk, label), (total, present) in sorted(counts.items(), key=lambda item: (item[0][1], item[0][0]))
+        if total
+    ]
+    if below is not None:
+        results = [row for row in results if row['rate'] < below]
+    return results
+
+
+def student_course_attendance(student_id):
+    """``{course_id: (total, present)}`` of a student's attendance, live and archived."""
+    counts = defaultdict(lambda: (0, 0))
+    for course_id, total, present in (
+        AttendanceArchive.objects.filter(student_id=student_id).values_list('course_id', 'total', 'present')
+    ):
+        counts[course_id] = (total, present)
+    rows = (
+        Attendance.objects.filter(student_id=student_id)
+        .values_list('course_id')
+        .annotate(total=Count('id'), present=Count('id', filter=Q(status=True)))
+    )
+    for course_id, total, present in rows:
+        archived = counts[course_id]
+        counts[course_id] = (archived[0] + total, archived[1] + present)
+    return dict(counts)
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
+
+        if settings.PROFILING_SAMPLE_RATE > 0:
+            from .profiling import install_sql_wrapper, instrument_serializers
+            connection_created.connect(install_sql_wrapper)
+            instrument_serializers()
@@ -0,0 +1,230 @@
+"""
+Archiving of past terms' attendance out of the hot ``Attendance`` table.
+
+``archive_attendance(before)`` folds every record dated before ``before``
+into one ``AttendanceArchive`` row per (student, course): the totals, the
+first and last date, and two bitmaps over the days in between (recorded,
+present), so a term of daily records takes a few dozen bytes instead of a
+row per day. The moved rows are deleted in the same transaction, which is
+rolled back unless the number deleted matches the number packed.
+``restore_attendance`` unpacks archives back into rows, checked the same
+way; as when archiving again, a day recorded live since keeps the live
+record.
+
+Analytics and transcripts add the archived totals to the live ones, so
+history stays visible; date-filtered analytics count archived days in range
+with a popcount of the masked bitmaps.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+
+from . import analytics
+from .models import Attendance, AttendanceArchive, attendance_deleted
+
+
+class ArchiveMismatch(RuntimeError):
+    """Rows moved and rows accounted for differ; the transaction is rolled back."""
+
+
+def _width(first, last):
+    return (last - first).days + 1
+
+
+def pack(records):
+    """``(first, last, total, present, days)`` for ``(date, status)`` records with distinct dates."""
+    records = sorted(records)
+    first, last = records[0][0], records[-1][0]
+    recorded = present = 0
+    for day, status in records:
+        bit = 1 << (day - first).days
+        recorded |= bit
+        if status:
+            present |= bit
+    size = (_width(first, last) + 7) // 8
+    days = recorded.to_bytes(size, 'little') + present.to_bytes(size, 'little')
+    return first, last, len(records), present.bit_count(), days
+
+
+def _bitmaps(archive):
+    days = bytes(archive.days)
+    size = len(days) // 2
+    return int.from_bytes(days[:size], 'little'), int.from_bytes(days[size:], 'little')
+
+
+def unpack(archive):
+    """The archived ``(date, status)`` records, in date order."""
+    recorded, present = _bitmaps(archive)
+    for offset in range(_width(archive.first_date, archive.last_date)):
+        if recorded >> offset & 1:
+            yield archive.first_date + timedelta(days=offset), bool(present >> offset & 1)
+
+
+def count_between(archive, date_from=None, date_to=None):
+    """``(total, present)`` of the archived records within the inclusive range."""
+    low = 0 if date_from is None else max((date_from - archive.first_date).days, 0)
+    width = _width(archive.first_date, archive.last_date)
+    high = width - 1 if date_to is None else min((date_to - archive.first_date).days, width - 1)
+    if high < low:
+        return 0, 0
+    mask = ((1 << (high - low + 1)) - 1) << low
+    recorded, present = _bitmaps(archive)
+    return (recorded & mask).bit_count(), (present & mask).bit_count()
+
+
+def _write(batch, existing_rows):
+    """Upsert archives for ``batch`` ({(student, course): records}), merged with what is archived already."""
+    existing = {(row.student_id, row.course_id): row for row in existing_rows}
+    archives = []
+    for (student, course), records in batch.items():
+        if (student, course) in existing:
+            # A day both archived and live keeps the live record.
+            records = list((dict(unpack(existing[(student, course)])) | dict(records)).items())
+        first, last, total, present, days = pack(records)
+        archives.append(AttendanceArchive(
+            student_id=student, course_id=course, first_date=first, last_date=last,
+            total=total, present=present, days=days,
+        ))
+    AttendanceArchive.objects.bulk_create(
+        archives, update_conflicts=True, unique_fields=['student', 'course'],
+        update_fields=['first_date', 'last_date', 'total', 'present', 'days'],
+    )
+
+
+def archive_attendance(before, courses=None, batch_size=2000):
+    """
+    Move attendance dated before ``before`` (of ``courses`` when given) into
+    AttendanceArchive; returns ``(records, archives written)``.
+    """
+    queryset = Attendance.objects.filter(date__lt=before)
+    if courses is not None:
+        queryset = queryset.filter(course_id__in=courses)
+    moved = written = 0
+    keys = set()
+    with transaction.atomic():
+        rows = (
+            queryset.order_by('student_id', 'course_id', 'date')
+            .values_list('student_id', 'course_id', 'date', 'status')
+            .iterator(chunk_size=batch_size)
+        )
+        batch = {}
+        for key, group in groupby(rows, key=lambda row: row[:2]):
+            batch[key] = [(day, status) for _, _, day, status in group]
+            moved += len(batch[key])
+            keys.add(key)
+            if len(batch) >= batch_size:
+                written += _flush(batch)
+                batch = {}
+        written += _flush(batch)
+        # Attendance has no cascades, so the plain delete is one statement;
+        # the keys are known already, so the signal is sent here.
+        deleted, _ = Attendance._base_manager.filter(pk__in=queryset.values('pk')).delete()
+        if deleted != moved:
+            raise ArchiveMismatch(f'Packed {moved} attendance record(s) but deleted {deleted}.')
+        if keys:
+            attendance_deleted.send(sender=Attendance, keys=keys)
+    return moved, written
+
+
+def _flush(batch):
+    if not batch:
+        return 0
+    students = {student for student, _ in batch}
+    courses = {course for _, course in batch}
+    _write(batch, AttendanceArchive.objects.filter(student_id__in=students, course_id__in=courses))
+    return len(batch)
+
+
+def restore_attendance(courses=None, batch_size=2000):
+    """Move archived attendance (of ``courses`` when given) back into Attendance; returns the records restored."""
+    archives = AttendanceArchive.objects.all()
+    if courses is not None:
+        archives = archives.filter(course_id__in=courses)
+    expected = restored = 0
+    course_ids = set()
+    with transaction.atomic():
+        for batch in _batches(archives.order_by('pk').iterator(chunk_size=batch_size), batch_size):
+            course_ids |= {archive.course_id for archive in batch}
+            held, inserted = _restore(batch)
+            expected += held
+            restored += inserted
+        if restored != expected:
+            raise ArchiveMismatch(f'Archives hold {expected} attendance record(s) to restore but {restored} were.')
+        archives.delete()
+    analytics.invalidate_attendance(course_ids)
+    return restored
+
+
+def _batches(archives, size):
+    """Lists of consecutive ``archives`` holding about ``size`` records each."""
+    batch, records = [], 0
+    for archive in archives:
+        batch.append(archive)
+        records += archive.total
+        if records >= size:
+            yield batch
+            batch, records = [], 0
+    if batch:
+        yield batch
+
+
+def _restore(archives):
+    """
+    Insert the records of ``archives`` except days recorded live since;
+    returns ``(records the archives hold for other days, rows inserted)``.
+    """
+    live = Attendance.objects.filter(
+        student_id__in={archive.student_id for archive in archives},
+        course_id__in={archive.course_id for archive in archives},
+    )
+    kept = set(
+        live.filter(
+            date__gte=min(archive.first_date for archive in archives),
+            date__lte=max(archive.last_date for archive in archives),
+        ).values_list('student_id', 'course_id', 'date')
+    )
+    expected, rows = 0, []
+    for archive in archives:
+        days = list(unpack(archive))
+        records = [
+            Attendance(student_id=archive.student_id, course_id=archive.course_id, date=day, status=status)
+            for day, status in days
+            if (archive.student_id, archive.course_id, day) not in kept
+        ]
+        expected += archive.total - (len(days) - len(records))
+        rows += records
+    before = live.count()
+    Attendance.objects.bulk_create(rows, ignore_conflicts=True)
+    return expected, live.count() - before
+
+
+def archived_counts(archives, group, name, date_from=None, date_to=None):
+    """
+    ``{(group value, name): [total, present]}`` over ``archives`` grouped like
+    the analytics rows. Archives wholly inside the date range are summed by
+    the database; ones cut by it are counted from their bitmaps.
+    """
+    counts = defaultdict(lambda: [0, 0])
+    if date_from is not None:
+        archives = archives.filter(last_date__gte=date_from)
+    if date_to is not None:
+        archives = archives.filter(first_date__lte=date_to)
+    inside = Q()
+    if date_from is not None:
+        inside &= Q(first_date__gte=date_from)
+    if date_to is not None:
+        inside &= Q(last_date__lte=date_to)
+    rows = archives.filter(inside).values_list(group, name).annotate(total=Sum('total'), present=Sum('present'))
+    for pk, label, total, present in rows:
+        counts[(pk, label)][0] += total
+        counts[(pk, label)][1] += present
+    if date_from is not None or date_to is not None:
+        partial = archives.exclude(inside).annotate(group=F(group), label=F(name))
+        for archive in partial.only('first_date', 'last_date', 'days'):
+            total, present = count_between(archive, date_from, date_to)
+            counts[(archive.group, archive.label)][0] += total
+            counts[(archive.group, archive.label)][1] += present
+    return counts
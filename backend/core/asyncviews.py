@@ -0,0 +1,95 @@
+"""
+Natively async read views for the hottest endpoints.
+
+DRF's APIView is sync-only, so under ASGI every request to it is handed to
+a worker thread. ``AsyncAPIView`` is an APIView whose ``dispatch`` is a
+coroutine: it runs DRF's own ``initial`` (content negotiation, versioning,
+authentication, permissions, throttling), ``handle_exception`` and
+``finalize_response``, while queries go through Django's async ORM and the
+sync parts that remain (serializing already-loaded rows, role checks) never
+touch the database.
+
+A view may name a DRF ``sync_view`` that handles every other method, so a
+list route can answer GET natively while POST keeps the generic
+create path.
+"""
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.utils.decorators import classonlymethod
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import ForcedAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+
+from .fieldsets import ordering_columns, sparse_queryset
+
+
+class AsyncAPIView(APIView):
+    renderer_classes = [JSONRenderer]
+    serializer_class = None
+    pagination_class = None
+    sync_view = None
+    sync_handler = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        if cls.sync_view is not None:
+            initkwargs.setdefault('sync_handler', cls.sync_view.as_view())
+        return super().as_view(**initkwargs)
+
+    async def dispatch(self, request, *args, **kwargs):
+        """As APIView.dispatch, awaiting the handler."""
+        handler = getattr(self, request.method.lower(), None)
+        if handler is None and self.sync_handler is not None:
+            return await sync_to_async(self.sync_handler)(request, *args, **kwargs)
+
+        self.args, self.kwargs = args, kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await self.authenticate(request)
+            self.initial(request, *args, **kwargs)
+            if handler is None or request.method.lower() not in self.http_method_names:
+                handler = self.http_method_not_allowed
+            if not iscoroutinefunction(handler):
+                handler = sync_to_async(handler)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def authenticate(self, request):
+        """
+        Resolve ``request.user`` before ``initial`` reads it. Stateless
+        authenticators (forced test auth, claims-only JWT) run inline;
+        anything that loads a User row runs in a worker thread, the one
+        thread hop left on these paths.
+        """
+        stateless = all(
+            isinstance(auth, (ForcedAuthentication, JWTStatelessUserAuthentication))
+            for auth in request.authenticators
+        )
+        if stateless:
+            request.user
+        else:
+            await sync_to_async(lambda: request.user)()
+
+    def get_serializer(self, *args, **kwargs):
+        return self.serializer_class(*args, context={'request': self.request, 'view': self}, **kwargs)
+
+    def sparse(self, queryset):
+        """Narrow ``queryset`` to the requested ``?fields=`` / ``?omit=`` / ``?expand=``."""
+        return sparse_queryset(self.get_serializer(), queryset, ordering_columns(self))
+
+    async def list_response(self, queryset):
+        """Serialize ``queryset`` (one page of it with a ``pagination_class``) as ListAPIView would."""
+        queryset = self.sparse(queryset)
+        if self.pagination_class is None:
+            return Response(self.get_serializer([obj async for obj in queryset], many=True).data)
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, self.request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
@@ -0,0 +1,199 @@
+"""
+Per-route benchmark of the API in ``core.urls``.
+
+``route_cases`` describes one representative request for every named route,
+made as a user with the role the route requires, against ids sampled from
+the database (seed it with ``manage.py seed_data``). ``run_benchmarks``
+replays each case through the test client and reports latency percentiles,
+queries per request and response size. Requests that write run in an
+atomic block that is rolled back, so every iteration sees the same data and
+the database is left untouched. Used by ``manage.py benchmark_routes``.
+"""
+import math
+import statistics
+import time
+from collections import namedtuple
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .calendars import feed_token
+from .models import Attendance, Course, Event, Grade, Job, Schedule, User
+from .tokens import ClaimsTokenObtainPairSerializer
+
+# ``role`` is None for routes called without a token; ``payload`` is sent as
+# JSON unless ``multipart`` is set.
+Case = namedtuple('Case', 'route method role args payload multipart', defaults=((), None, False))
+
+_SAVEPOINT_SQL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(math.ceil(len(ordered) * fraction) - 1, 0)]
+
+
+class Sample:
+    """Users and rows the cases point at, picked from the current database."""
+
+    def __init__(self):
+        self.admin = self.first(User.objects.filter(role='admin', is_active=True))
+        self.teacher = self.first(User.objects.filter(role='teacher', is_active=True, taught_courses__isnull=False))
+        self.student = self.first(User.objects.filter(
+            role='student', is_active=True, direction__isnull=False, attendances__isnull=False,
+        ))
+        self.course = self.first(Course.objects.filter(attendances__student=self.student))
+        self.direction_id = self.student.direction_id
+        self.semester_id = self.course.semester_id
+        self.attendance = self.first(Attendance.objects.filter(student=self.student))
+        self.grade = self.first(Grade.objects.filter(student=self.student))
+        self.schedule = self.first(Schedule.objects.all())
+        self.event = self.first(Event.objects.all())
+        self.job = self.first(Job.objects.filter(status='succeeded').exclude(result_file=''))
+
+    @staticmethod
+    def first(queryset):
+        obj = queryset.order_by('pk').first()
+        if obj is None:
+            raise LookupError(f'No {queryset.model.__name__} to benchmark against; seed the database first.')
+        return obj
+
+
+def route_cases(sample, password):
+    s = sample
+    grade_csv = f'student,course,type,score\n{s.student.pk},{s.course.pk},module1,75\n'.encode()
+    return [
+        Case('register', 'post', 'admin', payload={
+            'username': 'benchmark-user', 'email': 'benchmark-user@example.com', 'password': 'benchmark',
+            'fio': 'Benchmark User', 'role': 'student',
+        }),
+        Case('token', 'post', None, payload={'username': s.student.username, 'password': password}),
+        Case('token_refresh', 'post', None, payload={'refresh': str(RefreshToken.for_user(s.student))}),
+        Case('me', 'get', 'student'),
+        Case('direction-list', 'get', 'admin'),
+        Case('direction-detail', 'get', 'admin', (s.direction_id,)),
+        Case('semester-list', 'get', 'admin'),
+        Case('semester-detail', 'get', 'admin', (s.semester_id,)),
+        Case('student-list', 'get', 'admin'),
+        Case('student-detail', 'get', 'admin', (s.student.pk,)),
+        Case('student-transcript', 'get', 'teacher', (s.student.pk,)),
+        Case('course-list', 'get', 'teacher'),
+        Case('course-detail', 'get', 'teacher', (s.course.pk,)),
+        Case('attendance-list', 'get', 'teacher'),
+        Case('attendance-detail', 'get', 'teacher', (s.attendance.pk,)),
+        Case('attendance-bulk', 'post', 'teacher', payload={
+            'course': s.course.pk, 'date': s.attendance.date.isoformat(),
+            'records': [{'student': s.student.pk, 'status': True}],
+        }),
+        Case('attendance-roster', 'get', 'teacher', payload={'course': s.course.pk}),
+        Case('attendance-export', 'get', 'teacher', ('csv',), {'course': s.course.pk}),
+        Case('grade-list', 'get', 'teacher'),
+        Case('grade-detail', 'get', 'teacher', (s.grade.pk,)),
+        Case('grade-import', 'post', 'teacher', payload={
+            'file': SimpleUploadedFile('grades.csv', grade_csv, content_type='text/csv'),
+        }, multipart=True),
+        Case('grade-export', 'get', 'teacher', ('csv',), {'course': s.course.pk}),
+        Case('transcript', 'get', 'student'),
+        Case('attendance-analytics', 'get', 'teacher', payload={'scope': 'course'}),
+        Case('schedule-list', 'get', 'teacher'),
+        Case('schedule-detail', 'get', 'teacher', (s.schedule.pk,)),
+        Case('schedule-bulk', 'post', 'teacher', payload={
+            'course': s.course.pk, 'weekdays': ['mon', 'thu'], 'time': '18:30',
+            'start': s.schedule.date.isoformat(), 'end': (s.schedule.date + timedelta(days=90)).isoformat(),
+            'topic': 'Lecture {n}', 'on_conflict': 'skip',
+        }),
+        Case('student-schedule-list', 'get', 'student'),
+        Case('student-schedule-feed', 'get', 'student'),
+        Case('schedule-feed', 'get', None, (feed_token(s.direction_id),)),
+        Case('event-list', 'get', 'admin'),
+        Case('event-detail', 'get', 'admin', (s.event.pk,)),
+        Case('event-inbox', 'get', 'student'),
+        Case('search', 'get', 'admin', payload={'q': s.student.fio.split()[0]}),
+        Case('job-list', 'get', 'admin'),
+        Case('job-detail', 'get', 'admin', (s.job.pk,)),
+        Case('job-result', 'get', 'admin', (s.job.pk,)),
+        Case('metrics', 'get', 'admin'),
+    ]
+
+
+def _client(user):
+    client = APIClient()
+    if user is not None:
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def _request(client, case):
+    url = reverse(case.route, args=case.args)
+    if case.method == 'get':
+        return client.get(url, case.payload)
+    payload = case.payload
+    if case.multipart:
+        for upload in payload.values():
+            upload.seek(0)
+        return getattr(client, case.method)(url, payload, format='multipart')
+    return getattr(client, case.method)(url, payload, format='json')
+
+
+def _size(response):
+    if response.streaming:
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+def measure(client, case, cold_cache=False):
+    """One request: ``(status, seconds, queries, bytes)``."""
+    writes = case.method != 'get'
+    if cold_cache:
+        cache.clear()
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        with transaction.atomic() if writes else nullcontext():
+            response = _request(client, case)
+            size = _size(response)
+            if writes:
+                transaction.set_rollback(True)
+        elapsed = time.perf_counter() - started
+    count = sum(1 for query in queries.captured_queries if not query['sql'].startswith(_SAVEPOINT_SQL))
+    return response.status_code, elapsed, count, size
+
+
+def run_benchmarks(iterations=50, warmup=3, password='password', routes=None, cold_cache=False):
+    """
+    Benchmark every case (or those named in ``routes``); returns a JSON-ready
+    dict keyed by route. With ``cold_cache`` the cache is cleared before
+    each request, otherwise cached routes are measured warm.
+    """
+    sample = Sample()
+    users = {'admin': sample.admin, 'teacher': sample.teacher, 'student': sample.student, None: None}
+    clients = {role: _client(user) for role, user in users.items()}
+    results = {}
+    for case in route_cases(sample, password):
+        if routes and case.route not in routes:
+            continue
+        client = clients[case.role]
+        for _ in range(warmup):
+            measure(client, case, cold_cache)
+        runs = [measure(client, case, cold_cache) for _ in range(iterations)]
+        latencies = sorted(run[1] for run in runs)
+        statuses = {}
+        for run in runs:
+            statuses[str(run[0])] = statuses.get(str(run[0]), 0) + 1
+        results[case.route] = {
+            'method': case.method.upper(),
+            'statuses': statuses,
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'queries': max(run[2] for run in runs),
+            'bytes': max(run[3] for run in runs),
+        }
+    return results
@@ -0,0 +1,159 @@
+"""
+The attendance roster cache: per student and course bitsets over class
+sessions, read by /api/attendance/roster/.
+
+A course's sessions are the distinct dates of its ``Schedule`` rows, in
+order; session ``n`` is bit ``n``. ``AttendanceBitmap`` keeps, per student
+and course, one bitset of the sessions with a record and one of those
+attended, so a student's rate is two popcounts and a whole course roster is
+one row per student instead of one per student per class. Records on days
+without a scheduled class are kept as plain counts.
+
+This is a cache, not attendance storage: it is kept next to the live
+``Attendance`` rows, which the /api/attendance/ endpoints, analytics and
+transcripts keep reading, plus archived ones (core.archive), and is rebuilt
+from them. Signals in core.signals refresh the bitmaps of changed records
+(once per delete) and rebuild a course's bitmaps when its schedule changes;
+code that bulk-writes either table calls ``refresh_bitmaps`` or
+``rebuild_course_bitmaps`` itself (or ``manage.py rebuild_attendance_bitmaps``).
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from .archive import unpack
+from .models import Attendance, AttendanceArchive, AttendanceBitmap, Schedule
+
+
+def session_dates(course_ids):
+    """``{course_id: [session dates in order]}``."""
+    sessions = defaultdict(list)
+    rows = (
+        Schedule.objects.filter(course_id__in=course_ids)
+        .values_list('course_id', 'date')
+        .distinct()
+        .order_by('course_id', 'date')
+    )
+    for course_id, day in rows:
+        sessions[course_id].append(day)
+    return sessions
+
+
+def to_bytes(bits, sessions):
+    return bits.to_bytes((sessions + 7) // 8, 'little')
+
+
+def from_bytes(value):
+    return int.from_bytes(bytes(value), 'little')
+
+
+def build(student_id, course_id, records, sessions):
+    """An unsaved AttendanceBitmap for ``records`` ({date: status}) against the course's ``sessions``."""
+    return AttendanceBitmap(student_id=student_id, course_id=course_id, **bitmap_fields(records, sessions))
+
+
+def bitmap_fields(records, sessions):
+    """The AttendanceBitmap field values for ``records`` ({date: status}) against ``sessions``."""
+    index = {day: number for number, day in enumerate(sessions)}
+    recorded = present = unscheduled_total = unscheduled_present = 0
+    for day, status in records.items():
+        number = index.get(day)
+        if number is None:
+            unscheduled_total += 1
+            unscheduled_present += status
+            continue
+        recorded |= 1 << number
+        if status:
+            present |= 1 << number
+    return {
+        'sessions': len(sessions),
+        'recorded': to_bytes(recorded, len(sessions)),
+        'present': to_bytes(present, len(sessions)),
+        'unscheduled_total': unscheduled_total,
+        'unscheduled_present': unscheduled_present,
+    }
+
+
+def counts(bitmap):
+    """``(total, present)`` records of a bitmap."""
+    return (
+        from_bytes(bitmap.recorded).bit_count() + bitmap.unscheduled_total,
+        from_bytes(bitmap.present).bit_count() + bitmap.unscheduled_present,
+    )
+
+
+def marks(bitmap):
+    """One character per session: ``P`` present, ``A`` absent, ``-`` no record."""
+    recorded, present = from_bytes(bitmap.recorded), from_bytes(bitmap.present)
+    return ''.join(
+        ('P' if present >> number & 1 else 'A') if recorded >> number & 1 else '-'
+        for number in range(bitmap.sessions)
+    )
+
+
+def _records(attendance, archives):
+    """``{(student_id, course_id): {date: status}}``; live records win over archived ones."""
+    records = defaultdict(dict)
+    for archive in archives:
+        records[(archive.student_id, archive.course_id)].update(unpack(archive))
+    for student_id, course_id, day, status in attendance.values_list('student_id', 'course_id', 'date', 'status'):
+        records[(student_id, course_id)][day] = status
+    return records
+
+
+def _upsert(bitmaps):
+    AttendanceBitmap.objects.bulk_create(
+        bitmaps, batch_size=1000, update_conflicts=True, unique_fields=['student', 'course'],
+        update_fields=['sessions', 'recorded', 'present', 'unscheduled_total', 'unscheduled_present'],
+    )
+
+
+def refresh_bitmaps(keys):
+    """Recompute the bitmaps of ``(student_id, course_id)`` keys."""
+    keys = set(keys)
+    if not keys:
+        return
+    students = {student for student, _ in keys}
+    courses = {course for _, course in keys}
+    records = _records(
+        Attendance.objects.filter(student_id__in=students, course_id__in=courses),
+        AttendanceArchive.objects.filter(student_id__in=students, course_id__in=courses),
+    )
+    sessions = session_dates(courses)
+    bitmaps = [
+        build(student, course, records[(student, course)], sessions[course])
+        for student, course in keys if records.get((student, course))
+    ]
+    stale = defaultdict(list)
+    for student, course in keys:
+        if not records.get((student, course)):
+            stale[course].append(student)
+    with transaction.atomic(savepoint=False):
+        for course, students in stale.items():
+            AttendanceBitmap.objects.filter(course_id=course, student_id__in=students).delete()
+        _upsert(bitmaps)
+
+
+def expected_bitmaps(course_ids):
+    """Freshly built bitmaps of every student with attendance in ``course_ids``, ordered by course and student."""
+    records = _records(
+        Attendance.objects.filter(course_id__in=course_ids),
+        AttendanceArchive.objects.filter(course_id__in=course_ids),
+    )
+    sessions = session_dates(course_ids)
+    return [
+        build(student, course, records[(student, course)], sessions[course])
+        for student, course in sorted(records, key=lambda key: (key[1], key[0]))
+    ]
+
+
+def rebuild_course_bitmaps(course_ids):
+    """Replace every bitmap of ``course_ids``, e.g. after their schedules changed; returns how many were written."""
+    course_ids = list(course_ids)
+    if not course_ids:
+        return 0
+    bitmaps = expected_bitmaps(course_ids)
+    with transaction.atomic(savepoint=False):
+        AttendanceBitmap.objects.filter(course_id__in=course_ids).delete()
+        _upsert(bitmaps)
+    return len(bitmaps)
@@ -0,0 +1,94 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def _state_key(scope):
+    return f'reference:state:{scope}'
+
+
+def reference_state(scope):
+    """
+    Return ``(token, last_modified)`` for a reference list. A missing entry
+    (cold or evicted cache) starts a fresh token, so clients never get a 304
+    for data the server can no longer vouch for.
+    """
+    state = cache.get(_state_key(scope))
+    if state is None:
+        state = (uuid.uuid4().hex, int(time.time()))
+        if not cache.add(_state_key(scope), state, timeout=None):
+            state = cache.get(_state_key(scope), state)
+    return state
+
+
+def invalidate_reference(*scopes):
+    """
+    Start a fresh token for each scope. Last-Modified has one-second
+    resolution, so it moves past the previous value even when the change
+    falls in the same second; otherwise If-Modified-Since would get a 304.
+    """
+    now = int(time.time())
+    previous = cache.get_many([_state_key(scope) for scope in scopes])
+    cache.set_many({
+        _state_key(scope): (uuid.uuid4().hex, max(now, previous.get(_state_key(scope), (None, 0))[1] + 1))
+        for scope in scopes
+    }, timeout=None)
+
+
+class CachedReferenceListMixin:
+    """
+    Serves a rarely-changing list from the cache, revalidated with
+    ETag / Last-Modified.
+
+    ``reference_scope`` names the cache entry; signals in core.signals call
+    ``invalidate_reference`` when a model feeding it is saved or deleted.
+    A matching ``If-None-Match`` / ``If-Modified-Since`` is answered with a
+    304 from the cache alone, without touching the database.
+    """
+    reference_scope = None
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified, key = self.reference_validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.with_validators(not_modified, etag, last_modified)
+
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, timeout=settings.REFERENCE_CACHE_TIMEOUT)
+        return self.with_validators(Response(data), etag, last_modified)
+
+    async def alist(self, request, *args, **kwargs):
+        """``list`` for async views, which provide ``alist_data`` in place of ``super().list``."""
+        etag, last_modified, key = self.reference_validators(request)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return self.with_validators(not_modified, etag, last_modified)
+
+        data = cache.get(key)
+        if data is None:
+            data = await self.alist_data(request, *args, **kwargs)
+            cache.set(key, data, timeout=settings.REFERENCE_CACHE_TIMEOUT)
+        return self.with_validators(Response(data), etag, last_modified)
+
+    def reference_validators(self, request):
+        """``(etag, last_modified, data cache key)`` for this list and query string."""
+        token, last_modified = reference_state(self.reference_scope)
+        query = request.META.get('QUERY_STRING', '')
+        digest = hashlib.md5(f'{token}?{query}'.encode()).hexdigest()
+        etag = quote_etag(f'{self.reference_scope}-{digest}')
+        return etag, last_modified, f'reference:data:{self.reference_scope}:{digest}'
+
+    def with_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Authenticated data: browsers may keep it but must revalidate each time.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
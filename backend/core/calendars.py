@@ -0,0 +1,120 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Direction, Schedule
+
+FEED_SALT = 'core.calendars.schedule-feed'
+
+
+def feed_token(direction_id):
+    """Signed, URL-safe token naming the current version of a direction's schedule feed."""
+    version = Direction.objects.filter(pk=direction_id).values_list('feed_version', flat=True).first()
+    return signing.dumps([direction_id, version], salt=FEED_SALT, compress=True)
+
+
+def direction_from_token(token):
+    """
+    Return ``(direction id, feed version)`` for ``token``, or raise
+    ``signing.BadSignature``; the caller checks the version is current.
+    """
+    payload = signing.loads(token, salt=FEED_SALT)
+    if not isinstance(payload, list) or len(payload) != 2:
+        raise signing.BadSignature('Outdated feed token.')
+    return tuple(payload)
+
+
+def rotate_feed(direction_ids):
+    """Revoke the current feed URLs of ``direction_ids``; students fetch the new one from the API."""
+    Direction.objects.filter(pk__in=direction_ids).update(feed_version=F('feed_version') + 1)
+    invalidate_direction_feed(direction_ids)
+
+
+def _cache_key(direction_id):
+    return f'calendar:direction:{direction_id}'
+
+
+def invalidate_direction_feed(direction_ids):
+    cache.delete_many([_cache_key(pk) for pk in direction_ids if pk is not None])
+
+
+def _escape(text):
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """RFC 5545 line folding: at most 75 octets per line, continuations start with a space."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1  # don't split a multi-byte character
+        parts.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74
+    return '\r\n '.join(parts)
+
+
+def _utc(moment):
+    return moment.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def render_direction_calendar(direction_id):
+    """Render every class of a direction as an iCalendar document."""
+    local = ZoneInfo(settings.TIME_ZONE)
+    duration = timedelta(minutes=settings.SCHEDULE_CLASS_MINUTES)
+    stamp = _utc(datetime.now(timezone.utc))
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//dev-u//Schedule//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+    ]
+    classes = (
+        Schedule.objects.filter(course__semester__direction_id=direction_id)
+        .order_by('date', 'time', 'id')
+        .values_list('id', 'date', 'time', 'topic', 'course__name')
+        .iterator()
+    )
+    for pk, day, start, topic, course_name in classes:
+        begins = datetime.combine(day, start, tzinfo=local)
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:schedule-{pk}@dev-u',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{_utc(begins)}',
+            f'DTEND:{_utc(begins + duration)}',
+            f'SUMMARY:{_escape(course_name)}',
+            f'DESCRIPTION:{_escape(topic)}',
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def direction_calendar(direction_id):
+    """
+    Return ``(ics, etag, feed version)`` for a direction, rendering it only
+    when the cached copy was invalidated by a change to one of the
+    direction's classes or a feed rotation. The version is None when the
+    direction doesn't exist.
+    """
+    key = _cache_key(direction_id)
+    cached = cache.get(key)
+    if cached is None:
+        version = Direction.objects.filter(pk=direction_id).values_list('feed_version', flat=True).first()
+        ics = render_direction_calendar(direction_id)
+        cached = (ics, '"%s"' % hashlib.md5(ics.encode('utf-8')).hexdigest(), version)
+        cache.set(key, cached, timeout=None)
+    return cached
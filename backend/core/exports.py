@@ -0,0 +1,132 @@
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, StreamingHttpResponse
+from rest_framework.views import APIView
+
+from .models import Attendance, Grade
+from .serializers import ExportFilterSerializer
+
+
+class Echo:
+    """Pseudo-buffer for csv.writer: write() hands the line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(header, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(header, row))) + '\n'
+
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', csv_lines),
+    'ndjson': ('application/x-ndjson', ndjson_lines),
+}
+
+
+class Export:
+    """
+    A queryset exported as rows without materialising it, by the export
+    views below and the background export jobs (core.tasks).
+
+    Rows are read with ``values_list(...).iterator()`` so the database driver
+    fetches ``chunk_size`` rows at a time (a server-side cursor on PostgreSQL)
+    and each row is encoded as soon as it is read. ``columns`` are (output
+    name, ORM lookup) pairs.
+    """
+
+    def __init__(self, queryset, columns, filename='export', date_field=None, chunk_size=2000):
+        self.queryset = queryset
+        self.columns = columns
+        self.filename = filename
+        self.date_field = date_field
+        self.chunk_size = chunk_size
+
+    def filter_queryset(self, queryset, params):
+        """Apply validated ``ExportFilterSerializer`` data."""
+        if 'course' in params:
+            queryset = queryset.filter(course_id=params['course'])
+        if 'direction' in params:
+            queryset = queryset.filter(course__semester__direction_id=params['direction'])
+        if self.date_field and 'date_from' in params:
+            queryset = queryset.filter(**{f'{self.date_field}__gte': params['date_from']})
+        if self.date_field and 'date_to' in params:
+            queryset = queryset.filter(**{f'{self.date_field}__lte': params['date_to']})
+        return queryset
+
+    def export_queryset(self, params):
+        # A fresh clone per export, so a cached result set is never reused.
+        return self.filter_queryset(self.queryset.all(), params).order_by('pk')
+
+    def header(self):
+        return [name for name, _ in self.columns]
+
+    def rows(self, params):
+        """Export rows as tuples, read ``chunk_size`` at a time."""
+        return (
+            self.export_queryset(params)
+            .values_list(*(lookup for _, lookup in self.columns))
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+
+ATTENDANCE = Export(
+    Attendance.objects.all(),
+    columns=(
+        ('id', 'id'),
+        ('student', 'student_id'),
+        ('student_name', 'student__fio'),
+        ('course', 'course_id'),
+        ('course_name', 'course__name'),
+        ('date', 'date'),
+        ('status', 'status'),
+    ),
+    filename='attendance',
+    date_field='date',
+)
+
+GRADES = Export(
+    Grade.objects.all(),
+    columns=(
+        ('id', 'id'),
+        ('student', 'student_id'),
+        ('student_name', 'student__fio'),
+        ('course', 'course_id'),
+        ('course_name', 'course__name'),
+        ('type', 'type'),
+        ('score', 'score'),
+    ),
+    filename='grades',
+)
+
+
+class StreamingExportView(APIView):
+    """
+    Streams ``export`` (an ``Export``) as CSV or NDJSON, each row sent as
+    soon as it is read.
+
+    Query parameters: ``course``, ``direction``, ``from`` and ``to``
+    (ISO dates, inclusive; only when the export has a ``date_field``).
+    """
+    export = None
+
+    def get(self, request, fmt):
+        if fmt not in FORMATS:
+            raise Http404
+        content_type, encode = FORMATS[fmt]
+        filters = ExportFilterSerializer.from_query(request.query_params)
+        filters.is_valid(raise_exception=True)
+        rows = self.export.rows(filters.validated_data)
+        response = StreamingHttpResponse(encode(self.export.header(), rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.export.filename}.{fmt}"'
+        return response
@@ -0,0 +1,167 @@
+"""
+Fast read-only list serialization from ``.values()`` rows.
+
+Serializing a page through a ``ModelSerializer`` builds a model instance
+per row (plus one per joined relation) and calls each field's
+``get_attribute`` / ``to_representation``. ``RowPlan`` instead maps every
+field the serializer would emit to a column lookup and a plain conversion
+function, read from the serializer's fields at request time, so one
+``.values()`` query returns everything needed and each row becomes a dict
+with a few function calls. ``?fields=`` / ``?omit=`` are honoured since the
+plan follows ``serializer.fields``.
+
+Only fields whose output can be reproduced exactly are planned: model
+columns reached through non-nullable relations, rendered by the basic DRF
+field types below. Anything else (method fields, nested or expanded
+serializers, many-relations, properties, non-ISO date formats) makes
+``RowPlan.for_serializer`` return None and the view serializes as usual.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .fieldsets import ordering_columns
+from .renderers import ORJSONRenderer
+
+
+def _choice(field):
+    lookup = field.choice_strings_to_values
+
+    def convert(value):
+        if value == '':
+            return value
+        return lookup.get(str(value), value)
+    return convert
+
+
+def _date(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() != ISO_8601:
+        raise LookupError(output_format)
+    return lambda value: value.isoformat()
+
+
+def _time(field):
+    output_format = getattr(field, 'format', api_settings.TIME_FORMAT)
+    if output_format is None:
+        return None
+    if output_format.lower() != ISO_8601:
+        raise LookupError(output_format)
+    return lambda value: value.isoformat()
+
+
+# DRF field class -> factory of its to_representation for non-None values
+# (None means the value is emitted as-is). Exact classes only: a subclass
+# may override to_representation.
+CONVERTERS = {
+    serializers.IntegerField: lambda field: int,
+    serializers.FloatField: lambda field: float,
+    serializers.BooleanField: lambda field: bool,
+    serializers.CharField: lambda field: str,
+    serializers.EmailField: lambda field: str,
+    serializers.SlugField: lambda field: str,
+    serializers.URLField: lambda field: str,
+    serializers.ChoiceField: _choice,
+    serializers.DateField: _date,
+    serializers.TimeField: _time,
+    serializers.ReadOnlyField: lambda field: None,
+}
+
+
+def column_lookup(model, source, primary_key=False):
+    """
+    ORM lookup for a dotted ``source`` (``student.fio`` -> ``student__fio``),
+    or None when it isn't a column reached through non-nullable foreign keys.
+    """
+    attrs = source.split('.')
+    lookup = []
+    for index, attr in enumerate(attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return None
+        last = index == len(attrs) - 1
+        if not field.concrete or field.many_to_many:
+            return None
+        if field.is_relation:
+            if last:
+                return '__'.join(lookup + [field.attname]) if primary_key else None
+            if field.null:
+                # DRF skips the key when a relation on the way is missing.
+                return None
+            model = field.related_model
+        elif not last or primary_key:
+            return None
+        lookup.append(attr)
+    return '__'.join(lookup)
+
+
+class RowPlan:
+    """``(name, lookup, convert)`` for each field a serializer emits."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.lookups = list(dict.fromkeys(lookup for name, lookup, convert in columns))
+
+    @classmethod
+    def for_serializer(cls, serializer):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        model = serializer.Meta.model
+        columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if type(field) is PrimaryKeyRelatedField and field.pk_field is None:
+                lookup, convert = column_lookup(model, field.source, primary_key=True), None
+            elif type(field) in CONVERTERS and field.source != '*':
+                lookup = column_lookup(model, field.source)
+                try:
+                    convert = CONVERTERS[type(field)](field)
+                except LookupError:
+                    return None
+            else:
+                return None
+            if lookup is None:
+                return None
+            columns.append((name, lookup, convert))
+        return cls(columns)
+
+    def values(self, queryset, keep=()):
+        """The queryset as dict rows holding the planned lookups plus ``keep``."""
+        return queryset.values(*dict.fromkeys(self.lookups + list(keep)))
+
+    def represent(self, rows):
+        columns = self.columns
+        return [
+            {
+                name: value if convert is None or value is None else convert(value)
+                for name, lookup, convert in columns
+                for value in (row[lookup],)
+            }
+            for row in rows
+        ]
+
+
+class ValuesListMixin:
+    """
+    Opt-in fast path for a generic list view: GET pages are read with
+    ``.values()`` and rendered with orjson whenever the requested fields can
+    be planned, with the same output as the serializer.
+    """
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
+    def list(self, request, *args, **kwargs):
+        plan = RowPlan.for_serializer(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        rows = plan.values(self.filter_queryset(self.get_queryset()), ordering_columns(self))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(plan.represent(rows))
+        return self.get_paginated_response(plan.represent(page))
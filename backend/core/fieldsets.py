@@ -0,0 +1,202 @@
+"""
+Sparse fieldsets and relation expansion: ``?fields=``, ``?omit=`` and ``?expand=``.
+
+``DynamicFieldsMixin`` lets the client pick which fields a serializer emits
+(comma-separated, top-level names) and replace relation ids listed in
+``expandable_fields`` with nested objects. Only GET requests are affected;
+writes always use the full serializer.
+
+``sparse_queryset`` then rebuilds the view's queryset for exactly the
+fields that will be emitted: the joins (``select_related``), prefetches and
+columns (``only``) are derived from each field's ``source``. A field whose
+source isn't a model field (a property, ``*``) keeps the hand-written
+queryset, with expansions' joins added to it. Without any of the three
+parameters the queryset and output are unchanged.
+"""
+import sys
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+PARAMS = ('fields', 'omit', 'expand')
+
+
+def _names(query_params, param):
+    return [name for name in query_params.get(param, '').split(',') if name]
+
+
+class DynamicFieldsMixin:
+    """
+    ``expandable_fields`` maps a field to ``(serializer, options)`` used in its
+    place under ``?expand=``; the serializer may be given by name. A field
+    whose value depends on related rows other than its ``source`` lists them
+    in ``field_sources`` as dotted paths, so ``sparse_queryset`` can load them.
+    """
+    expandable_fields = {}
+    field_sources = {}
+
+    @property
+    def selection(self):
+        """``(fields, omit, expand)`` requested for this serializer, or None."""
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._is_top_level():
+            return None
+        selection = tuple(_names(request.query_params, param) for param in PARAMS)
+        return selection if any(selection) else None
+
+    def _is_top_level(self):
+        parent = self.parent
+        return parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selection = self.selection
+        if selection is None:
+            return fields
+        only, omit, expand = selection
+        unknown = [name for name in only + omit if name not in fields]
+        unknown += [name for name in expand if name not in self.expandable_fields]
+        if unknown:
+            raise serializers.ValidationError({
+                'fields': [f'Unknown field "{name}".' for name in unknown],
+            })
+        for name in expand:
+            serializer, options = self.expandable_fields[name]
+            if isinstance(serializer, str):
+                serializer = getattr(sys.modules[type(self).__module__], serializer, None) or import_string(serializer)
+            fields[name] = serializer(read_only=True, **options)
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        for name in omit:
+            fields.pop(name, None)
+        return fields
+
+
+class Requirements:
+    """Columns, joins and prefetches one model needs to serialize a set of fields."""
+
+    def __init__(self, model):
+        self.model = model
+        self.columns = {model._meta.pk.attname}
+        self.related = {}
+        self.prefetch = {}
+        self.exact = True
+
+    def add_path(self, attrs, nested=None):
+        """Follow ``attrs`` (a source split on dots) from this model."""
+        try:
+            field = self.model._meta.get_field(attrs[0])
+        except FieldDoesNotExist:
+            self.exact = False
+            return
+        rest = attrs[1:]
+        if not field.is_relation:
+            self.columns.add(field.attname)
+            return
+        if field.many_to_many or field.one_to_many:
+            node = self.prefetch.setdefault(field.name, Requirements(field.related_model))
+            if field.one_to_many:
+                node.columns.add(field.field.attname)
+        elif field.concrete:
+            self.columns.add(field.attname)
+            if not rest and nested is None:
+                return
+            node = self.related.setdefault(field.name, Requirements(field.related_model))
+        else:
+            self.exact = False
+            return
+        if rest:
+            node.add_path(rest, nested)
+        elif nested is not None:
+            node.add_serializer(nested)
+
+    def add_serializer(self, serializer):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        declared = getattr(serializer, 'field_sources', {})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in declared:
+                for source in declared[name]:
+                    self.add_path(source.split('.'))
+            elif field.source == '*':
+                self.exact = False
+            elif isinstance(field, serializers.BaseSerializer):
+                self.add_path(field.source.split('.'), nested=field)
+            else:
+                self.add_path(field.source.split('.'))
+
+    def is_exact(self):
+        nodes = list(self.related.values()) + list(self.prefetch.values())
+        return self.exact and all(node.is_exact() for node in nodes)
+
+    def only(self, prefix=''):
+        columns = [prefix + column for column in self.columns]
+        for name, node in self.related.items():
+            columns += node.only(f'{prefix}{name}__')
+        return columns
+
+    def joins(self, prefix=''):
+        paths = []
+        for name, node in self.related.items():
+            paths.append(prefix + name)
+            paths += node.joins(f'{prefix}{name}__')
+        return paths
+
+    def prefetches(self, prefix=''):
+        lookups = [
+            Prefetch(prefix + name, queryset=node.apply(node.model.objects.all(), exact=True))
+            for name, node in self.prefetch.items()
+        ]
+        for name, node in self.related.items():
+            lookups += node.prefetches(f'{prefix}{name}__')
+        return lookups
+
+    def apply(self, queryset, keep=(), exact=None):
+        """
+        Replace the queryset's joins, prefetches and columns when every
+        field was traced to the model; otherwise only add the joins, since
+        the hand-written queryset already covers what couldn't be traced.
+        """
+        exact = self.is_exact() if exact is None else exact
+        if exact:
+            queryset = queryset.select_related(None).prefetch_related(None)
+        joins = self.joins()
+        if joins:
+            queryset = queryset.select_related(*joins)
+        if exact:
+            prefetches = self.prefetches()
+            if prefetches:
+                queryset = queryset.prefetch_related(*prefetches)
+            queryset = queryset.only(*self.only(), *keep)
+        return queryset
+
+
+def sparse_queryset(serializer, queryset, keep=()):
+    """
+    Narrow ``queryset`` to what ``serializer`` will emit for this request;
+    ``keep`` names extra columns to load (e.g. the pagination ordering).
+    """
+    if getattr(serializer, 'selection', None) is None:
+        return queryset
+    requirements = Requirements(queryset.model)
+    requirements.add_serializer(serializer)
+    return requirements.apply(queryset, keep)
+
+
+def ordering_columns(view):
+    """Columns any ordering the view's keyset pagination may use reads."""
+    orderings = [getattr(view.pagination_class, 'ordering', ())] + list(getattr(view, 'orderings', {}).values())
+    return list(dict.fromkeys(field.lstrip('-') for ordering in orderings for field in ordering))
+
+
+class SparseFieldsViewMixin:
+    """For generic views: load only what the requested fieldset needs."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return sparse_queryset(self.get_serializer(), queryset, ordering_columns(self))
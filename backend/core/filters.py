@@ -0,0 +1,75 @@
+"""
+Validated query-parameter filters for the list views.
+
+A view sets ``filter_serializer_class`` (a ``QuerySerializer``) and
+``filter_lookups``, which maps each validated field to an ORM lookup, or to
+a callable returning a ``Q`` for filters that need more than one lookup.
+Invalid values are a 400, so clients can't silently get unfiltered pages.
+
+Filters on a course's semester or direction are written as ``course IN
+(subquery)`` rather than joins, so they're answered from the row table's
+course index instead of scanning it to join the small courses table. They
+also split the result into one keyset branch per course
+(core.models.UnionQuerySet), so a page is read in order from each course's
+index instead of sorting every matching row.
+"""
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Course
+from .search import matching_ids
+
+# A filter matching more courses than this pages with the plain ordered
+# ``course IN (subquery)`` query instead of one keyset branch per course.
+KEYSET_BRANCH_LIMIT = 20
+
+
+def in_courses(lookup):
+    """Filter rows whose course matches ``lookup`` (e.g. ``semester_id``)."""
+    def condition(value):
+        return Q(course_id__in=Course.objects.filter(**{lookup: value}).values('pk'))
+
+    def branches(value):
+        courses = Course.objects.filter(**{lookup: value}).values_list('pk', flat=True)[:KEYSET_BRANCH_LIMIT + 1]
+        if len(courses) > KEYSET_BRANCH_LIMIT:
+            return []
+        return [Q(course_id=pk) for pk in courses]
+
+    condition.branches = branches
+    return condition
+
+
+# Up to this many full-text matches are passed as a literal id list, which
+# the database reads by primary key in id order; broader searches filter
+# through the index subquery instead.
+FULL_TEXT_INLINE_IDS = 1000
+
+
+def full_text(kind):
+    """Objects whose search document (core.search) matches every word of the value."""
+    def condition(value):
+        ids = matching_ids(value, kind, limit=FULL_TEXT_INLINE_IDS + 1)
+        if len(ids) > FULL_TEXT_INLINE_IDS:
+            ids = matching_ids(value, kind)
+        return Q(pk__in=ids)
+    return condition
+
+
+class QueryFilterBackend(BaseFilterBackend):
+
+    def filter_queryset(self, request, queryset, view):
+        serializer_class = getattr(view, 'filter_serializer_class', None)
+        if serializer_class is None:
+            return queryset
+        params = serializer_class.from_query(request.query_params)
+        params.is_valid(raise_exception=True)
+        branches = ()
+        for name, value in params.validated_data.items():
+            lookup = view.filter_lookups[name]
+            queryset = queryset.filter(lookup(value) if callable(lookup) else Q(**{lookup: value}))
+            # Branches of one filter already cover the rows of all of them.
+            if not branches and hasattr(lookup, 'branches'):
+                branches = lookup.branches(value)
+        if branches:
+            queryset.keyset_branches = tuple(branches)
+        return queryset
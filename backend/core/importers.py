@@ -0,0 +1,137 @@
+import csv
+import io
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import User, Course, Grade
+from .transcripts import refresh_course_results
+
+
+class GradeImportRowSerializer(serializers.Serializer):
+    """Field-level rules of GradeSerializer's writable fields, for one CSV row."""
+    student = serializers.IntegerField()
+    course = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=Grade.TYPE_CHOICES)
+    score = serializers.IntegerField(min_value=0)
+
+
+class GradeCSVImporter:
+    """
+    Streams a CSV of grades (header: student,course,type,score) and upserts
+    them on ('student', 'course', 'type') in chunks.
+
+    Only one chunk is held in memory at a time and each chunk is committed in
+    its own transaction, so a bad row never aborts rows already loaded.
+    Row errors are reported with their CSV line number; at most
+    ``max_errors`` are kept, the rest are only counted. Input that can't be
+    decoded fails the upload when it is in the header, and otherwise stops
+    the import with an error at that line.
+    """
+    columns = ('student', 'course', 'type', 'score')
+    chunk_size = 2000
+    max_errors = 1000
+
+    def __init__(self, chunk_size=None, max_errors=None):
+        self.chunk_size = chunk_size or self.chunk_size
+        self.max_errors = max_errors or self.max_errors
+        self.row_serializer = GradeImportRowSerializer()
+        self.rows = self.created = self.updated = self.failed = 0
+        self.errors = []
+
+    def run(self, file):
+        stream = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        try:
+            reader = csv.DictReader(stream)
+            try:
+                fieldnames = reader.fieldnames or ()
+            except (UnicodeDecodeError, csv.Error) as exc:
+                raise serializers.ValidationError({'file': [f'Unreadable CSV: {self.describe(exc)}']})
+            missing = [column for column in self.columns if column not in fieldnames]
+            if missing:
+                raise serializers.ValidationError({'file': [f'Missing CSV columns: {", ".join(missing)}.']})
+            chunk = []
+            try:
+                for row in reader:
+                    chunk.append((reader.line_num, row))
+                    if len(chunk) >= self.chunk_size:
+                        self.import_chunk(chunk)
+                        chunk = []
+            except (UnicodeDecodeError, csv.Error) as exc:
+                # The reader can't resume past undecodable input; earlier rows still load.
+                self.add_error(reader.line_num + 1, {'file': [f'Unreadable CSV, import stopped: {self.describe(exc)}']})
+            if chunk:
+                self.import_chunk(chunk)
+        finally:
+            stream.detach()
+        return self.summary()
+
+    @staticmethod
+    def describe(exc):
+        if isinstance(exc, UnicodeDecodeError):
+            return 'the file is not UTF-8 encoded.'
+        return f'{exc}.'
+
+    def add_error(self, line, detail):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'errors': detail})
+
+    def import_chunk(self, chunk):
+        valid = {}
+        for line, row in chunk:
+            self.rows += 1
+            try:
+                data = self.row_serializer.run_validation({column: row.get(column) for column in self.columns})
+            except serializers.ValidationError as exc:
+                self.add_error(line, exc.detail)
+                continue
+            # Later rows for the same key win, as they would with row-by-row saves.
+            valid[(data['student'], data['course'], data['type'])] = (line, data['score'])
+
+        students = {key[0] for key in valid}
+        courses = {key[1] for key in valid}
+        known_students = set(User.objects.filter(pk__in=students, role='student').values_list('pk', flat=True))
+        known_courses = set(Course.objects.filter(pk__in=courses).values_list('pk', flat=True))
+
+        grades = []
+        for (student_id, course_id, grade_type), (line, score) in valid.items():
+            detail = {}
+            if student_id not in known_students:
+                detail['student'] = [f'Invalid pk "{student_id}" - student does not exist.']
+            if course_id not in known_courses:
+                detail['course'] = [f'Invalid pk "{course_id}" - object does not exist.']
+            if detail:
+                self.add_error(line, detail)
+                continue
+            grades.append(Grade(student_id=student_id, course_id=course_id, type=grade_type, score=score))
+        if not grades:
+            return
+
+        with transaction.atomic():
+            existing = Grade.objects.filter(
+                student_id__in={grade.student_id for grade in grades},
+                course_id__in={grade.course_id for grade in grades},
+            ).values_list('student_id', 'course_id', 'type')
+            existing = set(existing)
+            Grade.objects.bulk_create(
+                grades,
+                update_conflicts=True,
+                unique_fields=['student', 'course', 'type'],
+                update_fields=['score'],
+            )
+            # bulk_create skips the post_save signal that maintains transcripts.
+            refresh_course_results({(grade.student_id, grade.course_id) for grade in grades})
+        updated = sum((grade.student_id, grade.course_id, grade.type) in existing for grade in grades)
+        self.updated += updated
+        self.created += len(grades) - updated
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
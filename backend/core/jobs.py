@@ -0,0 +1,234 @@
+"""
+Background jobs without a broker: the ``Job`` table is the queue.
+
+Tasks are registered with ``@task(kind, serializer, roles)``; ``enqueue``
+stores a job with its validated parameters and ``manage.py run_jobs``
+starts worker processes that ``claim`` queued jobs one at a time. A claim
+is a conditional UPDATE from ``queued`` to ``running`` (behind ``SELECT ...
+FOR UPDATE SKIP LOCKED`` where the database has it), so two workers never
+run the same job. Workers hold no lock while a task runs; a
+worker thread sends a heartbeat every quarter of ``JOB_STALE_SECONDS`` (and
+every progress update sends one) and ``recover_stale`` hands jobs of workers
+that died back to the queue. A worker only records the outcome of a job it
+still owns, so a job taken back from it is not overwritten.
+
+A task is called as ``fn(context, **params)``. It reports progress through
+``context.progress(done, total)``, may write one result file with
+``context.save_file(name, chunks)`` and returns a JSON-serializable result.
+An exception re-queues the job with exponential backoff until
+``max_attempts`` is reached, so tasks must be safe to run again.
+"""
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+Task = namedtuple('Task', 'fn serializer roles')
+
+TASKS = {}
+
+
+def task(kind, serializer=None, roles=('admin',)):
+    """Register ``fn`` as the task run for jobs of ``kind``; ``roles`` may enqueue it over the API."""
+    def register(fn):
+        TASKS[kind] = Task(fn, serializer, frozenset(roles))
+        return fn
+    return register
+
+
+def validate_params(kind, params):
+    """
+    Validated parameters of a job of ``kind``: ``(stored, arguments)``, the
+    JSON-ready form kept on the job and the values the task is called with.
+    Raises ValidationError.
+    """
+    serializer_class = TASKS[kind].serializer
+    if serializer_class is None:
+        return {}, {}
+    serializer = serializer_class(data=params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.data, serializer.validated_data
+
+
+def enqueue(kind, params=None, user_id=None, max_attempts=None):
+    return Job.objects.create(
+        kind=kind,
+        params=validate_params(kind, params or {})[0],
+        created_by_id=user_id,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+class JobContext:
+    """What a running task sees of its job."""
+
+    # Progress is written at most this often, plus once at the end.
+    progress_interval = 0.5
+
+    def __init__(self, job):
+        self.job = job
+        self._written = 0.0
+
+    def progress(self, done, total=None):
+        now = time.monotonic()
+        self.job.progress_done = done
+        if total is not None:
+            self.job.progress_total = total
+        finished = total is not None and done >= total
+        if finished or now - self._written >= self.progress_interval:
+            self._written = now
+            Job.objects.filter(pk=self.job.pk).update(
+                progress_done=self.job.progress_done,
+                progress_total=self.job.progress_total,
+                heartbeat=timezone.now(),
+            )
+
+    def save_file(self, name, chunks):
+        """Write ``chunks`` (str or bytes) to the job's result file without holding them in memory."""
+        with tempfile.TemporaryFile() as buffer:
+            for chunk in chunks:
+                buffer.write(chunk.encode() if isinstance(chunk, str) else chunk)
+            buffer.seek(0)
+            if self.job.result_file:
+                self.job.result_file.delete(save=False)
+            self.job.result_file.save(name, File(buffer), save=False)
+        Job.objects.filter(pk=self.job.pk).update(result_file=self.job.result_file.name)
+
+
+class Heartbeat(threading.Thread):
+    """Refreshes a running job's heartbeat until stopped, so a task that reports no progress isn't taken for stale."""
+
+    def __init__(self, job):
+        super().__init__(name=f'job-{job.pk}-heartbeat', daemon=True)
+        self.job = job
+        self.interval = settings.JOB_STALE_SECONDS / 4
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(pk=self.job.pk, status='running', worker=self.job.worker).update(
+                        heartbeat=timezone.now(),
+                    )
+                except DatabaseError:
+                    logger.warning('Heartbeat of job %s failed', self.job.pk, exc_info=True)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def claim(worker):
+    """Mark the next due job as running by ``worker`` and return it, or None when there is none."""
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(status='queued', run_after__lte=now)
+                .order_by('run_after', 'id')
+                .first()
+            )
+            if job is None:
+                return None
+            claimed = Job.objects.filter(pk=job.pk, status='queued').update(
+                status='running', worker=worker, attempts=F('attempts') + 1, started_at=now, heartbeat=now,
+            )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome, unless the job was handed to another worker meanwhile."""
+    context = JobContext(job)
+    heartbeat = Heartbeat(job)
+    heartbeat.start()
+    try:
+        if job.kind not in TASKS:
+            raise LookupError(f'Unknown job kind "{job.kind}".')
+        result = TASKS[job.kind].fn(context, **validate_params(job.kind, job.params)[1])
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.kind, job.attempts)
+        job.error = f'{type(exc).__name__}: {exc}'
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = timezone.now() + timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+    else:
+        job.status = 'succeeded'
+        job.result = result
+        job.error = ''
+        job.finished_at = timezone.now()
+        if job.progress_total is not None:
+            job.progress_done = job.progress_total
+    finally:
+        heartbeat.stop()
+    owned = Job.objects.filter(pk=job.pk, status='running', worker=job.worker).update(
+        status=job.status, result=job.result, error=job.error, run_after=job.run_after,
+        finished_at=job.finished_at, progress_done=job.progress_done, progress_total=job.progress_total,
+        worker='',
+    )
+    if not owned:
+        logger.warning('Job %s (%s) was taken from worker %s; its outcome is dropped', job.pk, job.kind, job.worker)
+        job.refresh_from_db()
+        return job
+    job.worker = ''
+    return job
+
+
+def recover_stale():
+    """Re-queue (or fail, when out of attempts) running jobs whose worker stopped sending heartbeats."""
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', heartbeat__lt=now - timedelta(seconds=settings.JOB_STALE_SECONDS))
+    error = 'The worker running this job stopped responding.'
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='failed', error=error, worker='', finished_at=now,
+    )
+    requeued = stale.update(status='queued', error=error, worker='', run_after=now)
+    return requeued + failed
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def work(burst=False, should_stop=lambda: False, poll=None):
+    """
+    Worker loop: run due jobs until ``should_stop()``; with ``burst``, return
+    as soon as the queue is empty. Returns the number of jobs run.
+    """
+    name, poll = worker_name(), settings.JOB_POLL_SECONDS if poll is None else poll
+    count = 0
+    recover_stale()
+    while not should_stop():
+        close_old_connections()
+        job = claim(name)
+        if job is None:
+            if burst:
+                break
+            time.sleep(poll)
+            recover_stale()
+            continue
+        run_job(job)
+        count += 1
+    return count
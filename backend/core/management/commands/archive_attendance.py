@@ -0,0 +1,55 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.archive import ArchiveMismatch, archive_attendance, restore_attendance
+from core.models import Attendance, AttendanceArchive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move attendance of finished terms (dated before --before) out of the live table into "
+        "compact per student and course archives, or --restore archived attendance back into it. "
+        "Analytics and transcripts include archived attendance either way."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=date.fromisoformat,
+                            help="Archive records dated before this day (YYYY-MM-DD), i.e. the start of the active term.")
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help="Only archive or restore this course id (repeatable).")
+        parser.add_argument('--restore', action='store_true', help="Move archived records back into Attendance.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the records that would move.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, before=None, courses=None, restore=False, dry_run=False, batch_size=2000, **options):
+        if restore == (before is not None):
+            raise CommandError("Pass either --before to archive or --restore.")
+        if restore:
+            archives = AttendanceArchive.objects.all()
+            if courses:
+                archives = archives.filter(course_id__in=courses)
+            if dry_run:
+                self.stdout.write(f"Would restore {sum(archives.values_list('total', flat=True))} record(s) "
+                                  f"from {archives.count()} archive(s).")
+                return
+            try:
+                count = restore_attendance(courses, batch_size)
+            except ArchiveMismatch as exc:
+                raise CommandError(f"{exc} Nothing was restored.")
+            self.stdout.write(self.style.SUCCESS(f"Restored {count} attendance record(s)."))
+            return
+
+        if dry_run:
+            records = Attendance.objects.filter(date__lt=before)
+            if courses:
+                records = records.filter(course_id__in=courses)
+            self.stdout.write(f"Would archive {records.count()} record(s) dated before {before}.")
+            return
+        try:
+            moved, archives = archive_attendance(before, courses, batch_size)
+        except ArchiveMismatch as exc:
+            raise CommandError(f"{exc} Nothing was archived.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved} attendance record(s) dated before {before} into {archives} archive(s)."
+        ))
@@ -0,0 +1,133 @@
+import json
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import OperationalError, connection, connections, transaction
+
+TABLE = 'core_benchmark_scratch'
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency benchmark for the configured database profile: worker threads run short "
+        "read and write transactions, each wrapped in a simulated request so connection "
+        "reuse (CONN_MAX_AGE / pooling) is exercised. Runs against a scratch test database with the "
+        "profile's settings. Run once per DATABASE_PROFILE and compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--write-ratio', type=float, default=0.3,
+                            help="Fraction of operations that are write transactions.")
+        parser.add_argument('--buckets', type=int, default=1000)
+
+    def handle(self, *args, threads, seconds, write_ratio, buckets, **options):
+        scratch = tempfile.mkdtemp()
+        old_name = self.create_scratch_database(scratch)
+        try:
+            self.setup(buckets)
+            results = self.run(threads, seconds, write_ratio, buckets)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            shutil.rmtree(scratch, ignore_errors=True)
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def create_scratch_database(self, directory):
+        """
+        Switch to a throwaway test database with the profile's settings, so the
+        benchmark never writes to the live one. Returns the live database name.
+        """
+        test_settings = connection.settings_dict['TEST']
+        if connection.vendor == 'sqlite':
+            # SQLite would default to an in-memory test database, which has no
+            # journal or file locking to measure.
+            test_settings['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+        test_settings['MIGRATE'] = False
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        return old_name
+
+    def setup(self, buckets):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE TABLE {TABLE} (bucket INTEGER PRIMARY KEY, counter INTEGER NOT NULL)')
+            cursor.executemany(f'INSERT INTO {TABLE} (bucket, counter) VALUES (%s, 0)', [(i,) for i in range(buckets)])
+        connection.close()
+
+    def run(self, threads, seconds, write_ratio, buckets):
+        deadline = time.perf_counter() + seconds
+        lock = threading.Lock()
+        latencies = {'read': [], 'write': []}
+        errors = []
+
+        def operation(kind, bucket):
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    if kind == 'write':
+                        cursor.execute(f'UPDATE {TABLE} SET counter = counter + 1 WHERE bucket = %s', [bucket])
+                    else:
+                        cursor.execute(
+                            f'SELECT SUM(counter) FROM {TABLE} WHERE bucket BETWEEN %s AND %s', [bucket, bucket + 50]
+                        )
+                        cursor.fetchone()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local = {'read': [], 'write': []}
+            failed = []
+            while time.perf_counter() < deadline:
+                kind = 'write' if rng.random() < write_ratio else 'read'
+                started = time.perf_counter()
+                request_started.send(sender=self.__class__)
+                try:
+                    operation(kind, rng.randrange(buckets))
+                    local[kind].append(time.perf_counter() - started)
+                except OperationalError as exc:
+                    failed.append(str(exc))
+                finally:
+                    request_finished.send(sender=self.__class__)
+            connections.close_all()
+            with lock:
+                for kind in local:
+                    latencies[kind].extend(local[kind])
+                errors.extend(failed)
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        def summary(samples):
+            if not samples:
+                return {'ops': 0}
+            ordered = sorted(samples)
+            return {
+                'ops': len(ordered),
+                'ops_per_sec': round(len(ordered) / elapsed, 1),
+                'p50_ms': round(statistics.median(ordered) * 1000, 3),
+                'p95_ms': round(ordered[int(len(ordered) * 0.95) - 1] * 1000, 3),
+            }
+
+        total = len(latencies['read']) + len(latencies['write'])
+        return {
+            'profile': settings.DATABASE_PROFILE,
+            'vendor': connection.vendor,
+            'threads': threads,
+            'seconds': round(elapsed, 2),
+            'ops_per_sec': round(total / elapsed, 1),
+            'read': summary(latencies['read']),
+            'write': summary(latencies['write']),
+            'errors': len(errors),
+            'error_samples': sorted(set(errors))[:5],
+        }
@@ -0,0 +1,43 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.benchmarks import run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every route in core.urls against the current database (see seed_data) and "
+        "print p50/p95/p99 latency, queries per request and response size as JSON with sorted "
+        "keys, so reports from two releases can be diffed directly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--password', default='password',
+                            help="Password of the sampled student, for the token route.")
+        parser.add_argument('--route', action='append', dest='routes',
+                            help="Only benchmark this route name; may be repeated.")
+        parser.add_argument('--cold-cache', action='store_true', help="Clear the cache before every request.")
+        parser.add_argument('--output', help="Write the report to this file instead of stdout.")
+
+    def handle(self, *args, iterations, warmup, password, routes, cold_cache, output, **options):
+        try:
+            results = run_benchmarks(iterations, warmup, password, routes, cold_cache)
+        except LookupError as exc:
+            raise CommandError(str(exc))
+        report = json.dumps({
+            'profile': settings.DATABASE_PROFILE,
+            'vendor': connection.vendor,
+            'iterations': iterations,
+            'cold_cache': cold_cache,
+            'routes': results,
+        }, indent=2, sort_keys=True)
+        if output:
+            with open(output, 'w') as handle:
+                handle.write(report + '\n')
+        else:
+            self.stdout.write(report)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.queryplans import ACCEPTED_SORTS, SMALL_TABLES, explain, full_scans, hot_queries
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot queries of core.views and fail if any plan falls back to a full table scan or sort."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan, not only failing ones.")
+
+    def handle(self, *args, verbose_plans=False, **options):
+        failures = 0
+        for name, queryset in hot_queries().items():
+            scans = full_scans(queryset, SMALL_TABLES | ACCEPTED_SORTS.get(name, set()))
+            if scans or verbose_plans:
+                self.stdout.write(f"-- {name}: {'full scan of ' + ', '.join(scans) if scans else 'ok'}")
+                self.stdout.write(explain(queryset))
+            failures += bool(scans)
+        if failures:
+            raise CommandError(f"{failures} hot quer{'y' if failures == 1 else 'ies'} fall back to a full table scan.")
+        self.stdout.write(self.style.SUCCESS("All hot queries use indexes."))
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import statistics
+import time
+from types import ModuleType
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import path, reverse
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core.benchmarks import percentile
+from core.models import User
+from core.serializers import UserSerializer
+from core.tokens import ClaimsTokenObtainPairSerializer
+from core.views.courses import CourseListCreateView
+from core.views.events import EventListCreateView, InboxEventListView
+from core.views.schedules import StudentScheduleListView
+
+
+class SyncMeView(generics.GenericAPIView):
+    """The sync DRF view /me/ was served by before core.views.auth.AsyncMeView."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = UserSerializer
+
+    def get(self, request):
+        user = request.user
+        if not isinstance(user, User):
+            # Stateless token auth only carries claims; load the full profile.
+            user = User.objects.select_related('direction').get(pk=user.pk)
+        return Response(self.get_serializer(user).data)
+
+
+# url name -> (sync DRF view it replaced, role of the user calling it)
+ROUTES = {
+    'me': (SyncMeView, 'student'),
+    'student-schedule-list': (StudentScheduleListView, 'student'),
+    'event-inbox': (InboxEventListView, 'student'),
+    'event-list': (EventListCreateView, 'admin'),
+    'course-list': (CourseListCreateView, 'admin'),
+}
+
+
+def sync_urlconf():
+    """The hot routes wired to their sync DRF views, at the same paths."""
+    urlconf = ModuleType('loadtest_sync_urls')
+    urlconf.urlpatterns = [
+        path(reverse(name).lstrip('/'), view.as_view(), name=name) for name, (view, role) in ROUTES.items()
+    ]
+    return urlconf
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test of the hot read endpoints, sync DRF views vs their async versions, at high "
+        "concurrency. Requests go through Django's ASGI application in-process (what uvicorn "
+        "calls, minus the socket) on a fresh event loop, authenticated with real JWTs, so "
+        "per-request thread hops, authentication and permission checks are all included."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per route and mode.")
+        parser.add_argument('--modes', default='sync,async')
+        parser.add_argument('--student', help="Username of the student to call as (default: first active).")
+        parser.add_argument('--admin', help="Username of the admin to call as (default: first active).")
+
+    def handle(self, *args, concurrency, requests, modes, student, admin, **options):
+        modes = [mode.strip() for mode in modes.split(',')]
+        if set(modes) - {'sync', 'async'}:
+            raise CommandError("--modes takes sync and/or async.")
+        headers = {role: self.auth_header(role, username) for role, username in
+                   (('student', student), ('admin', admin))}
+        jobs = {name: (reverse(name), headers[role]) for name, (view, role) in ROUTES.items()}
+
+        results = {name: {} for name in ROUTES}
+        for mode in modes:
+            urlconf = sync_urlconf() if mode == 'sync' else None
+            with override_settings(**({'ROOT_URLCONF': urlconf} if urlconf else {})):
+                app = get_asgi_application()
+                for name, (url, header) in jobs.items():
+                    results[name][mode] = asyncio.run(self.run(app, url, header, concurrency, requests))
+        self.stdout.write(json.dumps({
+            'concurrency': concurrency,
+            'requests': requests,
+            'routes': results,
+        }, indent=2))
+
+    def auth_header(self, role, username):
+        users = User.objects.filter(role=role, is_active=True)
+        user = users.filter(username=username).first() if username else users.order_by('id').first()
+        if user is None:
+            raise CommandError(f"No active {role} user to call as; seed the database first.")
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        return f'Bearer {token}'.encode()
+
+    async def run(self, app, url, header, concurrency, requests):
+        latencies, statuses = [], {}
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                status = await self.get(app, url, header)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        ordered = sorted(latencies)
+        return {
+            'requests_per_sec': round(len(ordered) / elapsed, 1),
+            'p50_ms': round(statistics.median(ordered) * 1000, 3),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
+
+    async def get(self, app, url, header):
+        """One GET through the ASGI application; returns the status code."""
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': url,
+            'raw_path': url.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'authorization', header)],
+            'client': ('127.0.0.1', 0),
+            'server': ('localhost', 80),
+        }
+        disconnect = asyncio.Event()
+        messages = iter([{'type': 'http.request', 'body': b'', 'more_body': False}])
+        status = None
+
+        async def receive():
+            message = next(messages, None)
+            if message is None:
+                await disconnect.wait()
+                message = {'type': 'http.disconnect'}
+            return message
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                disconnect.set()
+
+        await app(scope, receive, send)
+        return status
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bitmaps import expected_bitmaps, rebuild_course_bitmaps
+from core.models import AttendanceBitmap, Course
+
+FIELDS = ('sessions', 'recorded', 'present', 'unscheduled_total', 'unscheduled_present')
+
+
+def _state(bitmap):
+    return tuple(bytes(value) if isinstance(value, memoryview) else value
+                 for value in (getattr(bitmap, field) for field in FIELDS))
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the attendance roster cache (per student and course bitmaps) from Attendance "
+        "and its archive, or check it for drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='courses',
+                            help="Only this course id (repeatable).")
+        parser.add_argument('--check', action='store_true',
+                            help="Only report bitmaps that differ from a fresh build; exit non-zero on drift.")
+        parser.add_argument('--batch-size', type=int, default=200, help="Courses rebuilt per transaction.")
+
+    def handle(self, *args, courses=None, check=False, batch_size=200, **options):
+        course_ids = courses or list(Course.objects.order_by('pk').values_list('pk', flat=True))
+        total = drifted = 0
+        for start in range(0, len(course_ids), batch_size):
+            batch = course_ids[start:start + batch_size]
+            if not check:
+                total += rebuild_course_bitmaps(batch)
+                continue
+            stored = {
+                (bitmap.student_id, bitmap.course_id): _state(bitmap)
+                for bitmap in AttendanceBitmap.objects.filter(course_id__in=batch)
+            }
+            for bitmap in expected_bitmaps(batch):
+                total += 1
+                if stored.pop((bitmap.student_id, bitmap.course_id), None) != _state(bitmap):
+                    drifted += 1
+            drifted += len(stored)
+        if check:
+            self.stdout.write(f"{total} bitmap(s) expected, {drifted} drifted.")
+            if drifted:
+                raise CommandError("Attendance bitmaps have drifted; run rebuild_attendance_bitmaps.")
+            self.stdout.write(self.style.SUCCESS("Attendance bitmaps are consistent."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} attendance bitmap(s)."))
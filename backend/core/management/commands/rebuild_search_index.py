@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.search import SOURCES, reindex
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the full-text search documents of users, courses and events from their tables, "
+        "e.g. after bulk writes that bypassed the model signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=sorted(SOURCES),
+                            help="Only rebuild this kind (repeatable).")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, kind=None, batch_size=2000, **options):
+        with transaction.atomic():
+            for name in kind or SOURCES:
+                count = reindex(name, batch_size=batch_size)
+                self.stdout.write(f"{name}: {count} document(s)")
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                # Merge the FTS5 index segments the bulk insert left behind.
+                for table in ('core_searchdocument_fts', 'core_searchdocument_trigram'):
+                    cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,88 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import CourseResult, SemesterResult
+from core.transcripts import expected_course_results, expected_semester_results
+
+
+def _key(row, fields):
+    return tuple(getattr(row, f'{field}_id') for field in fields)
+
+
+def _values(row, values):
+    return tuple(getattr(row, value) for value in values)
+
+
+def drift(model, expected, fields, values):
+    """
+    Merge-join the stored rows against the expected ones, both ordered by key,
+    and yield ``(key, stored, expected)`` for every mismatch. Memory stays flat.
+    """
+    stored = iter(model.objects.order_by(*fields).iterator())
+    expected = iter(expected)
+    current, wanted = next(stored, None), next(expected, None)
+    while current is not None or wanted is not None:
+        current_key = _key(current, fields) if current is not None else None
+        wanted_key = _key(wanted, fields) if wanted is not None else None
+        if wanted_key is None or (current_key is not None and current_key < wanted_key):
+            yield current_key, _values(current, values), None
+            current = next(stored, None)
+        elif current_key is None or wanted_key < current_key:
+            yield wanted_key, None, _values(wanted, values)
+            wanted = next(expected, None)
+        else:
+            if _values(current, values) != _values(wanted, values):
+                yield current_key, _values(current, values), _values(wanted, values)
+            current, wanted = next(stored, None), next(expected, None)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the CourseResult/SemesterResult transcript tables from Grade, or check them for drift."
+
+    tables = (
+        (CourseResult, expected_course_results, ('student', 'course'), ('total_score', 'grade_count')),
+        (SemesterResult, expected_semester_results, ('student', 'semester'),
+         ('course_count', 'credits', 'weighted_score')),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help="Only report rows that differ from a fresh rebuild; exit non-zero on drift.")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--show', type=int, default=20, help="How many drifted rows to print per table.")
+
+    def handle(self, *args, check=False, batch_size=2000, show=20, **options):
+        if check:
+            self.check_drift(show)
+        else:
+            self.rebuild(batch_size)
+
+    def check_drift(self, show):
+        total = 0
+        for model, expected, fields, values in self.tables:
+            count = 0
+            for key, stored, wanted in drift(model, expected(), fields, values):
+                if count < show:
+                    self.stdout.write(f"{model.__name__} {dict(zip(fields, key))}: stored={stored} expected={wanted}")
+                count += 1
+            self.stdout.write(f"{model.__name__}: {count} drifted row(s)")
+            total += count
+        if total:
+            raise CommandError(f"Transcript tables have drifted ({total} row(s)); run rebuild_transcripts.")
+        self.stdout.write(self.style.SUCCESS("Transcript tables are consistent."))
+
+    def rebuild(self, batch_size):
+        with transaction.atomic():
+            for model, expected, _, _ in self.tables:
+                model.objects.all().delete()
+                batch, count = [], 0
+                for row in expected():
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        model.objects.bulk_create(batch)
+                        count += len(batch)
+                        batch = []
+                model.objects.bulk_create(batch)
+                count += len(batch)
+                self.stdout.write(f"{model.__name__}: {count} row(s)")
+        self.stdout.write(self.style.SUCCESS("Transcript tables rebuilt."))
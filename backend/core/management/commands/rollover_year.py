@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Direction
+from core.rollover import AlreadyRolledOver, academic_year, apply_rollover, describe, plan_rollover
+
+
+class Command(BaseCommand):
+    help = (
+        "End-of-year rollover: promote every active student one course year, graduate (deactivate) "
+        "final-year students and clone missing semesters for next year. Each direction is rolled over "
+        "once per academic year; use --dry-run first to see what would change."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--direction', type=int, action='append', dest='directions',
+                            help="Only roll over this direction id (repeatable).")
+        parser.add_argument('--year', type=int, default=academic_year(),
+                            help="Academic year to close, by the year it started in (default: the current one).")
+        parser.add_argument('--dry-run', action='store_true', help="Print the changes without making them.")
+
+    def handle(self, *args, directions=None, year=None, dry_run=False, **options):
+        queryset = Direction.objects.all()
+        if directions:
+            queryset = queryset.filter(pk__in=directions)
+            missing = set(directions) - set(queryset.values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"Unknown direction id(s): {', '.join(map(str, sorted(missing)))}.")
+        started = time.perf_counter()
+        plans = plan_rollover(queryset)
+        for line in describe(plans):
+            self.stdout.write(line)
+        if dry_run:
+            self.stdout.write(self.style.WARNING("Dry run: nothing was changed."))
+            return
+        try:
+            promoted, graduated, course_ids = apply_rollover(plans, year)
+        except AlreadyRolledOver as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Promoted {promoted}, graduated {graduated} and cloned {len(course_ids)} course(s) "
+            f"in {time.perf_counter() - started:.1f}s."
+        ))
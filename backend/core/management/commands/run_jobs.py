@@ -0,0 +1,55 @@
+import multiprocessing
+import os
+import signal
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.jobs import work
+
+
+def worker_process(burst, poll, stop):
+    # Ctrl-C reaches the whole process group; let the parent decide when to stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+    work(burst=burst, should_stop=stop.is_set, poll=poll)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (core.jobs) in worker processes, one job per process at a "
+        "time. SIGINT/SIGTERM stop the workers once their current job is done."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Worker processes (default: one per CPU core).")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty.")
+        parser.add_argument('--poll', type=float, help="Seconds between polls of an empty queue.")
+
+    def handle(self, *args, workers, burst, poll, **options):
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+        stop = multiprocessing.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        if workers == 1:
+            count = work(burst=burst, should_stop=stop.is_set, poll=poll)
+            self.stdout.write(self.style.SUCCESS(f"Ran {count} job(s)."))
+            return
+        # Children must open their own database connections.
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=worker_process, args=(burst, poll, stop), name=f'run_jobs-{index}')
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {workers} worker(s).")
+        for process in processes:
+            process.join()
+        failed = [process.name for process in processes if process.exitcode]
+        if failed:
+            raise CommandError(f"Worker(s) exited with an error: {', '.join(failed)}.")
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
@@ -0,0 +1,230 @@
+import random
+import time
+from datetime import date, time as clock, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.analytics import invalidate_attendance
+from core.caching import invalidate_reference
+from core.calendars import invalidate_direction_feed
+from core.jobs import enqueue, work
+from core.models import (
+    SEMESTERS_PER_YEAR, Attendance, Course, Direction, Event, Grade, Schedule, Semester, User,
+    semester_numbers_for_year,
+)
+
+FIELDS = (
+    'Computer Science', 'Software Engineering', 'Applied Mathematics', 'Physics', 'Economics',
+    'Finance', 'Management', 'Law', 'Linguistics', 'Journalism', 'Chemistry', 'Biology',
+    'Civil Engineering', 'Architecture', 'Psychology',
+)
+SUBJECTS = (
+    'Calculus', 'Algebra', 'Programming', 'Databases', 'Statistics', 'History', 'Philosophy',
+    'English', 'Networks', 'Algorithms', 'Microeconomics', 'Accounting', 'Ethics', 'Mechanics',
+)
+FIRST_NAMES = ('Aigerim', 'Alikhan', 'Dana', 'Arman', 'Madina', 'Nursultan', 'Aruzhan', 'Daniyar', 'Zhanna', 'Timur')
+LAST_NAMES = ('Akhmetov', 'Bekova', 'Serikov', 'Nurlanova', 'Omarov', 'Kassymova', 'Zhaksylykov', 'Abenova')
+TOPICS = ('Introduction', 'Lecture', 'Seminar', 'Lab session', 'Workshop', 'Review', 'Midterm', 'Q&A')
+
+TERM_START = date(2025, 9, 1)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic data at production-like volumes with bulk inserts: directions with all "
+        "their semesters and courses, teachers, students in every course year, and for each "
+        "student attendance and grades in every course of their current year, plus schedules "
+        "and events. Transcripts and the search index are rebuilt and caches invalidated "
+        "afterwards. Every seeded user shares one password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directions', type=int, default=30)
+        parser.add_argument('--semesters', type=int, default=8, help="Semesters per direction.")
+        parser.add_argument('--courses-per-semester', type=int, default=12)
+        parser.add_argument('--teachers', type=int, default=600)
+        parser.add_argument('--students', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=5,
+                            help="Attendance records per student and course.")
+        parser.add_argument('--classes', type=int, default=10, help="Scheduled classes per course.")
+        parser.add_argument('--events', type=int, default=500)
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--prefix', default='seed', help="Prefix of seeded usernames and emails.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for reproducible data.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        if options['directions'] < 1:
+            raise CommandError("--directions must be at least 1.")
+        if options['semesters'] < SEMESTERS_PER_YEAR:
+            raise CommandError(f"--semesters must be at least {SEMESTERS_PER_YEAR}.")
+        if User.objects.filter(username__startswith=f'{self.prefix}-').exists():
+            raise CommandError(f"Users prefixed '{self.prefix}-' already exist; pass another --prefix.")
+
+        started = time.perf_counter()
+        directions = self.seed_directions()
+        courses = self.seed_courses(directions)
+        teachers = self.seed_users('teacher', options['teachers'], lambda i: {})
+        self.assign_professors(courses, teachers)
+        students = self.seed_students(directions)
+        self.seed_attendance_and_grades(students, courses)
+        self.seed_schedules(courses)
+        self.seed_events(directions)
+        call_command('rebuild_transcripts', batch_size=self.batch_size, stdout=self.stdout)
+        call_command('rebuild_search_index', batch_size=self.batch_size, stdout=self.stdout)
+        call_command('rebuild_attendance_bitmaps', stdout=self.stdout)
+
+        # bulk_create sends no signals, so do what core.signals would have done.
+        invalidate_reference('directions', 'semesters', 'courses')
+        invalidate_attendance([course.pk for semester in courses.values() for course in semester])
+        invalidate_direction_feed([direction.pk for direction in directions])
+        self.seed_job(courses)
+        self.stdout.write(self.style.SUCCESS(f"Seeded in {time.perf_counter() - started:.1f}s."))
+
+    def insert(self, model, rows):
+        """Bulk-insert ``rows`` (any iterable) in batches; returns the created objects."""
+        started, created = time.perf_counter(), []
+        with transaction.atomic():
+            for batch in chunked(rows, self.batch_size):
+                created.extend(model.objects.bulk_create(batch))
+        self.stdout.write(f"{model.__name__}: {len(created)} row(s) in {time.perf_counter() - started:.1f}s")
+        return created
+
+    def insert_count(self, model, rows):
+        """Like insert, for large tables whose objects aren't needed afterwards."""
+        started, count = time.perf_counter(), 0
+        with transaction.atomic():
+            for batch in chunked(rows, self.batch_size):
+                model.objects.bulk_create(batch)
+                count += len(batch)
+        self.stdout.write(f"{model.__name__}: {count} row(s) in {time.perf_counter() - started:.1f}s")
+
+    def seed_directions(self):
+        count, taken = self.options['directions'], set(Direction.objects.values_list('name', flat=True))
+        names = (f'{FIELDS[i % len(FIELDS)]} {i // len(FIELDS) + 1}' for i in range(count * 2))
+        names = [name for name in names if name not in taken][:count]
+        return self.insert(Direction, (Direction(name=name, semesters=self.options['semesters']) for name in names))
+
+    def seed_courses(self, directions):
+        """Returns ``{(direction_id, semester number): [courses]}``."""
+        semesters = self.insert(Semester, (
+            Semester(direction=direction, number=number, credits=30)
+            for direction in directions for number in range(1, self.options['semesters'] + 1)
+        ))
+        per_semester = self.options['courses_per_semester']
+        courses = self.insert(Course, (
+            Course(
+                semester=semester,
+                name=f'{SUBJECTS[(semester.number + i) % len(SUBJECTS)]} {semester.number}.{i + 1}',
+                credits=self.rng.choice((3, 4, 5, 6)),
+                is_mandatory=i < per_semester * 2 // 3,
+            )
+            for semester in semesters for i in range(per_semester)
+        ))
+        by_semester = {}
+        for course in courses:
+            by_semester.setdefault((course.semester.direction_id, course.semester.number), []).append(course)
+        return by_semester
+
+    def seed_users(self, role, count, extra):
+        password = make_password(self.options['password'])
+        return self.insert(User, (
+            User(
+                username=f'{self.prefix}-{role}-{i}',
+                email=f'{self.prefix}-{role}-{i}@example.com',
+                fio=f'{self.rng.choice(LAST_NAMES)} {self.rng.choice(FIRST_NAMES)}',
+                role=role,
+                password=password,
+                **extra(i),
+            )
+            for i in range(count)
+        ))
+
+    def assign_professors(self, courses, teachers):
+        if not teachers:
+            return
+        flat = [course for semester in courses.values() for course in semester]
+        for course in flat:
+            course.professor = self.rng.choice(teachers)
+        with transaction.atomic():
+            Course.objects.bulk_update(flat, ['professor'], batch_size=self.batch_size)
+
+    def seed_students(self, directions):
+        years = max(self.options['semesters'] // SEMESTERS_PER_YEAR, 1)
+        return self.seed_users('student', self.options['students'], lambda i: {
+            'direction': directions[i % len(directions)],
+            'course': self.rng.randint(1, years),
+        })
+
+    def seed_attendance_and_grades(self, students, courses):
+        days = self.options['days']
+        types = [value for value, label in Grade.TYPE_CHOICES]
+
+        def enrolments():
+            for student in students:
+                for number in semester_numbers_for_year(student.course):
+                    for course in courses.get((student.direction_id, number), ()):
+                        yield student, course
+
+        def attendance():
+            for student, course in enrolments():
+                for day in range(days):
+                    yield Attendance(
+                        student=student, course=course,
+                        date=TERM_START + timedelta(days=7 * day + course.pk % 5),
+                        status=self.rng.random() < 0.85,
+                    )
+
+        def grades():
+            for student, course in enrolments():
+                for kind in types:
+                    yield Grade(student=student, course=course, type=kind, score=self.rng.randint(40, 100))
+
+        self.insert_count(Attendance, attendance())
+        self.insert_count(Grade, grades())
+
+    def seed_schedules(self, courses):
+        self.insert_count(Schedule, (
+            Schedule(
+                course=course,
+                date=TERM_START + timedelta(days=7 * i + course.pk % 5),
+                time=clock(8 + 2 * (course.pk % 5), 0),
+                topic=f'{self.rng.choice(TOPICS)} {i + 1}',
+            )
+            for semester in courses.values() for course in semester for i in range(self.options['classes'])
+        ))
+
+    def seed_job(self, courses):
+        """One finished export job, so the job routes have a result file to serve."""
+        course = next(course for semester in courses.values() for course in semester)
+        enqueue('grade-export', {'course': course.pk})
+        self.stdout.write(f"Jobs: {work(burst=True)} run")
+
+    def seed_events(self, directions):
+        audiences = [value for value, label in Event.AUDIENCE_CHOICES]
+        years = max(self.options['semesters'] // SEMESTERS_PER_YEAR, 1)
+        self.insert_count(Event, (
+            Event(
+                title=f'Announcement {i + 1}',
+                description='Synthetic event.',
+                date=TERM_START + timedelta(days=i % 120),
+                audience_role=self.rng.choice(audiences),
+                audience_direction=self.rng.choice([None, self.rng.choice(directions)]),
+                audience_course=self.rng.choice([None, self.rng.randint(1, years)]),
+            )
+            for i in range(self.options['events'])
+        ))
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_score', models.PositiveIntegerField(default=0)),
+                ('grade_count', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='core.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_results', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Course Result',
+                'verbose_name_plural': 'Course Results',
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SemesterResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_count', models.PositiveIntegerField(default=0)),
+                ('credits', models.PositiveIntegerField(default=0)),
+                ('weighted_score', models.PositiveBigIntegerField(default=0)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='core.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='semester_results', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Semester Result',
+                'verbose_name_plural': 'Semester Results',
+                'unique_together': {('student', 'semester')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_transcript_results'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['course', 'date'], name='schedule_course_date_idx'),
+        ),
+    ]
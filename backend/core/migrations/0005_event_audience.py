@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='audience_course',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Audience Course Year'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='audience_direction',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='core.direction'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='audience_role',
+            field=models.CharField(blank=True, choices=[('all', 'Everyone'), ('admin', 'Administrator'), ('teacher', 'Teacher'), ('student', 'Student')], max_length=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='recipients',
+            field=models.ManyToManyField(blank=True, related_name='events', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
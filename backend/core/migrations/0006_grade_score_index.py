@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_event_audience'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['score', 'id'], name='grade_score_id_idx'),
+        ),
+    ]
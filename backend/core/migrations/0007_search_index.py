@@ -0,0 +1,95 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+# The full-text index over core_searchdocument, per vendor (see core.search).
+# On SQLite an external-content FTS5 table kept in step by triggers, so bulk
+# writes to the documents table are indexed too.
+SQLITE_INDEX = (
+    """CREATE VIRTUAL TABLE core_searchdocument_fts USING fts5(
+        kind UNINDEXED, object_id UNINDEXED, title, body,
+        content='core_searchdocument', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER core_searchdocument_ai AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(rowid, kind, object_id, title, body)
+        VALUES (new.id, new.kind, new.object_id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_ad AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, kind, object_id, title, body)
+        VALUES ('delete', old.id, old.kind, old.object_id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_au AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_fts(core_searchdocument_fts, rowid, kind, object_id, title, body)
+        VALUES ('delete', old.id, old.kind, old.object_id, old.title, old.body);
+        INSERT INTO core_searchdocument_fts(rowid, kind, object_id, title, body)
+        VALUES (new.id, new.kind, new.object_id, new.title, new.body);
+    END""",
+)
+SQLITE_DROP = (
+    'DROP TRIGGER IF EXISTS core_searchdocument_ai',
+    'DROP TRIGGER IF EXISTS core_searchdocument_ad',
+    'DROP TRIGGER IF EXISTS core_searchdocument_au',
+    'DROP TABLE IF EXISTS core_searchdocument_fts',
+)
+POSTGRES_INDEX = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    "CREATE INDEX core_searchdocument_tsv_idx ON core_searchdocument "
+    "USING gin (to_tsvector('simple', title || ' ' || body))",
+    "CREATE INDEX core_searchdocument_trgm_idx ON core_searchdocument "
+    "USING gin ((title || ' ' || body) gin_trgm_ops)",
+)
+POSTGRES_DROP = (
+    'DROP INDEX IF EXISTS core_searchdocument_tsv_idx',
+    'DROP INDEX IF EXISTS core_searchdocument_trgm_idx',
+)
+# Documents for the rows that exist when the index is created, as
+# core.search.document builds them; the signals keep them in step after.
+BACKFILL = (
+    "INSERT INTO core_searchdocument (kind, object_id, title, body) "
+    "SELECT 'user', id, fio, trim(username || ' ' || email) FROM core_user",
+    "INSERT INTO core_searchdocument (kind, object_id, title, body) "
+    "SELECT 'course', id, name, '' FROM core_course",
+    "INSERT INTO core_searchdocument (kind, object_id, title, body) "
+    "SELECT 'event', id, title, description FROM core_event",
+)
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_grade_score_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'User'), ('course', 'Course'), ('event', 'Event')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_INDEX, 'postgresql': POSTGRES_INDEX}),
+            _run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+        migrations.RunPython(
+            _run({'sqlite': BACKFILL, 'postgresql': BACKFILL}),
+            migrations.RunPython.noop,
+        ),
+    ]
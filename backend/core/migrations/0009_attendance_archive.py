@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_background_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_date', models.DateField()),
+                ('last_date', models.DateField()),
+                ('total', models.PositiveIntegerField()),
+                ('present', models.PositiveIntegerField()),
+                ('days', models.BinaryField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_archives', to='core.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_archives', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Attendance Archive',
+                'verbose_name_plural': 'Attendance Archives',
+                'indexes': [models.Index(fields=['course', 'last_date'], name='attendance_archive_course_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+    ]
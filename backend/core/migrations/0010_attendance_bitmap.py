@@ -0,0 +1,61 @@
+# Generated by Django 5.2.3 on 2026-10-18 11:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from core.archive import unpack
+from core.bitmaps import bitmap_fields
+
+
+def backfill(apps, schema_editor):
+    """Build the roster cache of every course that has attendance, a course at a time."""
+    Attendance = apps.get_model('core', 'Attendance')
+    AttendanceArchive = apps.get_model('core', 'AttendanceArchive')
+    AttendanceBitmap = apps.get_model('core', 'AttendanceBitmap')
+    Schedule = apps.get_model('core', 'Schedule')
+    courses = set(Attendance.objects.values_list('course_id', flat=True).distinct())
+    courses |= set(AttendanceArchive.objects.values_list('course_id', flat=True).distinct())
+    for course in sorted(courses):
+        sessions = list(
+            Schedule.objects.filter(course_id=course).values_list('date', flat=True).distinct().order_by('date')
+        )
+        records = {}
+        for archive in AttendanceArchive.objects.filter(course_id=course):
+            records.setdefault(archive.student_id, {}).update(unpack(archive))
+        for student, day, status in Attendance.objects.filter(course_id=course).values_list('student_id', 'date', 'status'):
+            records.setdefault(student, {})[day] = status
+        AttendanceBitmap.objects.bulk_create([
+            AttendanceBitmap(student_id=student, course_id=course, **bitmap_fields(days, sessions))
+            for student, days in records.items()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_attendance_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceBitmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions', models.PositiveIntegerField(default=0)),
+                ('recorded', models.BinaryField()),
+                ('present', models.BinaryField()),
+                ('unscheduled_total', models.PositiveIntegerField(default=0)),
+                ('unscheduled_present', models.PositiveIntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to='core.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_bitmaps', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Attendance Bitmap',
+                'verbose_name_plural': 'Attendance Bitmaps',
+                'indexes': [models.Index(fields=['course', 'student'], name='attendance_bitmap_course_idx')],
+                'unique_together': {('student', 'course')},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_attendance_bitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='direction',
+            name='feed_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_direction_feed_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('audience_role__isnull', False)), fields=['audience_role', 'date', 'id'], name='event_audience_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0012_event_audience_date_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='schedule',
+            name='schedule_course_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'date', 'id'], name='attendance_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['course', 'date', 'time'], name='schedule_course_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'course', 'id'], name='user_role_course_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['role', 'fio', 'id'], name='user_role_fio_id_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:05
+
+from django.db import migrations
+
+# A trigram FTS5 index over the same documents, which core.search uses on
+# SQLite to find misspelled words (PostgreSQL has pg_trgm for that). It is
+# filled from the documents already indexed.
+SQLITE_INDEX = (
+    """CREATE VIRTUAL TABLE core_searchdocument_trigram USING fts5(
+        kind UNINDEXED, object_id UNINDEXED, title, body,
+        content='core_searchdocument', content_rowid='id',
+        tokenize='trigram'
+    )""",
+    """CREATE TRIGGER core_searchdocument_trigram_ai AFTER INSERT ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_trigram(rowid, kind, object_id, title, body)
+        VALUES (new.id, new.kind, new.object_id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_trigram_ad AFTER DELETE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_trigram(core_searchdocument_trigram, rowid, kind, object_id, title, body)
+        VALUES ('delete', old.id, old.kind, old.object_id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER core_searchdocument_trigram_au AFTER UPDATE ON core_searchdocument BEGIN
+        INSERT INTO core_searchdocument_trigram(core_searchdocument_trigram, rowid, kind, object_id, title, body)
+        VALUES ('delete', old.id, old.kind, old.object_id, old.title, old.body);
+        INSERT INTO core_searchdocument_trigram(rowid, kind, object_id, title, body)
+        VALUES (new.id, new.kind, new.object_id, new.title, new.body);
+    END""",
+    "INSERT INTO core_searchdocument_trigram(core_searchdocument_trigram) VALUES ('rebuild')",
+)
+SQLITE_DROP = (
+    'DROP TRIGGER IF EXISTS core_searchdocument_trigram_ai',
+    'DROP TRIGGER IF EXISTS core_searchdocument_trigram_ad',
+    'DROP TRIGGER IF EXISTS core_searchdocument_trigram_au',
+    'DROP TABLE IF EXISTS core_searchdocument_trigram',
+)
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == 'sqlite':
+            for statement in statements:
+                schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(SQLITE_INDEX), _run(SQLITE_DROP)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_search_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='direction',
+            name='rolled_over_year',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
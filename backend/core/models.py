@@ -1,5 +1,16 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.dispatch import Signal
+from django.utils import timezone
+
+SEMESTERS_PER_YEAR = 2
+
+def semester_numbers_for_year(year):
+    """Semester numbers making up a course year (year 2 -> semesters 3 and 4)."""
+    if not year:
+        return []
+    first = (year - 1) * SEMESTERS_PER_YEAR + 1
+    return list(range(first, first + SEMESTERS_PER_YEAR))
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -16,13 +27,27 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "User"
         verbose_name_plural = "Users"
+        indexes = [
+            models.Index(fields=['role', 'direction'], name='user_role_direction_idx'),
+            models.Index(fields=['role', 'course', 'id'], name='user_role_course_id_idx'),
+            models.Index(fields=['role', 'fio', 'id'], name='user_role_fio_id_idx'),
+        ]
 
     def __str__(self):
         return self.fio
 
+    @property
+    def current_semester_numbers(self):
+        return semester_numbers_for_year(self.course)
+
 class Direction(models.Model):
     name = models.CharField(max_length=100, unique=True)
     semesters = models.PositiveIntegerField()
+    # Part of the signed calendar feed URL; bumping it revokes the old URL.
+    feed_version = models.PositiveIntegerField(default=1)
+    # Academic year (by the calendar year it starts in) whose end-of-year
+    # rollover has run for this direction; see core.rollover.
+    rolled_over_year = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         verbose_name = "Direction"
@@ -58,6 +83,48 @@ class Course(models.Model):
     def __str__(self):
         return self.name
 
+class UnionQuerySet(models.QuerySet):
+    """
+    A queryset whose rows are the union of ``keyset_branches``: conditions
+    that each narrow it to rows one index reads in order. KeysetPagination
+    pages every branch on its own and then reads the page from the few
+    primary keys they return (core.pagination).
+    """
+    keyset_branches = ()
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.keyset_branches = self.keyset_branches
+        return clone
+
+    def keyset_page(self, ordering, seek, limit):
+        """The first ``limit`` rows after ``seek`` in ``ordering``, merged from the branches' pages."""
+        pages = models.Q()
+        for branch in self.keyset_branches:
+            pages |= models.Q(pk__in=self.filter(branch).order_by(*ordering).filter(seek).values('pk')[:limit])
+        # The merged page is picked from the few listed primary keys alone,
+        # so the database can't drive it from this queryset's own filters;
+        # they still apply to the rows it returns.
+        ids = self.model._base_manager.filter(pages).order_by(*ordering).values('pk')[:limit]
+        return self.filter(pk__in=ids).order_by(*ordering)[:limit]
+
+# Sent once per delete() of Attendance rows, with ``keys``: the set of
+# (student_id, course_id) pairs that lost records. Attendance has no
+# post_delete receivers, so deletes (and cascades from Course and User)
+# stay single DELETE statements.
+attendance_deleted = Signal()
+
+class AttendanceQuerySet(UnionQuerySet):
+    def delete(self):
+        keys = set(self.values_list('student_id', 'course_id').distinct())
+        deleted = super().delete()
+        if keys:
+            attendance_deleted.send(sender=self.model, keys=keys)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 class Attendance(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendances', limit_choices_to={'role': 'student'})
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendances')
@@ -68,10 +135,73 @@ class Attendance(models.Model):
         verbose_name = "Attendance"
         verbose_name_plural = "Attendances"
         unique_together = ('student', 'course', 'date')
+        indexes = [
+            models.Index(fields=['course', 'date'], name='attendance_course_date_idx'),
+            models.Index(fields=['date', 'id'], name='attendance_date_id_idx'),
+            models.Index(fields=['student', 'date', 'id'], name='attendance_student_date_idx'),
+        ]
+
+    objects = AttendanceQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.student.fio} - {self.course.name} - {self.date}"
 
+    def delete(self, *args, **kwargs):
+        key = (self.student_id, self.course_id)
+        deleted = super().delete(*args, **kwargs)
+        attendance_deleted.send(sender=type(self), keys={key})
+        return deleted
+
+class AttendanceArchive(models.Model):
+    """
+    Attendance of one student in one course moved out of Attendance by
+    core.archive: totals for analytics plus the packed days for a restore.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_archives')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance_archives')
+    first_date = models.DateField()
+    last_date = models.DateField()
+    total = models.PositiveIntegerField()
+    present = models.PositiveIntegerField()
+    days = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Attendance Archive"
+        verbose_name_plural = "Attendance Archives"
+        unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['course', 'last_date'], name='attendance_archive_course_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.fio} - {self.course.name}: {self.first_date}..{self.last_date}"
+
+class AttendanceBitmap(models.Model):
+    """
+    Roster cache entry: one student's attendance in one course (and so one
+    term) as bitsets over the course's class sessions, derived from
+    Attendance and AttendanceArchive by core.bitmaps.
+    """
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_bitmaps')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance_bitmaps')
+    sessions = models.PositiveIntegerField(default=0)
+    recorded = models.BinaryField()
+    present = models.BinaryField()
+    # Records on days without a scheduled class have no session bit.
+    unscheduled_total = models.PositiveIntegerField(default=0)
+    unscheduled_present = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Attendance Bitmap"
+        verbose_name_plural = "Attendance Bitmaps"
+        unique_together = ('student', 'course')
+        indexes = [
+            models.Index(fields=['course', 'student'], name='attendance_bitmap_course_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.fio} - {self.course.name}"
+
 class Grade(models.Model):
     TYPE_CHOICES = (
         ('module1', 'Module 1'),
@@ -89,23 +219,70 @@ class Grade(models.Model):
         verbose_name = "Grade"
         verbose_name_plural = "Grades"
         unique_together = ('student', 'course', 'type')
+        indexes = [
+            models.Index(fields=['course', 'type'], name='grade_course_type_idx'),
+            models.Index(fields=['score', 'id'], name='grade_score_id_idx'),
+        ]
+
+    objects = UnionQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.student.fio} - {self.course.name} - {self.type}"
 
 class Event(models.Model):
+    AUDIENCE_CHOICES = (('all', 'Everyone'),) + User.ROLE_CHOICES
+
     title = models.CharField(max_length=100)
     description = models.TextField()
     date = models.DateField()
-    recipients = models.ManyToManyField(User, related_name='events')
+    recipients = models.ManyToManyField(User, related_name='events', blank=True)
+    # An audience is resolved when the inbox is read, so announcing to a whole
+    # direction stores one row instead of one through-table row per student.
+    audience_role = models.CharField(max_length=10, choices=AUDIENCE_CHOICES, null=True, blank=True)
+    audience_direction = models.ForeignKey(Direction, on_delete=models.CASCADE, null=True, blank=True, related_name='events')
+    audience_course = models.PositiveIntegerField(null=True, blank=True, verbose_name="Audience Course Year")
 
     class Meta:
         verbose_name = "Event"
         verbose_name_plural = "Events"
+        indexes = [
+            models.Index(fields=['date', 'id'], name='event_date_id_idx'),
+            models.Index(
+                fields=['audience_role', 'date', 'id'], name='event_audience_date_id_idx',
+                condition=models.Q(audience_role__isnull=False),
+            ),
+        ]
+
+    objects = UnionQuerySet.as_manager()
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def visible_to(cls, user):
+        """
+        Events addressed to ``user`` explicitly or through a matching audience.
+
+        Pages are read per branch: explicit events through the recipients'
+        user index, audience events per role through event_audience_date_id_idx
+        in date order.
+        """
+        explicit = models.Q(recipients=user.pk)
+        audience = (
+            (models.Q(audience_direction__isnull=True) | models.Q(audience_direction_id=user.direction_id))
+            & (models.Q(audience_course__isnull=True) | models.Q(audience_course=user.course))
+        )
+        queryset = cls.objects.filter(
+            models.Exists(cls.recipients.through.objects.filter(event_id=models.OuterRef('pk'), user_id=user.pk))
+            | (models.Q(audience_role__in=['all', user.role]) & audience)
+        )
+        queryset.keyset_branches = (
+            explicit,
+            audience & models.Q(audience_role='all'),
+            audience & models.Q(audience_role=user.role),
+        )
+        return queryset
+
 class Schedule(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='schedules')
     date = models.DateField()
@@ -115,6 +292,108 @@ class Schedule(models.Model):
     class Meta:
         verbose_name = "Schedule"
         verbose_name_plural = "Schedules"
+        indexes = [
+            models.Index(fields=['course', 'date', 'time'], name='schedule_course_date_time_idx'),
+            models.Index(fields=['date', 'time', 'id'], name='schedule_date_time_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.course.name} - {self.date} {self.time}"
+
+class CourseResult(models.Model):
+    """Per student × course grade totals, maintained from Grade by core.transcripts."""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='course_results')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='results')
+    total_score = models.PositiveIntegerField(default=0)
+    grade_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Course Result"
+        verbose_name_plural = "Course Results"
+        unique_together = ('student', 'course')
+
+    def __str__(self):
+        return f"{self.student.fio} - {self.course.name}: {self.total_score}"
+
+class SemesterResult(models.Model):
+    """Per student × semester credit-weighted totals, maintained from CourseResult."""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='semester_results')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='results')
+    course_count = models.PositiveIntegerField(default=0)
+    credits = models.PositiveIntegerField(default=0)
+    weighted_score = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Semester Result"
+        verbose_name_plural = "Semester Results"
+        unique_together = ('student', 'semester')
+
+    @property
+    def average(self):
+        if not self.credits:
+            return None
+        return round(self.weighted_score / self.credits, 2)
+
+    def __str__(self):
+        return f"{self.student.fio} - {self.semester}: {self.average}"
+
+class SearchDocument(models.Model):
+    """
+    Searchable text of a user, course or event, maintained by core.search.
+    The full-text index over it is created per database vendor by the
+    migration that adds this table.
+    """
+    KIND_CHOICES = (
+        ('user', 'User'),
+        ('course', 'Course'),
+        ('event', 'Event'),
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Search Document"
+        verbose_name_plural = "Search Documents"
+        unique_together = ('kind', 'object_id')
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+class Job(models.Model):
+    """A unit of background work, queued in the database and run by ``manage.py run_jobs`` (core.jobs)."""
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    )
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress_done = models.PositiveBigIntegerField(default=0)
+    progress_total = models.PositiveBigIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    result_file = models.FileField(upload_to='jobs/%Y/%m/', blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'id'], name='job_queue_idx'),
+            models.Index(fields=['created_by', 'id'], name='job_owner_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.course.name} - {self.date} {self.time}"
\ No newline at end of file
+        return f"{self.kind} #{self.pk} ({self.status})"
\ No newline at end of file
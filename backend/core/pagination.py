@@ -0,0 +1,204 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a fixed, unique ordering.
+
+    Each page is fetched with ``WHERE (ordering) > (last row) LIMIT n`` rather
+    than an OFFSET, so the cost of a page does not depend on how deep the
+    client has scrolled. ``ordering`` must end with a unique column (``id``)
+    and may only name concrete, non-relational fields.
+
+    A queryset with ``keyset_branches`` (core.models.UnionQuerySet) is paged
+    branch by branch, so an OR of differently indexed conditions still reads
+    about one page per branch.
+
+    Views may whitelist other orderings in ``orderings`` (``?ordering=``
+    value -> ordering tuple, with the same constraints). Without the
+    parameter the pagination's own ``ordering`` applies.
+
+    The cursor is an opaque urlsafe base64 string encoding
+    ``{"p": [<ordering values>], "r": <reverse flag>}``; clients should
+    follow the ``next`` / ``previous`` links instead of building cursors.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    ordering = ('-id',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Same as paginate_queryset, fetching the page with the async ORM."""
+        return self.set_page([obj async for obj in self.page_queryset(queryset, request, view)])
+
+    def page_queryset(self, queryset, request, view=None):
+        """The sliced queryset for the requested page (one row extra to detect a next page)."""
+        self.request = request
+        self.ordering = self.select_ordering(request, view)
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request)
+        self.has_position = position is not None
+
+        ordering = self.get_ordering(self.reverse)
+        limit = self.page_size + 1
+        seek = Q()
+        if position is not None:
+            position = self.clean_position(queryset.model, position)
+            seek = self.seek_filter(ordering, position)
+        if getattr(queryset, 'keyset_branches', ()):
+            return queryset.keyset_page(ordering, seek, limit)
+        return queryset.order_by(*ordering).filter(seek)[:limit]
+
+    def set_page(self, results):
+        self.has_more = len(results) > self.page_size
+        del results[self.page_size:]
+        if self.reverse:
+            results.reverse()
+        self.page = results
+        return results
+
+    def select_ordering(self, request, view=None):
+        orderings = getattr(view, 'orderings', {})
+        name = request.query_params.get(self.ordering_query_param)
+        if not name:
+            return type(self).ordering
+        if name not in orderings:
+            choices = ', '.join(orderings) or 'none'
+            raise ValidationError({self.ordering_query_param: [f'Unknown ordering "{name}". Choices: {choices}.']})
+        return orderings[name]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return self.ordering
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in self.ordering)
+
+    def seek_filter(self, ordering, position):
+        """
+        Expand a row-value comparison into the equivalent OR of prefixes:
+        ``(a, b) > (x, y)`` becomes ``a > x OR (a = x AND b > y)``.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            prefix = {ordering[i].lstrip('-'): position[i] for i in range(index)}
+            condition |= Q(**prefix, **{f'{name}__{lookup}': position[index]})
+        return condition
+
+    def get_position(self, instance):
+        """Ordering values of a model instance or a ``.values()`` row."""
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            position.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return position
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position = data['p']
+            reverse = bool(data.get('r', False))
+        except (TypeError, ValueError, KeyError, binascii.Error, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def clean_position(self, model, position):
+        """Convert cursor values with their ordering fields; a value a field can't hold is an invalid cursor."""
+        cleaned = []
+        for field, value in zip(self.ordering, position):
+            try:
+                value = model._meta.get_field(field.lstrip('-')).to_python(value)
+            except (TypeError, ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None or isinstance(value, (list, dict)):
+                raise NotFound(self.invalid_cursor_message)
+            cleaned.append(value)
+        return cleaned
+
+    @staticmethod
+    def make_cursor(position, reverse=False):
+        """The cursor for a page after (or, with ``reverse``, before) ``position``."""
+        data = {'p': position}
+        if reverse:
+            data['r'] = 1
+        return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode('ascii')).decode('ascii')
+
+    def encode_cursor(self, position, reverse):
+        return replace_query_param(self.base_url, self.cursor_query_param, self.make_cursor(position, reverse))
+
+    def get_next_link(self):
+        has_next = self.has_position if self.reverse else self.has_more
+        if not has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        has_previous = self.has_more if self.reverse else self.has_position
+        if not has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class DateKeysetPagination(KeysetPagination):
+    """Newest first; used for attendance and events."""
+    ordering = ('-date', '-id')
+
+
+class ScheduleKeysetPagination(KeysetPagination):
+    """Chronological order of classes."""
+    ordering = ('date', 'time', 'id')
+
+
+class IdKeysetPagination(KeysetPagination):
+    ordering = ('id',)
@@ -0,0 +1,212 @@
+"""
+Per-request profiling: SQL count and time, serializer time and total time.
+
+``ProfilingMiddleware`` times a sample of requests (``PROFILING_SAMPLE_RATE``),
+reports the breakdown in a ``Server-Timing`` header and feeds per-route
+histograms that ``core.views.metrics`` exposes in the Prometheus text
+format. Unsampled requests only pay for one random draw.
+
+The request being profiled lives in a context variable, which asgiref
+copies into the worker threads of sync views and ``sync_to_async`` ORM
+calls, so async and sync views are measured alike. SQL is timed by an
+execute wrapper installed on every new connection and serializer work by
+wrapping ``BaseSerializer.data``; both return straight away when no
+request is being profiled. Histograms are kept per process.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.serializers import BaseSerializer
+
+_current = ContextVar('core.profiling.request', default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestProfile:
+    __slots__ = ('queries', 'sql_seconds', 'serializer_seconds', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializing = False
+
+
+def record_sql(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.sql_seconds += time.perf_counter() - started
+
+
+def install_sql_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    if record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_sql)
+
+
+def instrument_serializers():
+    """Time ``serializer.data``; nested serializers are counted once, in their parent."""
+    data = BaseSerializer.data
+    if getattr(data.fget, 'profiled', False):
+        return
+
+    def profiled_data(self):
+        profile = _current.get()
+        if profile is None or profile.serializing:
+            return data.fget(self)
+        profile.serializing = True
+        started = time.perf_counter()
+        try:
+            return data.fget(self)
+        finally:
+            profile.serializing = False
+            profile.serializer_seconds += time.perf_counter() - started
+
+    profiled_data.profiled = True
+    BaseSerializer.data = property(profiled_data)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _labels(labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+
+
+class MetricsRegistry:
+    """Thread-safe per-route histograms, rendered in the Prometheus text format."""
+
+    histograms = (
+        ('http_request_duration_seconds', 'Total time spent handling the request.', DURATION_BUCKETS),
+        ('http_request_db_duration_seconds', 'Time spent executing SQL.', DURATION_BUCKETS),
+        ('http_request_db_queries', 'SQL queries executed per request.', QUERY_BUCKETS),
+        ('http_request_serializer_duration_seconds', 'Time spent in serializer.data.', DURATION_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._series = {name: {} for name, help_text, buckets in self.histograms}
+            self._responses = {}
+
+    def observe(self, route, method, status, profile, total):
+        labels = (('route', route), ('method', method))
+        values = (total, profile.sql_seconds, profile.queries, profile.serializer_seconds)
+        with self._lock:
+            for (name, help_text, buckets), value in zip(self.histograms, values):
+                series = self._series[name]
+                if labels not in series:
+                    series[labels] = Histogram(buckets)
+                series[labels].observe(value)
+            key = labels + (('status', status),)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, help_text, buckets in self.histograms:
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for labels, histogram in sorted(self._series[name].items()):
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        lines.append(f'{name}_bucket{{{_labels(labels + (("le", bound),))}}} {count}')
+                    lines.append(f'{name}_bucket{{{_labels(labels + (("le", "+Inf"),))}}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{_labels(labels)}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{_labels(labels)}}} {histogram.count}')
+            lines += ['# HELP http_responses_total Profiled responses by status.',
+                      '# TYPE http_responses_total counter']
+            for labels, count in sorted(self._responses.items()):
+                lines.append(f'http_responses_total{{{_labels(labels)}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
+
+
+def server_timing(profile, total):
+    return ', '.join([
+        f'db;dur={profile.sql_seconds * 1000:.2f};desc="{profile.queries} queries"',
+        f'serialize;dur={profile.serializer_seconds * 1000:.2f}',
+        f'total;dur={total * 1000:.2f}',
+    ])
+
+
+class ProfilingMiddleware:
+    """
+    Put it first in MIDDLEWARE so the total covers every other middleware.
+    It is sync- and async-capable, so async views keep running natively.
+    Streaming responses are timed up to the first byte.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        profile, started = RequestProfile(), time.perf_counter()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        profile, started = RequestProfile(), time.perf_counter()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, started)
+
+    def finish(self, request, response, profile, started):
+        total = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+        METRICS.observe(route, request.method, response.status_code, profile, total)
+        response['Server-Timing'] = server_timing(profile, total)
+        return response
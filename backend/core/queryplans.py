@@ -0,0 +1,172 @@
+"""
+EXPLAIN-based checks that the hot queries behind core.views use indexes.
+
+``hot_queries`` builds the queries the list views, keyset pages and
+dashboards issue, by running each view's own ``get_queryset``,
+``filter_queryset`` and pagination for a representative request, so the
+checked SQL can't drift from what the views run. ``full_scans`` reports
+the tables a query's plan reads in full, which on SQLite includes the rows
+a page has to sort (a temp b-tree) before its LIMIT applies. Small
+reference tables (directions, semesters) are allowed to be scanned. Used by
+the test-suite and by ``manage.py check_query_plans``.
+"""
+import re
+from datetime import date, time, timedelta
+
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .fastpath import RowPlan, ValuesListMixin
+from .fieldsets import ordering_columns
+from .models import Course, User
+from .recurrence import conflicts_queryset
+from .views.attendance import AttendanceListCreateView
+from .views.events import EventListCreateView, InboxEventListView
+from .views.grades import GradeListCreateView
+from .views.schedules import ScheduleListCreateView, StudentScheduleListView
+from .views.students import StudentListCreateView
+
+SMALL_TABLES = {'core_direction', 'core_semester'}
+
+# Sorts a hot query is allowed, by query name. The inbox's explicit branch
+# reads one user's recipient rows through the user index and sorts them by
+# date (core.models.Event.visible_to).
+ACCEPTED_SORTS = {'event inbox': {'core_event_recipients'}}
+
+_SQLITE_ROW = re.compile(r'^(\d+) (\d+) \d+ (.*)$')
+_SQLITE_READ = re.compile(r'^(SCAN|SEARCH) (?:TABLE )?(\w+)(?: AS (\w+))?(\s+USING .*)?$')
+_SQLITE_PRIMARY_KEY = ('USING INTEGER PRIMARY KEY', 'USING PRIMARY KEY')
+_SQL_ALIAS = re.compile(r'"(\w+)" ([A-Z]\d+)\b')
+_POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+def view_query(view_class, user, params=None, position=None):
+    """
+    The queryset a GET to ``view_class`` with query ``params`` runs for
+    ``user``, including the fast path's ``.values()`` and the keyset page
+    (after ``position``, a list of ordering values, when given).
+    """
+    params = dict(params or {})
+    pagination_class = view_class.pagination_class
+    if position is not None:
+        params[pagination_class.cursor_query_param] = pagination_class.make_cursor(position)
+    request = APIRequestFactory().get('/', params)
+    force_authenticate(request, user)
+    view = view_class(args=(), kwargs={}, format_kwarg=None)
+    view.request = view.initialize_request(request)
+    queryset = view.filter_queryset(view.get_queryset())
+    if isinstance(view, ValuesListMixin):
+        plan = RowPlan.for_serializer(view.get_serializer())
+        if plan is not None:
+            queryset = plan.values(queryset, ordering_columns(view))
+    if view.paginator is None:
+        return queryset
+    return view.paginator.page_queryset(queryset, view.request, view)
+
+
+def hot_queries(course_id=1, student_id=1, direction_id=1, semester_id=1, search='student'):
+    day, later = date(2025, 9, 1), date(2025, 12, 31)
+    dates = {'from': day.isoformat(), 'to': later.isoformat()}
+    admin = User(pk=1, role='admin')
+    teacher = User(pk=1, role='teacher')
+    student = User(pk=student_id, role='student', direction_id=direction_id, course=1)
+    return {
+        'attendance page': view_query(AttendanceListCreateView, teacher),
+        'attendance next page': view_query(AttendanceListCreateView, teacher, position=[day.isoformat(), 10**6]),
+        'attendance by course and dates': view_query(AttendanceListCreateView, teacher, {'course': course_id, **dates}),
+        'attendance by student': view_query(AttendanceListCreateView, teacher, {'student': student_id}),
+        'attendance by semester': view_query(AttendanceListCreateView, teacher, {'semester': semester_id}),
+        'attendance by direction and dates': view_query(
+            AttendanceListCreateView, teacher, {'direction': direction_id, **dates},
+        ),
+        'attendance oldest first': view_query(AttendanceListCreateView, teacher, {'ordering': 'date'}),
+        'grade page': view_query(GradeListCreateView, teacher, position=[10**6]),
+        'grades by course and type': view_query(GradeListCreateView, teacher, {'course': course_id, 'type': 'final'}),
+        'grades by student': view_query(GradeListCreateView, teacher, {'student': student_id}),
+        'grades by semester': view_query(GradeListCreateView, teacher, {'semester': semester_id}),
+        'grades by direction': view_query(GradeListCreateView, teacher, {'direction': direction_id}),
+        'grades by score': view_query(GradeListCreateView, teacher, {'ordering': '-score'}),
+        'schedule page': view_query(ScheduleListCreateView, teacher, position=[day.isoformat(), '09:00', 10**6]),
+        'schedules by date': view_query(ScheduleListCreateView, teacher, dates),
+        'schedules by course and dates': view_query(ScheduleListCreateView, teacher, {'course': course_id, **dates}),
+        'student schedules': view_query(StudentScheduleListView, student, dates),
+        'schedule conflicts': conflicts_queryset(
+            Course(pk=course_id, professor_id=1), [day + timedelta(days=7 * week) for week in range(16)], time(10, 0),
+        ),
+        'students by direction': view_query(StudentListCreateView, admin, {'direction': direction_id}),
+        'students by course year': view_query(StudentListCreateView, admin, {'course': 1}),
+        'students by name': view_query(StudentListCreateView, admin, {'ordering': 'fio'}),
+        'students by search': view_query(StudentListCreateView, admin, {'search': search}),
+        'event page': view_query(EventListCreateView, admin, position=[day.isoformat(), 10**6]),
+        'event inbox': view_query(InboxEventListView, student),
+    }
+
+
+def explain(queryset):
+    """Return the plan text; on PostgreSQL seq scans are disabled so tiny test tables still plan like big ones."""
+    if connection.vendor == 'postgresql':
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+    return queryset.explain()
+
+
+def full_scans(queryset, allowed=SMALL_TABLES):
+    """Tables the plan reads (or, for a page, sorts) in full, other than ``allowed``."""
+    plan = explain(queryset)
+    if connection.vendor == 'postgresql':
+        tables = _POSTGRES_SCAN.findall(plan)
+    elif connection.vendor == 'sqlite':
+        tables = _sqlite_full_reads(plan, queryset.query.is_sliced)
+        aliases = _aliases(queryset)
+        tables = [aliases.get(table, table) for table in tables]
+    else:
+        raise NotImplementedError(f'No plan parser for {connection.vendor}')
+    return [table for table in dict.fromkeys(tables) if table not in allowed]
+
+
+def _sqlite_full_reads(plan, sliced):
+    """
+    A bare SCAN reads a whole table. SCAN ... USING INDEX is fine only when
+    the index supplies the ORDER BY and a LIMIT stops early. Under a LIMIT,
+    a temp b-tree sort means every row its query level reads is sorted
+    first, unless they are fetched by primary key from a bounded list (the
+    merge step of a keyset union, core.pagination).
+    """
+    rows = [m.groups() for m in map(_SQLITE_ROW.match, plan.splitlines()) if m]
+    children = {}
+    for node, parent, detail in rows:
+        children.setdefault(parent, []).append((node, detail))
+
+    def reads(level):
+        # Reads at one query level, through MULTI-INDEX OR branches but not into subqueries.
+        for node, detail in children.get(level, ()):
+            if detail == 'MULTI-INDEX OR' or detail.startswith('INDEX '):
+                yield from reads(node)
+            elif (match := _SQLITE_READ.match(detail)):
+                yield match
+
+    tables = []
+    for level in ['0'] + [node for node, _, _ in rows]:
+        level_reads = list(reads(level))
+        sorted_level = any(
+            detail.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in detail
+            for _, detail in children.get(level, ())
+        )
+        for read in level_reads:
+            kind, table, alias, using = read.groups()
+            if kind == 'SCAN' and (using is None or sorted_level or not sliced):
+                tables.append(alias or table)
+            elif sliced and sorted_level and not (using or '').strip().startswith(_SQLITE_PRIMARY_KEY):
+                tables.append(alias or table)
+    return tables
+
+
+def _aliases(queryset):
+    """Subquery aliases (U0, V1, ...) that name a single table in the query's SQL."""
+    sql, _ = queryset.query.sql_with_params()
+    tables = {}
+    for table, alias in _SQL_ALIAS.findall(sql):
+        tables.setdefault(alias, set()).add(table)
+    return {alias: names.pop() for alias, names in tables.items() if len(names) == 1}
@@ -0,0 +1,75 @@
+"""
+Weekly recurrence expansion and time-conflict detection for ``Schedule``.
+
+A class occupies ``SCHEDULE_CLASS_MINUTES`` from its start time, so two
+classes on the same day clash when their start times are less than that
+apart. ``find_conflicts`` checks a course's proposed dates against the
+classes of the same course and of the course's professor with one query
+per batch of dates, answered by the ``(date, time, id)`` index.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Schedule
+
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+def occurrences(start, end, weekdays, exclude=()):
+    """Dates from ``start`` to ``end`` inclusive falling on ``weekdays`` (names from WEEKDAYS)."""
+    days = {WEEKDAYS.index(day) for day in weekdays}
+    exclude = set(exclude)
+    current = start
+    while current <= end:
+        if current.weekday() in days and current not in exclude:
+            yield current
+        current += timedelta(days=1)
+
+
+def clash_window(start):
+    """Open interval of start times that overlap a class starting at ``start``."""
+    duration = timedelta(minutes=settings.SCHEDULE_CLASS_MINUTES)
+    moment = datetime.combine(datetime.min.date() + timedelta(days=1), start)
+    earliest, latest = moment - duration, moment + duration
+    lower = earliest.time() if earliest.date() == moment.date() else None
+    upper = latest.time() if latest.date() == moment.date() else None
+    return lower, upper
+
+
+def conflicts_queryset(course, dates, start):
+    """Classes of ``course`` or its professor on ``dates`` that overlap ``start``."""
+    lower, upper = clash_window(start)
+    queryset = Schedule.objects.filter(date__in=dates)
+    if lower is not None:
+        queryset = queryset.filter(time__gt=lower)
+    if upper is not None:
+        queryset = queryset.filter(time__lt=upper)
+    owner = Q(course_id=course.pk)
+    if course.professor_id is not None:
+        owner |= Q(course__professor_id=course.professor_id)
+    return queryset.filter(owner)
+
+
+def find_conflicts(course, dates, start, batch_size=500):
+    """Clashing classes as dicts, checked ``batch_size`` dates per query."""
+    conflicts = []
+    for offset in range(0, len(dates), batch_size):
+        rows = (
+            conflicts_queryset(course, dates[offset:offset + batch_size], start)
+            .order_by('date', 'time', 'id')
+            .values('id', 'course_id', 'course__name', 'date', 'time')
+        )
+        conflicts += [
+            {
+                'schedule': row['id'],
+                'course': row['course_id'],
+                'course_name': row['course__name'],
+                'date': row['date'],
+                'time': row['time'],
+                'reason': 'course' if row['course_id'] == course.pk else 'professor',
+            }
+            for row in rows
+        ]
+    return conflicts
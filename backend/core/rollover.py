@@ -0,0 +1,177 @@
+"""
+End-of-year rollover: promote students a course year, graduate the final
+year and make sure the semesters students move into exist.
+
+Semesters and courses belong to a direction and are shared by every intake,
+so the structure only needs filling in where a direction's semester ladder
+has gaps (say after ``Direction.semesters`` was raised): each semester a
+student will be in next year that doesn't exist yet is cloned, with its
+courses, from the same term one year earlier.
+
+``plan_rollover`` reads what would change with a handful of aggregate
+queries and ``apply_rollover`` performs it set-based in one transaction:
+graduation and promotion are one UPDATE each per direction, clones are bulk
+inserts. Graduates (students in their direction's final year) are
+deactivated rather than deleted, so their grades and transcripts stay.
+
+A rollover closes one academic year. The same transaction records that year
+on each direction, and ``apply_rollover`` refuses directions already rolled
+over for it, so a retried job, a double submit or a second operator can't
+promote students twice.
+"""
+import math
+from collections import defaultdict, namedtuple
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .caching import invalidate_reference
+from .models import SEMESTERS_PER_YEAR, Course, Direction, Semester, User, semester_numbers_for_year
+from .search import reindex
+from .tokens import revoke_tokens
+
+# ``promotions`` maps a course year to the number of students leaving it;
+# ``clones`` holds (number, number of the existing semester it copies, or
+# None when there is nothing to copy) for every missing semester.
+DirectionRollover = namedtuple('DirectionRollover', 'direction final_year promotions graduates clones')
+
+# Academic years start in September and are named by the calendar year they
+# start in, so a rollover in June 2026 closes academic year 2025.
+ACADEMIC_YEAR_START_MONTH = 9
+
+
+class AlreadyRolledOver(Exception):
+    """Raised by apply_rollover for directions already rolled over for the academic year."""
+
+
+def academic_year(day=None):
+    """The academic year under way (or just ended, over the summer) on ``day``, default today."""
+    day = day or timezone.localdate()
+    return day.year if day.month >= ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def final_year(direction):
+    return max(math.ceil(direction.semesters / SEMESTERS_PER_YEAR), 1)
+
+
+def _students():
+    return User.objects.filter(role='student', is_active=True, course__isnull=False)
+
+
+def plan_rollover(directions=None):
+    """What a rollover of ``directions`` (default: all) would do, as a list of DirectionRollover."""
+    directions = list((directions if directions is not None else Direction.objects.all()).order_by('name'))
+    counts = defaultdict(dict)
+    rows = (
+        _students().filter(direction__in=directions)
+        .values('direction_id', 'course')
+        .annotate(students=Count('id'))
+    )
+    for row in rows:
+        counts[row['direction_id']][row['course']] = row['students']
+    existing = defaultdict(set)
+    for direction_id, number in Semester.objects.filter(direction__in=directions).values_list('direction_id', 'number'):
+        existing[direction_id].add(number)
+
+    plans = []
+    for direction in directions:
+        last = final_year(direction)
+        years = counts[direction.pk]
+        promotions = {year: count for year, count in sorted(years.items()) if year < last}
+        graduates = sum(count for year, count in years.items() if year >= last)
+        # Next year's intake starts in year 1; everyone else moves up one.
+        needed = {1} | {year + 1 for year in promotions}
+        # Number -> existing semester it copies; a clone can be the source of a later one.
+        templates = {number: number for number in existing[direction.pk]}
+        clones = []
+        for number in sorted({n for year in needed for n in semester_numbers_for_year(year)}):
+            if number > direction.semesters or number in templates:
+                continue
+            template = templates.get(number - SEMESTERS_PER_YEAR)
+            clones.append((number, template))
+            if template is not None:
+                templates[number] = template
+        plans.append(DirectionRollover(direction, last, promotions, graduates, clones))
+    return plans
+
+
+def describe(plans):
+    """Human-readable diff of ``plans``, one line per change."""
+    lines = []
+    for plan in plans:
+        lines.append(f"{plan.direction.name} ({plan.direction.semesters} semesters, final year {plan.final_year}):")
+        for year, count in plan.promotions.items():
+            lines.append(f"  year {year} -> {year + 1}: {count} student(s)")
+        if plan.graduates:
+            lines.append(f"  year {plan.final_year} -> graduated: {plan.graduates} student(s)")
+        for number, template in plan.clones:
+            if template is None:
+                lines.append(f"  ! semester {number} is missing and has no earlier term to clone")
+            else:
+                lines.append(f"  + semester {number} cloned from semester {template}")
+        if not (plan.promotions or plan.graduates or plan.clones):
+            lines.append("  nothing to do")
+    return lines
+
+
+def _clone_semesters(plan):
+    """Bulk-insert the planned semester clones and copies of their courses; returns the new course ids."""
+    clones = [(number, template) for number, template in plan.clones if template is not None]
+    if not clones:
+        return []
+    templates = {
+        semester.number: semester
+        for semester in Semester.objects.filter(direction=plan.direction, number__in={t for _, t in clones})
+    }
+    semesters = Semester.objects.bulk_create([
+        Semester(direction=plan.direction, number=number, credits=templates[template].credits)
+        for number, template in clones
+    ])
+    courses = defaultdict(list)
+    for course in Course.objects.filter(semester__in=templates.values()).order_by('pk'):
+        courses[course.semester_id].append(course)
+    created = Course.objects.bulk_create([
+        Course(semester=semester, name=course.name, credits=course.credits, is_mandatory=course.is_mandatory,
+               professor_id=course.professor_id)
+        for semester, (number, template) in zip(semesters, clones)
+        for course in courses[templates[template].pk]
+    ])
+    return [course.pk for course in created]
+
+
+def apply_rollover(plans, year=None):
+    """
+    Perform ``plans`` as the rollover of academic ``year`` (default: the
+    current one) in one transaction; returns ``(promoted, graduated, new
+    course ids)``. Raises AlreadyRolledOver, changing nothing, when a
+    direction was already rolled over for ``year``. Tokens of every moved
+    student are revoked, since their course year is a token claim.
+    """
+    year = academic_year() if year is None else year
+    promoted = graduated = 0
+    moved, course_ids = [], []
+    with transaction.atomic():
+        # Serialise concurrent rollovers of the same directions (on SQLite
+        # the IMMEDIATE transaction already does), so the check below sees
+        # a rollover that committed meanwhile.
+        directions = Direction.objects.filter(pk__in=[plan.direction.pk for plan in plans])
+        list(directions.select_for_update().values_list('pk'))
+        done = sorted(directions.filter(rolled_over_year__gte=year).values_list('name', flat=True))
+        if done:
+            raise AlreadyRolledOver(f"Already rolled over for {year}/{year + 1}: {', '.join(done)}.")
+        directions.update(rolled_over_year=year)
+        for plan in plans:
+            students = _students().filter(direction=plan.direction)
+            moved += students.values_list('pk', flat=True)
+            leaving = students.filter(course__gte=plan.final_year)
+            staying = students.filter(course__lt=plan.final_year)
+            # Graduate first, or this year's promotions into the final year would graduate too.
+            graduated += leaving.update(is_active=False)
+            promoted += staying.update(course=F('course') + 1)
+            course_ids += _clone_semesters(plan)
+    revoke_tokens(*moved)
+    if course_ids:
+        invalidate_reference('semesters', 'courses')
+        reindex('course', course_ids)
+    return promoted, graduated, course_ids
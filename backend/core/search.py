@@ -0,0 +1,260 @@
+"""
+Full-text search over users, courses and events.
+
+Each searchable object has one ``SearchDocument`` row (a title and a body)
+and the database's own full-text index covers that table: FTS5 word and
+trigram tables on SQLite and tsvector / trigram GIN indexes on PostgreSQL,
+all created by migrations. Signals in core.signals keep the documents in
+step with saves and deletes; code that bulk-writes the source tables calls
+``reindex`` (or ``manage.py rebuild_search_index``) itself.
+
+Queries are split into words and every word must match. A word matches any
+indexed word it prefixes: on SQLite ranked by BM25 with titles weighted over
+bodies, on PostgreSQL through the tsvector ranked by ts_rank. Only when no
+document matches are misspelled matches looked up, through the trigram
+table on SQLite and trigram word similarity on PostgreSQL. Other databases
+have no full-text index; there every word must be a substring of the
+document, unranked.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Course, Event, SearchDocument, User
+
+# ``title`` and ``body`` are attribute names on the model; the body joins its attributes with spaces.
+Source = namedtuple('Source', 'model title body')
+
+SOURCES = {
+    'user': Source(User, 'fio', ('username', 'email')),
+    'course': Source(Course, 'name', ()),
+    'event': Source(Event, 'title', ('description',)),
+}
+KINDS = {source.model: kind for kind, source in SOURCES.items()}
+
+TITLE_WEIGHT = 10.0
+
+# A document matches a misspelled query on SQLite when each query word has
+# at least this trigram similarity (as pg_trgm's similarity()) to one of its
+# words; that many trigram-index hits are checked.
+FUZZY_THRESHOLD = 0.3
+FUZZY_CANDIDATES = 200
+
+_WORD = re.compile(r'\w+')
+_PG_DOCUMENT = "(title || ' ' || body)"
+_PG_VECTOR = f"to_tsvector('simple', {_PG_DOCUMENT})"
+
+
+def document(kind, obj):
+    source = SOURCES[kind]
+    return SearchDocument(
+        kind=kind,
+        object_id=obj.pk,
+        title=getattr(obj, source.title)[:255],
+        body=' '.join(filter(None, (getattr(obj, name) for name in source.body))),
+    )
+
+
+def indexed_fields(kind):
+    source = SOURCES[kind]
+    return {source.title, *source.body}
+
+
+def upsert(documents, batch_size=2000):
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['title', 'body'],
+    )
+
+
+def index_object(obj):
+    upsert([document(KINDS[type(obj)], obj)])
+
+
+def unindex(kind, ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def reindex(kind, ids=None, batch_size=2000):
+    """Rebuild the documents of ``kind`` (only ``ids`` when given); returns how many were written."""
+    source = SOURCES[kind]
+    queryset = source.model.objects.only(source.title, *source.body).order_by('pk')
+    if ids is not None:
+        ids = list(ids)
+        queryset = queryset.filter(pk__in=ids)
+        unindex(kind, ids)
+    else:
+        SearchDocument.objects.filter(kind=kind).delete()
+    batch, count = [], 0
+    for obj in queryset.iterator(chunk_size=batch_size):
+        batch.append(document(kind, obj))
+        if len(batch) >= batch_size:
+            upsert(batch, batch_size)
+            count += len(batch)
+            batch = []
+    upsert(batch, batch_size)
+    return count + len(batch)
+
+
+def search(q, kind=None, limit=20):
+    """Ranked ``{'kind', 'id', 'title', 'body', 'score'}`` dicts, best first."""
+    words = _WORD.findall(q.lower())
+    if not words:
+        return []
+    if connection.vendor == 'sqlite':
+        rows = _search_sqlite(words, kind, limit) or _fuzzy(q, words, kind, limit)
+    elif connection.vendor == 'postgresql':
+        rows = _search_postgres(words, kind, limit) or _fuzzy(q, words, kind, limit)
+    else:
+        rows = _search_substrings(words, kind, limit)
+    return [
+        {'kind': row[0], 'id': row[1], 'title': row[2], 'body': row[3], 'score': round(row[4], 4)}
+        for row in rows
+    ]
+
+
+def matching_ids(q, kind, limit=None):
+    """
+    Ids of the ``kind`` objects whose document matches every word of ``q``,
+    unranked, read from the full-text index like ``search``: a subquery for
+    ``pk__in`` filters or, with ``limit``, a list of at most that many ids.
+    Like ``search``, the list holds misspelled matches when nothing else
+    matches; the subquery is for broad queries, known to match.
+    """
+    words = _WORD.findall(q.lower())
+    if not words:
+        return []
+    if connection.vendor == 'sqlite':
+        sql = 'SELECT object_id FROM core_searchdocument_fts WHERE core_searchdocument_fts MATCH %s AND kind = %s'
+        params = [_sqlite_match(words), kind]
+    elif connection.vendor == 'postgresql':
+        sql = f"SELECT object_id FROM core_searchdocument WHERE {_PG_VECTOR} @@ to_tsquery('simple', %s) AND kind = %s"
+        params = [_postgres_prefix(words), kind]
+    else:
+        ids = SearchDocument.objects.filter(_substrings(words), kind=kind).values_list('object_id', flat=True)
+        return ids if limit is None else list(ids.order_by('object_id')[:limit])
+    if limit is None:
+        return RawSQL(sql, params)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' ORDER BY object_id LIMIT %s', params + [limit])
+        ids = [row[0] for row in cursor.fetchall()]
+    return ids or sorted(row[1] for row in _fuzzy(q, words, kind, limit))
+
+
+def _sqlite_match(words):
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _search_sqlite(words, kind, limit):
+    match = _sqlite_match(words)
+    sql = (
+        'SELECT kind, object_id, title, body, -bm25(core_searchdocument_fts, 0, 0, %s, 1.0) AS score '
+        'FROM core_searchdocument_fts WHERE core_searchdocument_fts MATCH %s'
+    )
+    params = [TITLE_WEIGHT, match]
+    if kind:
+        sql += ' AND kind = %s'
+        params.append(kind)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' ORDER BY score DESC LIMIT %s', params + [limit])
+        return cursor.fetchall()
+
+
+def _fuzzy(q, words, kind, limit):
+    """At most ``limit`` documents matching ``q`` up to a misspelling, most similar first."""
+    if connection.vendor == 'sqlite':
+        return _fuzzy_sqlite(words, kind)[:limit]
+    return _fuzzy_postgres(q, kind, limit)
+
+
+def _fuzzy_sqlite(words, kind):
+    """Documents matching every word up to a misspelling, most similar first."""
+    grams = {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+    if not grams:
+        return []
+    sql = (
+        'SELECT kind, object_id, title, body FROM core_searchdocument_trigram '
+        'WHERE core_searchdocument_trigram MATCH %s'
+    )
+    params = [' OR '.join(f'"{gram}"' for gram in sorted(grams))]
+    if kind:
+        sql += ' AND kind = %s'
+        params.append(kind)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' ORDER BY rank LIMIT %s', params + [FUZZY_CANDIDATES])
+        candidates = cursor.fetchall()
+    rows = []
+    for row in candidates:
+        document_words = [_trigrams(word) for word in _WORD.findall(f'{row[2]} {row[3]}'.lower())]
+        score = min(
+            max((_similarity(_trigrams(word), other) for other in document_words), default=0.0)
+            for word in words
+        )
+        if score >= FUZZY_THRESHOLD:
+            rows.append((*row, score))
+    rows.sort(key=lambda row: -row[4])
+    return rows
+
+
+def _trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _similarity(a, b):
+    return len(a & b) / len(a | b)
+
+
+def _postgres_prefix(words):
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+def _search_postgres(words, kind, limit):
+    sql = (
+        f"SELECT kind, object_id, title, body, "
+        f"ts_rank(setweight(to_tsvector('simple', title), 'A') || to_tsvector('simple', body), q) AS score "
+        f"FROM core_searchdocument, to_tsquery('simple', %s) q "
+        f"WHERE {_PG_VECTOR} @@ q"
+    )
+    params = [_postgres_prefix(words)]
+    if kind:
+        sql += ' AND kind = %s'
+        params.append(kind)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' ORDER BY score DESC LIMIT %s', params + [limit])
+        return cursor.fetchall()
+
+
+def _fuzzy_postgres(query, kind, limit):
+    sql = (
+        f"SELECT kind, object_id, title, body, word_similarity(%s, {_PG_DOCUMENT}) AS score "
+        f"FROM core_searchdocument WHERE %s <%% {_PG_DOCUMENT}"
+    )
+    params = [query, query]
+    if kind:
+        sql += ' AND kind = %s'
+        params.append(kind)
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' ORDER BY score DESC LIMIT %s', params + [limit])
+        return cursor.fetchall()
+
+
+def _substrings(words):
+    condition = Q()
+    for word in words:
+        condition &= Q(title__icontains=word) | Q(body__icontains=word)
+    return condition
+
+
+def _search_substrings(words, kind, limit):
+    documents = SearchDocument.objects.filter(_substrings(words))
+    if kind:
+        documents = documents.filter(kind=kind)
+    rows = documents.order_by('kind', 'object_id').values_list('kind', 'object_id', 'title', 'body')[:limit]
+    return [(*row, 0.0) for row in rows]
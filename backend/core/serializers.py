@@ -1,7 +1,95 @@
+from django.db import connection, transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.urls import reverse
 from rest_framework import serializers
-from .models import User, Direction, Semester, Course, Attendance, Grade, Event, Schedule
+from .analytics import invalidate_attendance
+from .bitmaps import rebuild_course_bitmaps, refresh_bitmaps
+from .calendars import invalidate_direction_feed
+from .fieldsets import DynamicFieldsMixin
+from .jobs import TASKS, enqueue, validate_params
+from .recurrence import WEEKDAYS, find_conflicts, occurrences
+from .rollover import academic_year
+from .models import (
+    User, Direction, Semester, Course, Attendance, Grade, Event, Schedule, CourseResult, SemesterResult, SearchDocument,
+    Job,
+)
 
-class UserSerializer(serializers.ModelSerializer):
+class QuerySerializer(serializers.Serializer):
+    """
+    Validates query parameters. Use ``from_query`` to build it from
+    ``request.query_params``; declared fields are picked up by name or by
+    their alias in ``query_aliases``, anything else is ignored.
+    """
+    query_aliases = {}
+
+    @classmethod
+    def from_query(cls, query_params):
+        data = {}
+        for param, value in query_params.items():
+            name = cls.query_aliases.get(param, param)
+            if name in cls._declared_fields:
+                data[name] = value
+        return cls(data=data)
+
+class DateRangeSerializer(QuerySerializer):
+    """
+    Optional inclusive ``from`` / ``to`` query parameters; subclasses may
+    declare more optional filters.
+    """
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+
+    query_aliases = {'from': 'date_from', 'to': 'date_to'}
+
+    def validate(self, attrs):
+        if 'date_from' in attrs and 'date_to' in attrs and attrs['date_from'] > attrs['date_to']:
+            raise serializers.ValidationError({'to': ['Must not be earlier than "from".']})
+        return attrs
+
+class ExportFilterSerializer(DateRangeSerializer):
+    course = serializers.IntegerField(required=False)
+    direction = serializers.IntegerField(required=False)
+
+class AttendanceAnalyticsQuerySerializer(ExportFilterSerializer):
+    scope = serializers.ChoiceField(choices=['student', 'course', 'direction'])
+    below = serializers.FloatField(required=False, min_value=0, max_value=100)
+
+class AttendanceRosterQuerySerializer(QuerySerializer):
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+
+class SearchQuerySerializer(QuerySerializer):
+    q = serializers.CharField(min_length=2, max_length=200)
+    kind = serializers.ChoiceField(choices=SearchDocument.KIND_CHOICES, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+class AttendanceFilterSerializer(DateRangeSerializer):
+    student = serializers.IntegerField(required=False)
+    course = serializers.IntegerField(required=False)
+    semester = serializers.IntegerField(required=False)
+    direction = serializers.IntegerField(required=False)
+    status = serializers.BooleanField(required=False)
+
+class GradeFilterSerializer(QuerySerializer):
+    student = serializers.IntegerField(required=False)
+    course = serializers.IntegerField(required=False)
+    semester = serializers.IntegerField(required=False)
+    direction = serializers.IntegerField(required=False)
+    type = serializers.ChoiceField(choices=Grade.TYPE_CHOICES, required=False)
+
+class ScheduleFilterSerializer(DateRangeSerializer):
+    course = serializers.IntegerField(required=False)
+
+class StudentFilterSerializer(QuerySerializer):
+    direction = serializers.IntegerField(required=False)
+    course = serializers.IntegerField(required=False, min_value=1)
+    search = serializers.CharField(required=False)
+
+class JobFilterSerializer(QuerySerializer):
+    kind = serializers.CharField(required=False, max_length=50)
+    status = serializers.ChoiceField(choices=Job.STATUS_CHOICES, required=False)
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'direction': ('DirectionSerializer', {})}
     direction_name = serializers.CharField(source='direction.name', read_only=True)
 
     class Meta:
@@ -23,19 +111,21 @@ class UserSerializer(serializers.ModelSerializer):
         )
         return user
 
-class DirectionSerializer(serializers.ModelSerializer):
+class DirectionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Direction
         fields = ['id', 'name', 'semesters']
 
-class SemesterSerializer(serializers.ModelSerializer):
+class SemesterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'direction': ('DirectionSerializer', {})}
     direction_name = serializers.CharField(source='direction.name', read_only=True)
 
     class Meta:
         model = Semester
         fields = ['id', 'direction', 'direction_name', 'number', 'credits']
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'semester': ('SemesterSerializer', {}), 'professor': ('UserSerializer', {})}
     professor_name = serializers.CharField(source='professor.fio', read_only=True)
     semester_number = serializers.IntegerField(source='semester.number', read_only=True)
 
@@ -43,7 +133,8 @@ class CourseSerializer(serializers.ModelSerializer):
         model = Course
         fields = ['id', 'semester', 'semester_number', 'name', 'credits', 'is_mandatory', 'professor', 'professor_name']
 
-class AttendanceSerializer(serializers.ModelSerializer):
+class AttendanceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'student': ('UserSerializer', {}), 'course': ('CourseSerializer', {})}
     student_name = serializers.CharField(source='student.fio', read_only=True)
     course_name = serializers.CharField(source='course.name', read_only=True)
 
@@ -51,7 +142,72 @@ class AttendanceSerializer(serializers.ModelSerializer):
         model = Attendance
         fields = ['id', 'student', 'student_name', 'course', 'course_name', 'date', 'status']
 
-class GradeSerializer(serializers.ModelSerializer):
+class AttendanceRosterEntrySerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    status = serializers.BooleanField()
+
+class AttendanceBulkSerializer(serializers.Serializer):
+    """
+    Marks a whole roster for one course session. Students are validated with a
+    single query and rows are upserted on ('student', 'course', 'date').
+    """
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    date = serializers.DateField()
+    records = AttendanceRosterEntrySerializer(many=True, allow_empty=False)
+
+    batch_size = 500
+
+    def validate_records(self, records):
+        student_ids = [record['student'] for record in records]
+        known = set(User.objects.filter(pk__in=student_ids, role='student').values_list('pk', flat=True))
+        seen = set()
+        errors = []
+        for student_id in student_ids:
+            if student_id not in known:
+                errors.append({'student': [f'Invalid pk "{student_id}" - student does not exist.']})
+            elif student_id in seen:
+                errors.append({'student': ['Student appears more than once in the roster.']})
+            else:
+                errors.append({})
+            seen.add(student_id)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return records
+
+    def create(self, validated_data):
+        course = validated_data['course']
+        date = validated_data['date']
+        records = validated_data['records']
+        student_ids = [record['student'] for record in records]
+        session = Attendance.objects.filter(course=course, date=date)
+
+        with transaction.atomic():
+            existing = set(session.filter(student_id__in=student_ids).values_list('student_id', flat=True))
+            Attendance.objects.bulk_create(
+                [Attendance(student_id=record['student'], course=course, date=date, status=record['status'])
+                 for record in records],
+                batch_size=self.batch_size,
+                update_conflicts=True,
+                unique_fields=['student', 'course', 'date'],
+                update_fields=['status'],
+            )
+            ids = dict(session.filter(student_id__in=student_ids).values_list('student_id', 'id'))
+            refresh_bitmaps({(student_id, course.pk) for student_id in student_ids})
+        # bulk_create skips the post_save signal that invalidates analytics.
+        invalidate_attendance({course.pk})
+
+        return [
+            {
+                'id': ids[record['student']],
+                'student': record['student'],
+                'status': record['status'],
+                'result': 'updated' if record['student'] in existing else 'created',
+            }
+            for record in records
+        ]
+
+class GradeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'student': ('UserSerializer', {}), 'course': ('CourseSerializer', {})}
     student_name = serializers.CharField(source='student.fio', read_only=True)
     course_name = serializers.CharField(source='course.name', read_only=True)
 
@@ -59,20 +215,230 @@ class GradeSerializer(serializers.ModelSerializer):
         model = Grade
         fields = ['id', 'student', 'student_name', 'course', 'course_name', 'type', 'score']
 
-class EventSerializer(serializers.ModelSerializer):
+class RecipientsField(serializers.ListField):
+    """
+    User ids of an event's explicit recipients. Unlike the default
+    PrimaryKeyRelatedField, which runs one query per id, the ids are
+    checked in batches by EventSerializer.validate_recipients.
+    """
+    child = serializers.IntegerField()
+
+    def to_representation(self, value):
+        return [user.pk for user in value.all()]
+
+class EventSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {
+        'recipients': ('UserSerializer', {'many': True}),
+        'audience_direction': ('DirectionSerializer', {}),
+    }
+    field_sources = {'recipient_names': ['recipients.fio']}
+    recipients = RecipientsField(required=False)
     recipient_names = serializers.SerializerMethodField()
 
     class Meta:
         model = Event
-        fields = ['id', 'title', 'description', 'date', 'recipients', 'recipient_names']
+        fields = ['id', 'title', 'description', 'date', 'recipients', 'recipient_names',
+                  'audience_role', 'audience_direction', 'audience_course']
 
     def get_recipient_names(self, obj):
         return [user.fio for user in obj.recipients.all()]
 
-class ScheduleSerializer(serializers.ModelSerializer):
+    def validate_recipients(self, value):
+        ids = list(dict.fromkeys(value))
+        batch = connection.features.max_query_params or len(ids) or 1
+        found = set()
+        for start in range(0, len(ids), batch):
+            found.update(User.objects.filter(pk__in=ids[start:start + batch]).values_list('pk', flat=True))
+        missing = [pk for pk in ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError(f'Invalid pk "{missing[0]}" - object does not exist.')
+        return ids
+
+    def validate(self, attrs):
+        if 'recipients' in attrs or self.instance is None:
+            has_recipients = bool(attrs.get('recipients'))
+        else:
+            has_recipients = self.instance.recipients.exists()
+        audience_role = attrs.get('audience_role', getattr(self.instance, 'audience_role', None))
+        if not has_recipients and not audience_role:
+            raise serializers.ValidationError('An event needs recipients or an audience_role.')
+        return attrs
+
+    def create(self, validated_data):
+        recipients = validated_data.pop('recipients', [])
+        with transaction.atomic():
+            event = Event.objects.create(**validated_data)
+            Through = Event.recipients.through
+            Through.objects.bulk_create(
+                [Through(event_id=event.pk, user_id=user_id) for user_id in recipients], batch_size=1000,
+            )
+        prefetch_related_objects([event], Prefetch('recipients', queryset=User.objects.only('id', 'fio')))
+        return event
+
+    def update(self, instance, validated_data):
+        recipients = validated_data.pop('recipients', None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if recipients is not None:
+                instance.recipients.set(recipients)
+        return instance
+
+class InboxEventSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Event
+        fields = ['id', 'title', 'description', 'date']
+
+class ScheduleSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'course': ('CourseSerializer', {})}
     course_name = serializers.CharField(source='course.name', read_only=True)
     professor_name = serializers.CharField(source='course.professor.fio', read_only=True)
 
     class Meta:
         model = Schedule
-        fields = ['id', 'course', 'course_name', 'date', 'time', 'topic', 'professor_name']
\ No newline at end of file
+        fields = ['id', 'course', 'course_name', 'date', 'time', 'topic', 'professor_name']
+
+class ScheduleRecurrenceSerializer(serializers.Serializer):
+    """
+    Expands a weekly rule into a course's classes: every ``weekdays`` date
+    from ``start`` to ``end`` (minus ``exclude``) at ``time``. The dates are
+    checked for clashes with the course's and its professor's classes in
+    batches of ``batch_size``; with ``on_conflict=skip`` clashing dates are
+    left out, otherwise nothing is created. ``{n}`` in the topic is replaced
+    by the class number.
+    """
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.select_related('semester'))
+    weekdays = serializers.ListField(child=serializers.ChoiceField(choices=WEEKDAYS), allow_empty=False)
+    time = serializers.TimeField()
+    start = serializers.DateField()
+    end = serializers.DateField()
+    topic = serializers.CharField(max_length=255)
+    exclude = serializers.ListField(child=serializers.DateField(), required=False, default=list)
+    on_conflict = serializers.ChoiceField(choices=['fail', 'skip'], default='fail')
+
+    batch_size = 500
+    max_classes = 500
+
+    def validate(self, attrs):
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'end': ['Must not be earlier than "start".']})
+        dates = list(occurrences(attrs['start'], attrs['end'], attrs['weekdays'], attrs['exclude']))
+        if not dates:
+            raise serializers.ValidationError({'weekdays': ['The rule matches no dates.']})
+        if len(dates) > self.max_classes:
+            raise serializers.ValidationError({'end': [f'The rule matches more than {self.max_classes} classes.']})
+        attrs['dates'] = dates
+        return attrs
+
+    def create(self, validated_data):
+        """Returns ``(schedules, conflicts)``; no schedules when conflicts fail the request."""
+        course = validated_data['course']
+        starts_at = validated_data['time']
+        dates = validated_data['dates']
+        with transaction.atomic():
+            # Serialise concurrent bookings of the course and of its professor (a no-op on SQLite).
+            list(Course.objects.select_for_update().filter(pk=course.pk).values_list('pk'))
+            if course.professor_id is not None:
+                list(User.objects.select_for_update().filter(pk=course.professor_id).values_list('pk'))
+            conflicts = find_conflicts(course, dates, starts_at, self.batch_size)
+            if conflicts and validated_data['on_conflict'] == 'fail':
+                return [], conflicts
+            taken = {conflict['date'] for conflict in conflicts}
+            topic = validated_data['topic']
+            schedules = Schedule.objects.bulk_create(
+                [Schedule(course=course, date=day, time=starts_at, topic=topic.replace('{n}', str(number)))
+                 for number, day in enumerate((day for day in dates if day not in taken), 1)],
+                batch_size=self.batch_size,
+            )
+            if schedules:
+                rebuild_course_bitmaps([course.pk])
+        # bulk_create skips the post_save signal that invalidates the calendar feed.
+        invalidate_direction_feed([course.semester.direction_id])
+        return schedules, conflicts
+
+class CourseResultSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'course': ('CourseSerializer', {})}
+    course_name = serializers.CharField(source='course.name', read_only=True)
+    credits = serializers.IntegerField(source='course.credits', read_only=True)
+    # Set by TranscriptView from live and archived attendance.
+    classes = serializers.IntegerField(read_only=True)
+    attended = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = CourseResult
+        fields = ['course', 'course_name', 'credits', 'total_score', 'grade_count', 'classes', 'attended']
+
+class SemesterResultSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {'semester': ('SemesterSerializer', {})}
+    number = serializers.IntegerField(source='semester.number', read_only=True)
+    direction_name = serializers.CharField(source='semester.direction.name', read_only=True)
+    credits_required = serializers.IntegerField(source='semester.credits', read_only=True)
+    average = serializers.FloatField(read_only=True)
+    courses = CourseResultSerializer(source='course_list', many=True, read_only=True)
+
+    class Meta:
+        model = SemesterResult
+        fields = ['semester', 'number', 'direction_name', 'credits_required', 'course_count', 'credits',
+                  'weighted_score', 'average', 'courses']
+
+class ExportJobSerializer(ExportFilterSerializer):
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+
+class EventFanoutSerializer(serializers.Serializer):
+    """Adds the active users of a direction (optionally one course year) as an event's explicit recipients."""
+    event = serializers.PrimaryKeyRelatedField(queryset=Event.objects.all())
+    direction = serializers.PrimaryKeyRelatedField(queryset=Direction.objects.all())
+    course = serializers.IntegerField(required=False, min_value=1)
+    role = serializers.ChoiceField(choices=User.ROLE_CHOICES, default='student')
+
+class SearchIndexJobSerializer(serializers.Serializer):
+    kind = serializers.ChoiceField(choices=SearchDocument.KIND_CHOICES, required=False)
+
+class ArchiveJobSerializer(serializers.Serializer):
+    before = serializers.DateField(required=False)
+    courses = serializers.ListField(child=serializers.IntegerField(), required=False)
+    restore = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs['restore'] == ('before' in attrs):
+            raise serializers.ValidationError('Pass either "before" to archive or "restore".')
+        return attrs
+
+class RolloverJobSerializer(serializers.Serializer):
+    directions = serializers.PrimaryKeyRelatedField(queryset=Direction.objects.all(), many=True, required=False)
+    # Pinned when the job is queued, so a retry closes the same academic year.
+    year = serializers.IntegerField(min_value=2000, default=academic_year)
+    dry_run = serializers.BooleanField(default=False)
+
+class JobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    field_sources = {'result_url': ['result_file']}
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'kind', 'params', 'status', 'attempts', 'max_attempts', 'run_after', 'progress_done',
+                  'progress_total', 'result', 'result_url', 'error', 'created_by', 'created_at', 'started_at',
+                  'finished_at']
+        read_only_fields = fields
+
+    def get_result_url(self, obj):
+        return reverse('job-result', args=[obj.pk]) if obj.result_file else None
+
+class JobCreateSerializer(serializers.Serializer):
+    """Queues a job of ``kind``; ``params`` are validated by the task's own serializer."""
+    kind = serializers.CharField(max_length=50)
+    params = serializers.JSONField(required=False, default=dict)
+
+    def validate(self, attrs):
+        registered = TASKS.get(attrs['kind'])
+        if registered is None or self.context['request'].user.role not in registered.roles:
+            raise serializers.ValidationError({'kind': [f'Unknown job kind "{attrs["kind"]}".']})
+        if not isinstance(attrs['params'], dict):
+            raise serializers.ValidationError({'params': ['Expected an object.']})
+        try:
+            validate_params(attrs['kind'], attrs['params'])
+        except serializers.ValidationError as exc:
+            raise serializers.ValidationError({'params': exc.detail})
+        return attrs
+
+    def create(self, validated_data):
+        return enqueue(validated_data['kind'], validated_data['params'], self.context['request'].user.pk)
\ No newline at end of file
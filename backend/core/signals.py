@@ -0,0 +1,253 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .analytics import invalidate_attendance
+from .bitmaps import rebuild_course_bitmaps, refresh_bitmaps
+from .caching import invalidate_reference
+from .calendars import invalidate_direction_feed
+from .tokens import CLAIM_FIELDS, revoke_tokens
+from .models import (
+    Attendance, AttendanceArchive, Course, CourseResult, Direction, Event, Grade, Schedule, Semester, User,
+    attendance_deleted,
+)
+from .search import KINDS, index_object, indexed_fields, unindex
+from .transcripts import refresh_course_results, refresh_semester_results
+
+
+def _deleted_directly(origin, model):
+    """True when ``origin`` is the model itself, not a cascade from a parent row."""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+@receiver(pre_save, sender=Grade)
+def remember_grade_key(sender, instance, raw=False, **kwargs):
+    instance._transcript_previous = None
+    if instance.pk and not raw:
+        instance._transcript_previous = (
+            Grade.objects.filter(pk=instance.pk).values_list('student_id', 'course_id').first()
+        )
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {(instance.student_id, instance.course_id)}
+    if getattr(instance, '_transcript_previous', None):
+        keys.add(instance._transcript_previous)
+    refresh_course_results(keys)
+
+@receiver(post_delete, sender=Grade)
+def grade_deleted(sender, instance, origin=None, **kwargs):
+    # Deleting a student or course cascades to its results rows as well, and
+    # course deletion refreshes the semester totals below.
+    if _deleted_directly(origin, Grade):
+        refresh_course_results({(instance.student_id, instance.course_id)})
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_weighting(sender, instance, raw=False, **kwargs):
+    instance._transcript_previous = None
+    if instance.pk and not raw:
+        instance._transcript_previous = (
+            Course.objects.filter(pk=instance.pk).values_list('semester_id', 'credits').first()
+        )
+
+@receiver(post_save, sender=Course)
+def course_saved(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_transcript_previous', None)
+    if created or raw or previous is None or previous == (instance.semester_id, instance.credits):
+        return
+    students = CourseResult.objects.filter(course=instance).values_list('student_id', flat=True)
+    semesters = {previous[0], instance.semester_id}
+    refresh_semester_results({(student, semester) for student in students for semester in semesters})
+
+@receiver(pre_delete, sender=Course)
+def remember_course_students(sender, instance, **kwargs):
+    instance._transcript_students = list(
+        CourseResult.objects.filter(course=instance).values_list('student_id', flat=True)
+    )
+
+@receiver(post_delete, sender=Course)
+def course_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin, Course):
+        students = getattr(instance, '_transcript_students', ())
+        refresh_semester_results({(student, instance.semester_id) for student in students})
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_attendance({instance.course_id})
+
+@receiver(attendance_deleted, sender=Attendance)
+def attendance_rows_deleted(sender, keys, **kwargs):
+    invalidate_attendance({course for _, course in keys})
+    refresh_bitmaps(keys)
+
+# Cascades delete attendance without Attendance signals; invalidate once per
+# deleted course or student instead.
+
+@receiver(pre_delete, sender=Course)
+def course_attendance_deleted(sender, instance, **kwargs):
+    invalidate_attendance({instance.pk})
+
+@receiver(pre_delete, sender=User)
+def student_attendance_deleted(sender, instance, **kwargs):
+    if instance.role == 'student':
+        invalidate_attendance(
+            set(Attendance.objects.filter(student=instance).values_list('course_id', flat=True).distinct())
+            | set(AttendanceArchive.objects.filter(student=instance).values_list('course_id', flat=True))
+        )
+
+
+# Attendance roster cache (core.bitmaps): refreshed per saved record and once
+# per delete (above), rebuilt per course when its sessions (schedule dates)
+# change. Cascades from a course or student delete its bitmaps as well.
+
+@receiver(pre_save, sender=Attendance)
+def remember_attendance_key(sender, instance, raw=False, **kwargs):
+    instance._bitmap_previous = None
+    if instance.pk and not raw:
+        instance._bitmap_previous = (
+            Attendance.objects.filter(pk=instance.pk).values_list('student_id', 'course_id').first()
+        )
+
+@receiver(post_save, sender=Attendance)
+def attendance_bitmap_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {(instance.student_id, instance.course_id)}
+    if getattr(instance, '_bitmap_previous', None):
+        keys.add(instance._bitmap_previous)
+    refresh_bitmaps(keys)
+
+@receiver(pre_save, sender=Schedule)
+def remember_schedule_session(sender, instance, raw=False, **kwargs):
+    instance._bitmap_previous = None
+    if instance.pk and not raw:
+        instance._bitmap_previous = Schedule.objects.filter(pk=instance.pk).values_list('course_id', 'date').first()
+
+@receiver(post_save, sender=Schedule)
+def schedule_sessions_saved(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_bitmap_previous', None)
+    if raw or previous == (instance.course_id, instance.date):
+        return
+    rebuild_course_bitmaps({instance.course_id} | ({previous[0]} if previous else set()))
+
+@receiver(post_delete, sender=Schedule)
+def schedule_sessions_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_directly(origin, Schedule):
+        rebuild_course_bitmaps([instance.course_id])
+
+# Reference list caches: each list is invalidated by the models it renders,
+# including the related names it shows (direction_name, professor_name, ...).
+
+@receiver(post_save, sender=Direction)
+@receiver(post_delete, sender=Direction)
+def direction_changed(sender, **kwargs):
+    invalidate_reference('directions', 'semesters')
+
+@receiver(post_save, sender=Semester)
+@receiver(post_delete, sender=Semester)
+def semester_changed(sender, **kwargs):
+    invalidate_reference('semesters', 'courses')
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, **kwargs):
+    invalidate_reference('courses')
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def teacher_changed(sender, instance, **kwargs):
+    # The role before the save (remember_user_claims) counts too, so a
+    # demoted teacher's courses are invalidated as well.
+    previous = getattr(instance, '_claims_previous', None)
+    if instance.role == 'teacher' or (previous is not None and previous[0] == 'teacher'):
+        invalidate_reference('courses')
+
+
+# Calendar feeds are cached per direction; course names appear in them too.
+# A class, course or semester moved to another direction changes both feeds.
+
+FEED_DIRECTION = {
+    Schedule: 'course__semester__direction_id',
+    Course: 'semester__direction_id',
+    Semester: 'direction_id',
+}
+
+@receiver(pre_save, sender=Schedule)
+@receiver(pre_save, sender=Course)
+@receiver(pre_save, sender=Semester)
+def remember_feed_direction(sender, instance, raw=False, **kwargs):
+    instance._feed_direction = None
+    if instance.pk and not raw:
+        instance._feed_direction = (
+            sender.objects.filter(pk=instance.pk).values_list(FEED_DIRECTION[sender], flat=True).first()
+        )
+
+def _feed_directions(instance, current):
+    return {*current, getattr(instance, '_feed_direction', None)}
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def schedule_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_direction_feed(_feed_directions(
+            instance, Course.objects.filter(pk=instance.course_id).values_list('semester__direction_id', flat=True)
+        ))
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_calendar_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_direction_feed(_feed_directions(
+            instance, Semester.objects.filter(pk=instance.semester_id).values_list('direction_id', flat=True)
+        ))
+
+@receiver(post_save, sender=Semester)
+def semester_calendar_changed(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_feed_direction', None)
+    if not (created or raw) and previous != instance.direction_id:
+        invalidate_direction_feed({previous, instance.direction_id})
+
+
+# Stateless JWT claims: revoke outstanding access tokens when a claim changes.
+
+@receiver(pre_save, sender=User)
+def remember_user_claims(sender, instance, raw=False, **kwargs):
+    instance._claims_previous = None
+    if instance.pk and not raw:
+        instance._claims_previous = (
+            User.objects.filter(pk=instance.pk).values_list(*CLAIM_FIELDS, 'is_active', 'password').first()
+        )
+
+@receiver(post_save, sender=User)
+def user_claims_changed(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_claims_previous', None)
+    if created or raw or previous is None:
+        return
+    current = tuple(getattr(instance, field) for field in CLAIM_FIELDS) + (instance.is_active, instance.password)
+    if current != previous:
+        revoke_tokens(instance.pk)
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    revoke_tokens(instance.pk)
+
+
+# Full-text search documents (core.search).
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Event)
+def search_document_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not indexed_fields(KINDS[sender]) & set(update_fields)):
+        return
+    index_object(instance)
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Event)
+def search_document_deleted(sender, instance, **kwargs):
+    unindex(KINDS[sender], [instance.pk])
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+Background tasks run by ``manage.py run_jobs``; see core.jobs. Imported by
+CoreConfig.ready() so every process knows the registered kinds.
+"""
+import io
+
+from django.core.management import call_command
+
+from .archive import archive_attendance, restore_attendance
+from .exports import ATTENDANCE, FORMATS, GRADES
+from .jobs import task
+from .models import Direction, Event, User
+from .rollover import AlreadyRolledOver, apply_rollover, describe, plan_rollover
+from .serializers import (
+    ArchiveJobSerializer, EventFanoutSerializer, ExportJobSerializer, RolloverJobSerializer, SearchIndexJobSerializer,
+)
+
+
+def export(context, source, format, **params):
+    """Write an export (core.exports) to the job's result file."""
+    total = source.export_queryset(params).count()
+    context.progress(0, total)
+
+    def counted(rows):
+        for done, row in enumerate(rows, 1):
+            yield row
+            context.progress(done)
+
+    context.save_file(f'{source.filename}.{format}', FORMATS[format][1](source.header(), counted(source.rows(params))))
+    context.progress(total, total)
+    return {'rows': total}
+
+
+@task('attendance-export', ExportJobSerializer, roles=('teacher', 'admin'))
+def attendance_export(context, **params):
+    return export(context, ATTENDANCE, **params)
+
+
+@task('grade-export', ExportJobSerializer, roles=('teacher', 'admin'))
+def grade_export(context, **params):
+    return export(context, GRADES, **params)
+
+
+@task('event-fanout', EventFanoutSerializer)
+def event_fanout(context, event, direction, role, course=None, batch_size=2000):
+    """
+    Snapshot an audience into an event's explicit recipients, so later
+    changes to the direction don't change who received it.
+    """
+    users = User.objects.filter(direction=direction, role=role, is_active=True)
+    if course is not None:
+        users = users.filter(course=course)
+    ids = list(users.order_by('pk').values_list('pk', flat=True))
+    context.progress(0, len(ids))
+    Through = Event.recipients.through
+    for start in range(0, len(ids), batch_size):
+        Through.objects.bulk_create(
+            [Through(event_id=event.pk, user_id=user_id) for user_id in ids[start:start + batch_size]],
+            ignore_conflicts=True,
+        )
+        context.progress(min(start + batch_size, len(ids)), len(ids))
+    return {'event': event.pk, 'recipients': len(ids)}
+
+
+def command(name, **options):
+    output = io.StringIO()
+    call_command(name, stdout=output, **options)
+    return {'output': output.getvalue().splitlines()}
+
+
+@task('rebuild-transcripts')
+def rebuild_transcripts(context):
+    return command('rebuild_transcripts')
+
+
+@task('rebuild-attendance-bitmaps')
+def rebuild_attendance_bitmaps(context):
+    return command('rebuild_attendance_bitmaps')
+
+
+@task('rebuild-search-index', SearchIndexJobSerializer)
+def rebuild_search_index(context, kind=None):
+    return command('rebuild_search_index', kind=[kind] if kind else None)
+
+
+@task('archive-attendance', ArchiveJobSerializer)
+def attendance_archive(context, before=None, courses=None, restore=False):
+    if restore:
+        return {'restored': restore_attendance(courses)}
+    moved, archives = archive_attendance(before, courses)
+    return {'archived': moved, 'archives': archives}
+
+
+@task('year-rollover', RolloverJobSerializer)
+def year_rollover(context, directions=(), year=None, dry_run=False):
+    queryset = Direction.objects.all()
+    if directions:
+        queryset = queryset.filter(pk__in=[direction.pk for direction in directions])
+    plans = plan_rollover(queryset)
+    result = {'changes': describe(plans)}
+    if not dry_run:
+        # A retry of a rollover that already committed is refused here and
+        # reported instead of failing the job again.
+        try:
+            promoted, graduated, course_ids = apply_rollover(plans, year)
+        except AlreadyRolledOver as exc:
+            result['refused'] = str(exc)
+        else:
+            result.update(promoted=promoted, graduated=graduated, cloned_courses=len(course_ids))
+    return result
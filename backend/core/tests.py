@@ -1,3 +1,1610 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import tempfile
+from asyncio import iscoroutinefunction
+from datetime import date, time, timedelta
+from decimal import Decimal
+from importlib import import_module
+from time import sleep
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.deletion import Collector
+from django.http import Http404
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
+
+from . import urls as core_urls
+from .analytics import invalidate_attendance
+from .archive import ArchiveMismatch, archive_attendance, count_between, restore_attendance, unpack
+from .benchmarks import run_benchmarks
+from .calendars import feed_token, rotate_feed
+from .fastpath import RowPlan
+from .filters import in_courses
+from .importers import GradeCSVImporter
+from .jobs import JobContext, TASKS, claim, enqueue, recover_stale, run_job, task, work
+from .management.commands.loadtest_reads import SyncMeView
+from .profiling import METRICS
+from .renderers import ORJSONRenderer
+from .queryplans import ACCEPTED_SORTS, SMALL_TABLES, explain, full_scans, hot_queries
+from .rollover import academic_year
+from .serializers import AttendanceSerializer, CourseSerializer, GradeSerializer, ScheduleRecurrenceSerializer
+from .tokens import ClaimsJWTAuthentication, ClaimsTokenObtainPairSerializer
+from .asyncviews import AsyncAPIView
+from .views.auth import AsyncMeView
+from .views.courses import CourseListCreateView
+from .views.jobs import JobListCreateView
+from .views.schedules import StudentScheduleListView
+from .search import matching_ids, search
+from .models import (
+    User, Direction, Semester, Course, Attendance, Grade, Event, Schedule, CourseResult, SemesterResult, Job,
+    AttendanceArchive, AttendanceBitmap, SearchDocument,
+)
+
+
+class CoreFixtureMixin:
+    """Small but representative data set shared by the API tests."""
+
+    rows = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.direction = Direction.objects.create(name='Computer Science', semesters=8)
+        cls.semester = Semester.objects.create(direction=cls.direction, number=1, credits=30)
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='pass', fio='Admin', role='admin'
+        )
+        cls.teacher = User.objects.create_user(
+            username='teacher', email='teacher@example.com', password='pass', fio='Teacher', role='teacher'
+        )
+        cls.students = [
+            User.objects.create_user(
+                username=f'student{i}', email=f'student{i}@example.com', password='pass',
+                fio=f'Student {i}', role='student', direction=cls.direction, course=1,
+            )
+            for i in range(cls.rows)
+        ]
+        cls.courses = [
+            Course.objects.create(semester=cls.semester, name=f'Course {i}', credits=5, professor=cls.teacher)
+            for i in range(cls.rows)
+        ]
+        for student in cls.students:
+            for course in cls.courses:
+                Attendance.objects.create(student=student, course=course, date=date(2025, 9, 1), status=True)
+                Grade.objects.create(student=student, course=course, type='module1', score=80)
+        for i, course in enumerate(cls.courses):
+            Schedule.objects.create(course=course, date=date(2025, 9, 1 + i), time=time(9, 0), topic=f'Topic {i}')
+        for i in range(cls.rows):
+            event = Event.objects.create(title=f'Event {i}', description='Description', date=date(2025, 9, 1))
+            event.recipients.set(cls.students)
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class TemporaryMediaMixin:
+    """MEDIA_ROOT in a temporary directory, so job result files don't land in the project."""
+
+    @classmethod
+    def setUpClass(cls):
+        media = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(media.cleanup)
+        cls.enterClassContext(override_settings(MEDIA_ROOT=media.name))
+        super().setUpClass()
+
+
+class QueryBudgetTests(CoreFixtureMixin, TestCase):
+    """Every list endpoint must load its related rows in a fixed number of queries."""
+
+    def assertQueryBudget(self, user, url, budget):
+        client = self.client_for(user)
+        with self.assertNumQueries(budget):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response
+
+    def test_attendance_list(self):
+        response = self.assertQueryBudget(self.teacher, reverse('attendance-list'), 1)
+        self.assertEqual(len(response.data['results']), self.rows * self.rows)
+
+    def test_grade_list(self):
+        self.assertQueryBudget(self.teacher, reverse('grade-list'), 1)
+
+    def test_schedule_list(self):
+        self.assertQueryBudget(self.teacher, reverse('schedule-list'), 1)
+
+    def test_student_schedule_list(self):
+        self.assertQueryBudget(self.students[0], reverse('student-schedule-list'), 1)
+
+    def test_course_list(self):
+        self.assertQueryBudget(self.admin, reverse('course-list'), 1)
+
+    def test_semester_list(self):
+        self.assertQueryBudget(self.admin, reverse('semester-list'), 1)
+
+    def test_student_list(self):
+        self.assertQueryBudget(self.admin, reverse('student-list'), 1)
+
+    def test_direction_list(self):
+        self.assertQueryBudget(self.admin, reverse('direction-list'), 1)
+
+    def test_event_list(self):
+        response = self.assertQueryBudget(self.admin, reverse('event-list'), 2)
+        self.assertEqual(len(response.data['results'][0]['recipient_names']), self.rows)
+
+    def test_detail_views(self):
+        self.assertQueryBudget(self.teacher, reverse('attendance-detail', args=[Attendance.objects.first().pk]), 1)
+        self.assertQueryBudget(self.teacher, reverse('grade-detail', args=[Grade.objects.first().pk]), 1)
+        self.assertQueryBudget(self.teacher, reverse('schedule-detail', args=[Schedule.objects.first().pk]), 1)
+        self.assertQueryBudget(self.admin, reverse('event-detail', args=[Event.objects.first().pk]), 2)
+
+
+class KeysetPaginationTests(CoreFixtureMixin, TestCase):
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_walks_every_row_once_in_order(self):
+        client = self.client_for(self.teacher)
+        ids = self.walk(client, reverse('attendance-list') + '?page_size=7')
+        expected = list(Attendance.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_preceding_page(self):
+        client = self.client_for(self.teacher)
+        first = client.get(reverse('schedule-list') + '?page_size=2')
+        second = client.get(first.data['next'])
+        back = client.get(second.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+        self.assertIsNone(back.data['previous'])
+
+    def test_page_is_a_single_query_at_any_depth(self):
+        client = self.client_for(self.teacher)
+        url = reverse('grade-list') + '?page_size=5'
+        for _ in range(3):
+            url = client.get(url).data['next']
+        with self.assertNumQueries(1):
+            response = client.get(url)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_invalid_cursor(self):
+        client = self.client_for(self.teacher)
+        response = client.get(reverse('attendance-list') + '?cursor=garbage')
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_values_of_the_wrong_type(self):
+        def cursor(data):
+            return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+        for user, url in [
+            (self.admin, reverse('student-list') + '?cursor=' + cursor({'p': ['x'], 'r': 0})),
+            (self.teacher, reverse('grade-list') + '?cursor=' + cursor({'p': [[1]]})),
+            (self.teacher, reverse('grade-list') + '?ordering=score&cursor=' + cursor({'p': ['abc', 1]})),
+            (self.teacher, reverse('attendance-list') + '?cursor=' + cursor({'p': ['2025-13-01', 1]})),
+            (self.teacher, reverse('attendance-list') + '?cursor=' + cursor({'p': [None, 1]})),
+        ]:
+            response = self.client_for(user).get(url)
+            self.assertEqual(response.status_code, 404, url)
+
+
+class AttendanceBulkTests(CoreFixtureMixin, TestCase):
+
+    def test_upserts_roster_in_fixed_number_of_queries(self):
+        client = self.client_for(self.teacher)
+        course = self.courses[0]
+        payload = {
+            'course': course.pk,
+            'date': '2025-09-01',
+            'records': [{'student': s.pk, 'status': False} for s in self.students[:3]]
+            + [{'student': s.pk, 'status': True} for s in self.students[3:]],
+        }
+        Attendance.objects.filter(course=course, student__in=self.students[3:]).delete()
+        # course, students, savepoint, existing, upsert, ids, release, analytics invalidation,
+        # plus archives, records, sessions and upsert for the students' bitmaps.
+        with self.assertNumQueries(12):
+            response = client.post(reverse('attendance-bulk'), payload, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.data['results']
+        self.assertEqual([r['result'] for r in results], ['updated'] * 3 + ['created'] * (self.rows - 3))
+        self.assertEqual(Attendance.objects.filter(course=course, date=date(2025, 9, 1)).count(), self.rows)
+        self.assertFalse(Attendance.objects.get(pk=results[0]['id']).status)
+
+    def test_reports_row_errors(self):
+        client = self.client_for(self.teacher)
+        payload = {
+            'course': self.courses[0].pk,
+            'date': '2025-09-02',
+            'records': [
+                {'student': self.students[0].pk, 'status': True},
+                {'student': self.teacher.pk, 'status': True},
+                {'student': self.students[0].pk, 'status': False},
+            ],
+        }
+        response = client.post(reverse('attendance-bulk'), payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['records']
+        self.assertEqual(errors[0], {})
+        self.assertIn('student', errors[1])
+        self.assertIn('student', errors[2])
+        self.assertFalse(Attendance.objects.filter(date=date(2025, 9, 2)).exists())
+
+
+class GradeImportTests(CoreFixtureMixin, TestCase):
+
+    def upload(self, text):
+        client = self.client_for(self.teacher)
+        upload = SimpleUploadedFile('grades.csv', text.encode('utf-8'), content_type='text/csv')
+        return client.post(reverse('grade-import'), {'file': upload}, format='multipart')
+
+    def test_upserts_and_reports_row_errors(self):
+        student, course = self.students[0], self.courses[0]
+        lines = [
+            'student,course,type,score',
+            f'{student.pk},{course.pk},module1,95',
+            f'{student.pk},{course.pk},final,70',
+            f'{student.pk},{course.pk},exam,70',
+            f'{self.teacher.pk},{course.pk},lab,70',
+            f'{student.pk},{course.pk},lab,-1',
+        ]
+        response = self.upload('\n'.join(lines))
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['rows'], 5)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 3)
+        self.assertEqual([e['line'] for e in response.data['errors']], [4, 6, 5])
+        self.assertEqual(Grade.objects.get(student=student, course=course, type='module1').score, 95)
+        self.assertEqual(Grade.objects.get(student=student, course=course, type='final').score, 70)
+
+    def test_chunks_commit_independently(self):
+        importer = GradeCSVImporter(chunk_size=2)
+        rows = ['student,course,type,score'] + [
+            f'{student.pk},{self.courses[1].pk},final,{60 + i}' for i, student in enumerate(self.students)
+        ]
+        summary = importer.run(io.BytesIO('\n'.join(rows).encode('utf-8')))
+        self.assertEqual(summary['created'], self.rows)
+        self.assertEqual(Grade.objects.filter(course=self.courses[1], type='final').count(), self.rows)
+
+    def test_missing_columns(self):
+        response = self.upload('student,course,score\n1,1,5\n')
+        self.assertEqual(response.status_code, 400)
+
+    def test_undecodable_input(self):
+        client = self.client_for(self.teacher)
+        student, course = self.students[0], self.courses[0]
+
+        def post(content):
+            upload = SimpleUploadedFile('grades.csv', content, content_type='text/csv')
+            return client.post(reverse('grade-import'), {'file': upload}, format='multipart')
+
+        response = post('student,course,type,scöre\n'.encode('latin-1'))
+        self.assertEqual(response.status_code, 400, response.content)
+        good = f'{student.pk},{course.pk},final,70\n'.encode()
+        # Past the first decoded block, so the header reads fine.
+        response = post(b'student,course,type,score\n' + good * 1000 + b'\xff\xfe,\x00\n')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertIn('not UTF-8', str(response.data['errors'][0]['errors']))
+        response = post(b'student,course,type,score\n' + f'{student.pk},{course.pk},lab,\x0070\n'.encode())
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.data['failed'], 1)
+
+
+class ExportTests(CoreFixtureMixin, TestCase):
+
+    def export(self, name, fmt, query=''):
+        response = self.client_for(self.admin).get(reverse(name, args=[fmt]) + query)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_attendance_csv(self):
+        lines = self.export('attendance-export', 'csv').splitlines()
+        self.assertEqual(lines[0], 'id,student,student_name,course,course_name,date,status')
+        self.assertEqual(len(lines), 1 + self.rows * self.rows)
+        self.assertIn('Student 0,', lines[1])
+
+    def test_grade_ndjson_filtered_by_course(self):
+        course = self.courses[2]
+        rows = [json.loads(line) for line in self.export('grade-export', 'ndjson', f'?course={course.pk}').splitlines()]
+        self.assertEqual(len(rows), self.rows)
+        self.assertEqual({row['course_name'] for row in rows}, {course.name})
+
+    def test_attendance_date_range(self):
+        body = self.export('attendance-export', 'ndjson', '?from=2025-09-02&to=2025-09-30')
+        self.assertEqual(body, '')
+
+    def test_bad_filter_and_format(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(client.get(reverse('attendance-export', args=['csv']) + '?from=nope').status_code, 400)
+        self.assertEqual(client.get(reverse('attendance-export', args=['xml'])).status_code, 404)
+
+
+class TranscriptTests(CoreFixtureMixin, TestCase):
+
+    def test_summary_follows_grade_changes(self):
+        student, course = self.students[0], self.courses[0]
+        result = SemesterResult.objects.get(student=student, semester=self.semester)
+        self.assertEqual((result.course_count, result.credits, result.average), (self.rows, 5 * self.rows, 80))
+
+        grade = Grade.objects.create(student=student, course=course, type='final', score=20)
+        self.assertEqual(CourseResult.objects.get(student=student, course=course).total_score, 100)
+        grade.score = 10
+        grade.save()
+        self.assertEqual(CourseResult.objects.get(student=student, course=course).total_score, 90)
+        Grade.objects.filter(student=student, course=course).delete()
+        self.assertFalse(CourseResult.objects.filter(student=student, course=course).exists())
+        result.refresh_from_db()
+        self.assertEqual((result.course_count, result.credits), (self.rows - 1, 5 * (self.rows - 1)))
+
+    def test_course_credit_change_reweights_semester(self):
+        course = self.courses[0]
+        course.credits = 10
+        course.save()
+        result = SemesterResult.objects.get(student=self.students[0], semester=self.semester)
+        self.assertEqual(result.credits, 5 * (self.rows - 1) + 10)
+
+    def test_cascading_deletes(self):
+        self.courses[0].delete()
+        result = SemesterResult.objects.get(student=self.students[0], semester=self.semester)
+        self.assertEqual(result.course_count, self.rows - 1)
+        self.semester.delete()
+        self.assertFalse(SemesterResult.objects.exists())
+        self.assertFalse(CourseResult.objects.exists())
+
+    def test_endpoints(self):
+        student = self.students[1]
+        response = self.client_for(student).get(reverse('transcript'))
+        self.assertEqual(response.status_code, 200)
+        semester = response.data['semesters'][0]
+        self.assertEqual(semester['average'], 80.0)
+        self.assertEqual(len(semester['courses']), self.rows)
+        response = self.client_for(self.teacher).get(reverse('student-transcript', args=[student.pk]))
+        self.assertEqual(response.data['student'], student.pk)
+
+    def test_rebuild_command_detects_and_repairs_drift(self):
+        call_command('rebuild_transcripts', '--check', stdout=io.StringIO())
+        CourseResult.objects.filter(student=self.students[0]).update(total_score=1)
+        SemesterResult.objects.filter(student=self.students[1]).delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_transcripts', '--check', stdout=io.StringIO())
+        call_command('rebuild_transcripts', stdout=io.StringIO())
+        call_command('rebuild_transcripts', '--check', stdout=io.StringIO())
+
+
+class AttendanceAnalyticsTests(CoreFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.admin)
+        Attendance.objects.filter(student=self.students[0], course=self.courses[0]).update(status=False)
+
+    def rates(self, query):
+        response = self.client.get(reverse('attendance-analytics') + query)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results']
+
+    def test_rates_per_scope(self):
+        by_direction = self.rates('?scope=direction')
+        self.assertEqual(by_direction, [{
+            'id': self.direction.pk, 'name': self.direction.name,
+            'total': self.rows * self.rows, 'present': self.rows * self.rows - 1,
+            'rate': round(100 * (self.rows * self.rows - 1) / (self.rows * self.rows), 2),
+        }])
+        below = self.rates('?scope=student&below=90')
+        self.assertEqual([row['id'] for row in below], [self.students[0].pk])
+        self.assertEqual(self.rates('?scope=course&from=2025-10-01'), [])
+
+    def test_cached_until_course_attendance_changes(self):
+        course = self.courses[1]
+        query = f'?scope=student&course={course.pk}'
+        self.rates(query)
+        with self.assertNumQueries(0):
+            self.rates(query)
+        other = self.rates(f'?scope=student&course={self.courses[2].pk}')
+
+        Attendance.objects.filter(course=course).first().delete()
+        self.assertEqual(sum(row['total'] for row in self.rates(query)), self.rows - 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.rates(f'?scope=student&course={self.courses[2].pk}'), other)
+
+    def test_bulk_roster_invalidates(self):
+        course = self.courses[3]
+        query = f'?scope=course&course={course.pk}'
+        self.assertEqual(self.rates(query)[0]['present'], self.rows)
+        payload = {
+            'course': course.pk, 'date': '2025-09-01',
+            'records': [{'student': s.pk, 'status': False} for s in self.students],
+        }
+        self.client_for(self.teacher).post(reverse('attendance-bulk'), payload, format='json')
+        self.assertEqual(self.rates(query)[0]['present'], 0)
+
+    def test_deletes_invalidate_once_per_statement(self):
+        query = '?scope=direction'
+        total = self.rates(query)[0]['total']
+        deletes = [
+            (lambda: Attendance.objects.filter(course__in=self.courses[:2]).delete(), self.courses[:2], 2 * self.rows),
+            (lambda: self.courses[2].delete(), self.courses[2:3], self.rows),
+            (lambda: self.students[0].delete(), self.courses[3:], 2),
+        ]
+        for delete, courses, removed in deletes:
+            expected = {course.pk for course in courses}
+            with mock.patch('core.signals.invalidate_attendance', wraps=invalidate_attendance) as invalidate:
+                delete()
+            invalidate.assert_called_once_with(expected)
+            total -= removed
+            self.assertEqual(self.rates(query)[0]['total'], total)
+
+    def test_invalid_scope(self):
+        response = self.client.get(reverse('attendance-analytics') + '?scope=planet')
+        self.assertEqual(response.status_code, 400)
+
+
+class ReferenceCacheTests(CoreFixtureMixin, TestCase):
+
+    def test_conditional_get_and_invalidation(self):
+        client = self.client_for(self.admin)
+        url = reverse('course-list')
+        first = client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('ETag', first)
+        self.assertIn('Last-Modified', first)
+
+        with self.assertNumQueries(0):
+            cached = client.get(url)
+            not_modified = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(cached.data, first.data)
+        self.assertEqual(not_modified.status_code, 304)
+
+        self.teacher.fio = 'Renamed Teacher'
+        self.teacher.save()
+        changed = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], first['ETag'])
+        self.assertEqual(changed.data[0]['professor_name'], 'Renamed Teacher')
+
+    def test_change_within_the_same_second_is_modified(self):
+        client = self.client_for(self.admin)
+        url = reverse('course-list')
+        with mock.patch('core.caching.time.time', return_value=1_750_000_000):
+            first = client.get(url)
+            self.teacher.fio = 'Renamed Teacher'
+            self.teacher.save()
+            changed = client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.data[0]['professor_name'], 'Renamed Teacher')
+
+    def test_demoted_teacher_invalidates_courses(self):
+        client = self.client_for(self.admin)
+        url = reverse('course-list') + '?expand=professor'
+        self.assertEqual(client.get(url).data[0]['professor']['role'], 'teacher')
+        self.teacher.role = 'student'
+        self.teacher.fio = 'Former Teacher'
+        self.teacher.save()
+        course = client.get(url).data[0]
+        self.assertEqual(course['professor']['role'], 'student')
+        self.assertEqual(course['professor_name'], 'Former Teacher')
+
+    def test_query_string_is_part_of_the_key(self):
+        client = self.client_for(self.admin)
+        Direction.objects.create(name='Mathematics', semesters=8)
+        everything = client.get(reverse('direction-list'))
+        searched = client.get(reverse('direction-list') + '?search=math')
+        self.assertEqual(len(everything.data), 2)
+        self.assertEqual([d['name'] for d in searched.data], ['Mathematics'])
+        self.assertNotEqual(everything['ETag'], searched['ETag'])
+
+    def test_direction_rename_invalidates_semesters(self):
+        client = self.client_for(self.admin)
+        client.get(reverse('semester-list'))
+        self.direction.name = 'Informatics'
+        self.direction.save()
+        self.assertEqual(client.get(reverse('semester-list')).data[0]['direction_name'], 'Informatics')
+
+
+class StudentScheduleTests(CoreFixtureMixin, TestCase):
+
+    def test_date_window_and_course_year(self):
+        client = self.client_for(self.students[0])
+        url = reverse('student-schedule-list')
+        self.assertEqual(len(client.get(url).data), self.rows)
+        window = client.get(url + '?from=2025-09-02&to=2025-09-03').data
+        self.assertEqual([row['date'] for row in window], ['2025-09-02', '2025-09-03'])
+        self.assertEqual(client.get(url + '?from=2025-09-03&to=2025-09-02').status_code, 400)
+
+        later = Semester.objects.create(direction=self.direction, number=3, credits=30)
+        Schedule.objects.create(
+            course=Course.objects.create(semester=later, name='Later', credits=5),
+            date=date(2025, 9, 2), time=time(9, 0), topic='Not this year',
+        )
+        self.assertEqual(len(client.get(url).data), self.rows)
+
+    def test_ics_feed_is_cached_until_a_class_changes(self):
+        feed_url = self.client_for(self.students[0]).get(reverse('student-schedule-feed')).data['url']
+        first = self.client.get(feed_url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'text/calendar; charset=utf-8')
+        body = first.content.decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), self.rows)
+        self.assertIn('DTSTART:20250901T030000Z', body)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(feed_url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        Schedule.objects.create(course=self.courses[0], date=date(2025, 9, 8), time=time(9, 0), topic='New, topic')
+        second = self.client.get(feed_url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn('DESCRIPTION:New\\, topic', second.content.decode())
+
+    def test_feed_rejects_tampered_token(self):
+        self.assertEqual(self.client.get(reverse('schedule-feed', args=['bogus'])).status_code, 404)
+
+    def test_rotation_revokes_the_feed_url(self):
+        client = self.client_for(self.students[0])
+        leaked = client.get(reverse('student-schedule-feed')).data['url']
+        self.assertEqual(self.client.get(leaked).status_code, 200)
+        rotate_feed([self.direction.pk])
+        self.assertEqual(self.client.get(leaked).status_code, 404)
+        self.assertEqual(self.client.get(client.get(reverse('student-schedule-feed')).data['url']).status_code, 200)
+
+    def test_moving_a_course_refreshes_both_feeds(self):
+        other = Direction.objects.create(name='Mathematics', semesters=8)
+        semester = Semester.objects.create(direction=other, number=1, credits=30)
+        before = [self.client.get(reverse('schedule-feed', args=[feed_token(pk)])) for pk in (self.direction.pk, other.pk)]
+        self.assertEqual([feed.content.decode().count('BEGIN:VEVENT') for feed in before], [self.rows, 0])
+        self.courses[0].semester = semester
+        self.courses[0].save()
+        feeds = [
+            self.client.get(reverse('schedule-feed', args=[feed_token(pk)])).content.decode()
+            for pk in (self.direction.pk, other.pk)
+        ]
+        self.assertEqual([feed.count('BEGIN:VEVENT') for feed in feeds], [self.rows - 1, 1])
+
+
+class StatelessTokenTests(CoreFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student = self.students[0]
+        self.student.set_password('secret')
+        self.student.save()
+
+    def obtain(self):
+        response = APIClient().post(reverse('token'), {'username': self.student.username, 'password': 'secret'})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def call(self, view, access, path='/'):
+        request = APIRequestFactory().get(path, HTTP_AUTHORIZATION=f'Bearer {access}')
+        return view.as_view(authentication_classes=[ClaimsJWTAuthentication])(request)
+
+    def test_claims_user_serves_hot_paths_without_user_lookup(self):
+        access = self.obtain()['access']
+        with self.assertNumQueries(1):
+            response = self.call(StudentScheduleListView, access)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), self.rows)
+        self.assertEqual(self.call(SyncMeView, access).data['username'], self.student.username)
+        self.assertEqual(self.call(CourseListCreateView, access).status_code, 403)
+
+    def test_role_change_revokes_access_until_refresh(self):
+        # Issued, revoked and refreshed within the same second.
+        with mock.patch('core.tokens.time') as clock:
+            clock.time.return_value = 1_000_000.25
+            tokens = self.obtain()
+            self.student.role = 'teacher'
+            self.student.save()
+        self.assertEqual(self.call(StudentScheduleListView, tokens['access']).status_code, 401)
+
+        with mock.patch('core.tokens.time') as clock:
+            clock.time.return_value = 1_000_000.5
+            refreshed = APIClient().post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        self.assertEqual(refreshed.status_code, 200, refreshed.content)
+        self.assertEqual(self.call(CourseListCreateView, refreshed.data['access']).status_code, 200)
+
+    def test_deactivated_user_cannot_refresh(self):
+        tokens = self.obtain()
+        self.student.is_active = False
+        self.student.save()
+        response = APIClient().post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
+
+
+class QueryPlanTests(CoreFixtureMixin, TestCase):
+    """Hot queries must be answered from indexes, not full table scans or sorts."""
+
+    def test_hot_queries_use_indexes(self):
+        queries = hot_queries(
+            course_id=self.courses[0].pk, student_id=self.students[0].pk, direction_id=self.direction.pk,
+            semester_id=self.semester.pk,
+        )
+        for name, queryset in queries.items():
+            with self.subTest(name):
+                allowed = SMALL_TABLES | ACCEPTED_SORTS.get(name, set())
+                self.assertEqual(full_scans(queryset, allowed), [], explain(queryset))
+
+    def test_detects_full_scan(self):
+        self.assertEqual(full_scans(Schedule.objects.filter(topic='Intro')), ['core_schedule'])
+        self.assertEqual(full_scans(Attendance.objects.order_by('status')[:10]), ['core_attendance'])
+
+    def test_detects_sorted_pages(self):
+        by_student = Attendance.objects.filter(student=self.students[0])
+        self.assertEqual(full_scans(by_student.order_by('-date', '-id')[:10]), [])
+        self.assertEqual(full_scans(by_student.order_by('-status', '-id')[:10]), ['core_attendance'])
+        # Without a LIMIT every matching row is returned anyway.
+        self.assertEqual(full_scans(by_student.order_by('-status', '-id')), [])
+
+    def test_course_branches_page_in_order(self):
+        client = self.client_for(self.teacher)
+        Attendance.objects.filter(course=self.courses[1]).update(date=date(2025, 9, 2))
+        pages = [client.get(reverse('attendance-list') + f'?semester={self.semester.pk}&page_size=7').data]
+        while pages[-1]['next']:
+            pages.append(client.get(pages[-1]['next']).data)
+        rows = [(row['date'], row['id']) for page in pages for row in page['results']]
+        expected = Attendance.objects.order_by('-date', '-id').values_list('date', 'id')
+        self.assertEqual(rows, [(day.isoformat(), pk) for day, pk in expected])
+
+    def test_branch_pages_keep_later_filters(self):
+        student = self.students[0]
+        queryset = Attendance.objects.filter(course__semester=self.semester)
+        queryset.keyset_branches = tuple(Q(course_id=course.pk) for course in self.courses)
+        page = queryset.filter(student=student).keyset_page(('-date', '-id'), Q(), 100)
+        self.assertEqual(
+            [row.pk for row in page], list(student.attendances.order_by('-date', '-id').values_list('pk', flat=True)),
+        )
+
+    def test_many_courses_page_without_branches(self):
+        with mock.patch('core.filters.KEYSET_BRANCH_LIMIT', 2):
+            self.assertEqual(in_courses('semester_id').branches(self.semester.pk), [])
+            self.test_course_branches_page_in_order()
+
+    def test_command(self):
+        call_command('check_query_plans', stdout=io.StringIO())
+
+
+class EventAudienceTests(CoreFixtureMixin, TestCase):
+
+    def test_explicit_recipients_are_validated_and_inserted_in_bulk(self):
+        client = self.client_for(self.admin)
+        payload = {
+            'title': 'Exam', 'description': 'Room 101', 'date': '2025-10-01',
+            'recipients': [s.pk for s in self.students],
+        }
+        # students, savepoint, event, search document, through rows, release, recipients for the response
+        with self.assertNumQueries(7):
+            response = client.post(reverse('event-list'), payload, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Event.objects.get(pk=response.data['id']).recipients.count(), self.rows)
+
+        payload['recipients'] = [10**6]
+        self.assertEqual(client.post(reverse('event-list'), payload, format='json').status_code, 400)
+        del payload['recipients']
+        self.assertEqual(client.post(reverse('event-list'), payload, format='json').status_code, 400)
+
+    def test_audience_events_reach_the_inbox(self):
+        other = Direction.objects.create(name='Physics', semesters=8)
+        Event.objects.create(title='Direction news', description='', date=date(2025, 10, 1),
+                             audience_role='student', audience_direction=self.direction)
+        Event.objects.create(title='Year two', description='', date=date(2025, 10, 2),
+                             audience_role='student', audience_course=2)
+        Event.objects.create(title='Physics news', description='', date=date(2025, 10, 3),
+                             audience_role='all', audience_direction=other)
+        Event.objects.create(title='Everyone', description='', date=date(2025, 10, 4), audience_role='all')
+
+        client = self.client_for(self.students[0])
+        with self.assertNumQueries(1):
+            response = client.get(reverse('event-inbox') + '?page_size=3')
+        titles = [event['title'] for event in response.data['results']]
+        self.assertEqual(titles, ['Everyone', 'Direction news', 'Event 4'])
+        self.assertNotIn('recipients', response.data['results'][0])
+
+        rest = client.get(response.data['next']).data
+        self.assertEqual([event['title'] for event in rest['results']], ['Event 3', 'Event 2', 'Event 1'])
+        self.assertEqual(len(client.get(rest['next']).data['results']), 1)
+        teacher_titles = [e['title'] for e in self.client_for(self.teacher).get(reverse('event-inbox')).data['results']]
+        self.assertEqual(teacher_titles, ['Everyone'])
+
+    def test_inbox_pages_merge_explicit_and_audience_events(self):
+        everyone = Event.objects.create(title='Everyone', description='', date=date(2025, 10, 4), audience_role='all')
+        everyone.recipients.add(self.students[0])
+        Event.objects.create(title='Old news', description='', date=date(2024, 1, 1), audience_role='student')
+
+        client = self.client_for(self.students[0])
+        pages = [client.get(reverse('event-inbox') + '?page_size=2').data]
+        while pages[-1]['next']:
+            pages.append(client.get(pages[-1]['next']).data)
+        titles = [event['title'] for page in pages for event in page['results']]
+        self.assertEqual(titles, ['Everyone'] + [f'Event {day}' for day in (4, 3, 2, 1, 0)] + ['Old news'])
+        back = client.get(pages[-1]['previous']).data
+        self.assertEqual([event['title'] for event in back['results']], ['Event 1', 'Event 0'])
+
+
+def bearer(user):
+    return f'Bearer {ClaimsTokenObtainPairSerializer.get_token(user).access_token}'
+
+
+class AsyncReadViewTests(CoreFixtureMixin, TestCase):
+    """The hot read routes run as coroutines and keep DRF's authentication and permissions."""
+
+    hot_routes = ('me', 'student-schedule-list', 'event-list', 'event-inbox', 'course-list')
+
+    def test_hot_routes_are_async(self):
+        for name in self.hot_routes:
+            self.assertTrue(iscoroutinefunction(resolve(reverse(name)).func), name)
+
+    async def get(self, name, user=None, query=''):
+        headers = {'Authorization': bearer(user)} if user else {}
+        return await AsyncClient().get(reverse(name) + query, headers=headers)
+
+    async def test_permissions_with_jwt(self):
+        response = await self.get('event-list')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        self.assertEqual((await self.get('event-list', self.students[0])).status_code, 403)
+        self.assertEqual((await self.get('course-list', self.students[0])).status_code, 403)
+        self.assertEqual((await self.get('student-schedule-list', self.teacher)).status_code, 403)
+
+        response = await self.get('me', self.students[0])
+        self.assertEqual(response.json()['direction_name'], self.direction.name)
+        response = await self.get('event-list', self.admin, '?page_size=2')
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIsNotNone(response.json()['next'])
+        response = await self.get('student-schedule-list', self.students[0], '?from=2025-13-01')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_stateless_claims(self):
+        request = AsyncRequestFactory().get('/', headers={'Authorization': bearer(self.students[0])})
+        response = await AsyncMeView.as_view(authentication_classes=[ClaimsJWTAuthentication])(request)
+        self.assertEqual(response.data['username'], self.students[0].username)
+
+    async def test_drf_request_handling(self):
+        class OncePerMinute(UserRateThrottle):
+            scope = 'async-test'
+            rate = '1/min'
+
+        class MissingView(AsyncAPIView):
+            permission_classes = []
+
+            async def get(self, request):
+                raise Http404
+
+        def request(**headers):
+            return AsyncRequestFactory().get('/', headers={'Authorization': bearer(self.students[0]), **headers})
+
+        view = AsyncMeView.as_view(authentication_classes=[ClaimsJWTAuthentication], throttle_classes=[OncePerMinute])
+        self.assertEqual((await view(request(Accept='text/html'))).status_code, 406)
+        self.assertEqual((await view(request())).status_code, 200)
+        self.assertEqual((await view(request())).status_code, 429)
+        self.assertEqual((await MissingView.as_view()(request())).status_code, 404)
+
+    def test_writes_fall_through_to_the_sync_view(self):
+        client = self.client_for(self.admin)
+        response = client.post(reverse('course-list'), {
+            'semester': self.semester.pk, 'name': 'Async', 'credits': 3, 'is_mandatory': True,
+            'professor': self.teacher.pk,
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(client.get(reverse('course-list')).data), self.rows + 1)
+        self.assertEqual(client.delete(reverse('course-list')).status_code, 405)
+
+
+class LoadTestCommandTests(TransactionTestCase):
+
+    def test_sync_and_async_routes_succeed(self):
+        direction = Direction.objects.create(name='Computer Science', semesters=8)
+        User.objects.create_user(username='student', email='s@example.com', fio='Student', role='student',
+                                 direction=direction, course=1)
+        User.objects.create_user(username='admin', email='a@example.com', fio='Admin', role='admin')
+        out = io.StringIO()
+        call_command('loadtest_reads', requests=10, concurrency=5, stdout=out)
+        report = json.loads(out.getvalue())
+        for name, modes in report['routes'].items():
+            for mode in ('sync', 'async'):
+                self.assertEqual(modes[mode]['statuses'], {'200': 10}, (name, mode))
+
+
+class SeedAndBenchmarkTests(TemporaryMediaMixin, TestCase):
+
+    def seed(self):
+        call_command(
+            'seed_data', directions=2, semesters=4, courses_per_semester=2, teachers=2, students=6,
+            days=2, classes=2, events=3, stdout=io.StringIO(),
+        )
+
+    def test_seed_volumes(self):
+        self.seed()
+        self.assertEqual(Direction.objects.count(), 2)
+        self.assertEqual(Course.objects.count(), 2 * 4 * 2)
+        self.assertEqual(User.objects.filter(role='student').count(), 6)
+        # Each student takes the 2 x 2 courses of their current year.
+        self.assertEqual(Attendance.objects.count(), 6 * 4 * 2)
+        self.assertEqual(Grade.objects.count(), 6 * 4 * len(Grade.TYPE_CHOICES))
+        self.assertEqual(CourseResult.objects.count(), 6 * 4)
+        self.assertFalse(Course.objects.filter(professor__isnull=True).exists())
+        with self.assertRaises(CommandError):
+            self.seed()
+
+    def test_benchmark_covers_every_route(self):
+        self.seed()
+        User.objects.create_user(username='admin', email='admin@example.com', fio='Admin', role='admin')
+        results = run_benchmarks(iterations=1, warmup=0)
+        self.assertEqual(set(results), {pattern.name for pattern in core_urls.urlpatterns})
+        for route, report in results.items():
+            self.assertTrue(all(status.startswith('2') for status in report['statuses']), (route, report))
+            self.assertGreater(report['bytes'], 0, route)
+
+
+class ProfilingTests(CoreFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        METRICS.reset()
+
+    def test_server_timing_and_histograms(self):
+        response = self.client_for(self.admin).get(reverse('event-list'))
+        timing = response['Server-Timing']
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+        metrics = self.client_for(self.admin).get(reverse('metrics'))
+        self.assertEqual(metrics['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        body = metrics.content.decode()
+        self.assertIn('http_request_db_queries_bucket{route="api/events/",method="GET",le="2"} 1', body)
+        self.assertIn('http_request_duration_seconds_count{route="api/events/",method="GET"} 1', body)
+        self.assertIn('http_responses_total{route="api/events/",method="GET",status="200"} 1', body)
+
+    async def test_async_views_are_profiled(self):
+        response = await AsyncClient().get(
+            reverse('student-schedule-list'), headers={'Authorization': bearer(self.students[0])}
+        )
+        # User lookup for the token, then the schedule query.
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    def test_sampling_off(self):
+        with override_settings(PROFILING_SAMPLE_RATE=0):
+            response = self.client_for(self.admin).get(reverse('event-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('api/events/', self.client_for(self.admin).get(reverse('metrics')).content.decode())
+
+    def test_metrics_need_an_admin_without_a_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client_for(self.teacher).get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client_for(self.admin).get(reverse('metrics')).status_code, 200)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer scrape'})
+        self.assertEqual(response.status_code, 200)
+
+
+class SparseFieldsTests(CoreFixtureMixin, TestCase):
+
+    def get(self, user, name, query, args=()):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(user).get(reverse(name, args=args) + query)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def test_fields_skip_joins_and_columns(self):
+        response, sql = self.get(self.teacher, 'schedule-list', '?fields=id,date')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'date'})
+        self.assertEqual(len(sql), 1)
+        self.assertNotIn('JOIN', sql[0])
+        self.assertNotIn('"topic"', sql[0])
+
+    def test_omit(self):
+        response, sql = self.get(self.admin, 'event-list', '?omit=recipient_names,recipients')
+        self.assertNotIn('recipient_names', response.data['results'][0])
+        self.assertIn('title', response.data['results'][0])
+        self.assertEqual(len(sql), 1)
+
+    def test_expand_nests_in_fixed_queries(self):
+        response, sql = self.get(self.teacher, 'attendance-list', '?fields=id,course,status&expand=course')
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'course', 'status'})
+        self.assertEqual(set(row['course']), set(CourseSerializer.Meta.fields))
+        self.assertEqual(len(sql), 1)
+
+    def test_expand_many(self):
+        response, sql = self.get(self.admin, 'event-detail', '?fields=id,recipients&expand=recipients',
+                                 (Event.objects.first().pk,))
+        self.assertEqual(len(response.data['recipients']), self.rows)
+        self.assertEqual(response.data['recipients'][0]['direction'], self.direction.pk)
+        self.assertEqual(len(sql), 2)
+
+    def test_unknown_field(self):
+        response, sql = self.get(self.teacher, 'grade-list', '?fields=id,bogus')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+        response, sql = self.get(self.teacher, 'grade-list', '?expand=score')
+        self.assertEqual(response.status_code, 400)
+
+    def test_default_output_unchanged(self):
+        full = self.client_for(self.teacher).get(reverse('grade-list')).data['results'][0]
+        self.assertEqual(set(full), set(GradeSerializer.Meta.fields))
+
+    def test_writes_ignore_selection(self):
+        response = self.client_for(self.teacher).post(reverse('schedule-list') + '?fields=id', {
+            'course': self.courses[0].pk, 'date': '2025-10-01', 'time': '10:00', 'topic': 'New',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('topic', response.data)
+
+    async def test_async_views(self):
+        response = await AsyncClient().get(
+            reverse('me') + '?fields=id,fio', headers={'Authorization': bearer(self.students[0])}
+        )
+        self.assertEqual(json.loads(response.content), {'id': self.students[0].pk, 'fio': 'Student 0'})
+
+    def test_transcript_without_courses(self):
+        call_command('rebuild_transcripts', stdout=io.StringIO())
+        with self.assertNumQueries(1):
+            response = self.client_for(self.students[0]).get(reverse('transcript') + '?fields=semester,average')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['semesters'][0]), {'semester', 'average'})
+
+
+class FastPathTests(CoreFixtureMixin, TestCase):
+    """The values() fast path must render byte-for-byte what the serializer does."""
+
+    queries = ['', '?page_size=7', '?fields=id,date,status', '?omit=student_name', '?fields=type,score,course_name']
+
+    def pages(self, name, query):
+        client, url, pages = self.client_for(self.teacher), reverse(name) + query, []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            pages.append(response.content)
+            url = json.loads(response.content)['next']
+        return pages
+
+    def assertParity(self, name, query):
+        fast = self.pages(name, query)
+        with mock.patch.object(RowPlan, 'for_serializer', return_value=None), \
+                mock.patch('core.renderers.orjson', None):
+            slow = self.pages(name, query)
+        self.assertEqual(fast, slow)
+
+    def test_attendance_parity(self):
+        Attendance.objects.filter(pk=Attendance.objects.first().pk).update(status=False)
+        for query in self.queries[:4]:
+            with self.subTest(query=query):
+                self.assertParity('attendance-list', query)
+
+    def test_grade_parity(self):
+        for query in self.queries[:2] + self.queries[4:]:
+            with self.subTest(query=query):
+                self.assertParity('grade-list', query)
+
+    def test_renderer_parity(self):
+        cases = [
+            {'a': 'x\u2028y\u2029z', 'b': [1, 2.5, None, True]},
+            {'fio': 'Айгерим', 'date': date(2025, 9, 1), 'score': Decimal('87.50')},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        for value in (float('nan'), float('inf')):
+            for renderer in (ORJSONRenderer(), JSONRenderer()):
+                with self.subTest(value=value, renderer=renderer), self.assertRaises(ValueError):
+                    renderer.render({'score': [value], 'next': None})
+
+    def test_plans(self):
+        for serializer in (AttendanceSerializer, GradeSerializer):
+            plan = RowPlan.for_serializer(serializer())
+            self.assertEqual([name for name, lookup, convert in plan.columns], serializer.Meta.fields)
+        self.assertEqual(
+            RowPlan.for_serializer(AttendanceSerializer()).lookups,
+            ['id', 'student_id', 'student__fio', 'course_id', 'course__name', 'date', 'status'],
+        )
+        # professor is nullable, so professor_name can't be read from a join.
+        self.assertIsNone(RowPlan.for_serializer(CourseSerializer()))
+
+    def test_expand_falls_back(self):
+        response = self.client_for(self.teacher).get(reverse('attendance-list') + '?expand=course')
+        self.assertEqual(response.data['results'][0]['course']['name'], 'Course 4')
+
+
+class FilteringTests(CoreFixtureMixin, TestCase):
+
+    def results(self, user, name, query):
+        response = self.client_for(user).get(reverse(name) + query)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results']
+
+    def test_attendance_filters(self):
+        student, course = self.students[0], self.courses[1]
+        Attendance.objects.create(student=student, course=course, date=date(2025, 10, 1), status=False)
+        rows = self.results(self.teacher, 'attendance-list', f'?student={student.pk}&course={course.pk}')
+        self.assertEqual([row['date'] for row in rows], ['2025-10-01', '2025-09-01'])
+        rows = self.results(self.teacher, 'attendance-list', '?from=2025-09-15&status=false')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(self.results(self.teacher, 'attendance-list', f'?semester={self.semester.pk}')), 26)
+        self.assertEqual(self.results(self.teacher, 'attendance-list', f'?direction={self.direction.pk + 1}'), [])
+
+    def test_grade_filters_and_ordering(self):
+        Grade.objects.filter(pk=Grade.objects.first().pk).update(type='final', score=95)
+        rows = self.results(self.teacher, 'grade-list', '?type=final')
+        self.assertEqual([row['score'] for row in rows], [95])
+        rows = self.results(self.teacher, 'grade-list', f'?direction={self.direction.pk}&ordering=-score&page_size=2')
+        self.assertEqual([row['score'] for row in rows], [95, 80])
+
+    def test_ordering_is_paginated(self):
+        client, url, seen = self.client_for(self.teacher), reverse('grade-list') + '?ordering=score&page_size=4', []
+        while url:
+            response = client.get(url)
+            seen += [(row['score'], row['id']) for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, sorted(Grade.objects.values_list('score', 'id')))
+
+    def test_schedule_filters(self):
+        course = self.courses[2]
+        rows = self.results(self.teacher, 'schedule-list', f'?course={course.pk}&from=2025-09-01&to=2025-09-30')
+        self.assertEqual([row['topic'] for row in rows], ['Topic 2'])
+        rows = self.results(self.teacher, 'schedule-list', '?ordering=-date')
+        self.assertEqual(rows[0]['topic'], 'Topic 4')
+
+    def test_student_filters(self):
+        other = Direction.objects.create(name='Physics', semesters=8)
+        User.objects.filter(pk=self.students[0].pk).update(direction=other, course=2)
+        self.assertEqual(len(self.results(self.admin, 'student-list', f'?direction={self.direction.pk}')), 4)
+        rows = self.results(self.admin, 'student-list', '?course=2')
+        self.assertEqual([row['id'] for row in rows], [self.students[0].pk])
+        rows = self.results(self.admin, 'student-list', '?search=student3')
+        self.assertEqual([row['fio'] for row in rows], ['Student 3'])
+        rows = self.results(self.admin, 'student-list', '?ordering=-fio')
+        self.assertEqual(rows[0]['fio'], 'Student 4')
+
+    def test_invalid_parameters(self):
+        client = self.client_for(self.teacher)
+        for query in ('?type=exam', '?course=abc', '?from=2025-10-01&to=2025-09-01', '?ordering=student_name'):
+            with self.subTest(query=query):
+                url = reverse('grade-list' if 'from' not in query else 'attendance-list') + query
+                response = client.get(url)
+                self.assertEqual(response.status_code, 400)
+
+
+class ScheduleBulkTests(CoreFixtureMixin, TestCase):
+
+    def post(self, **payload):
+        rule = {
+            'course': self.courses[0].pk, 'weekdays': ['mon', 'wed'], 'time': '14:00',
+            'start': '2025-09-01', 'end': '2025-09-30', 'topic': 'Lecture {n}',
+        }
+        rule.update(payload)
+        return self.client_for(self.teacher).post(reverse('schedule-bulk'), rule, format='json')
+
+    def test_expands_rule_in_fixed_queries(self):
+        # course, course lock, professor lock, conflicts, insert, professor for the response,
+        # plus the savepoint pair of the atomic block and archives, records, sessions, delete and
+        # upsert for the course's attendance bitmaps.
+        with self.assertNumQueries(13):
+            response = self.post(exclude=['2025-09-10'])
+        self.assertEqual(response.status_code, 201, response.content)
+        created = response.data['created']
+        self.assertEqual([row['date'] for row in created],
+                         ['2025-09-01', '2025-09-03', '2025-09-08', '2025-09-15', '2025-09-17',
+                          '2025-09-22', '2025-09-24', '2025-09-29'])
+        self.assertEqual(created[2]['topic'], 'Lecture 3')
+        self.assertEqual(Schedule.objects.filter(course=self.courses[0], time=time(14, 0)).count(), 8)
+
+    def test_conflicts_fail_the_request(self):
+        # Another course of the same professor at 9:00 on Mondays.
+        response = self.post(course=self.courses[1].pk, time='09:30', weekdays=['mon'])
+        self.assertEqual(response.status_code, 409)
+        conflict, = response.data['conflicts']
+        self.assertEqual((conflict['date'], conflict['reason']), (date(2025, 9, 1), 'professor'))
+        self.assertFalse(Schedule.objects.filter(course=self.courses[1], time=time(9, 30)).exists())
+
+    def test_skip_conflicts(self):
+        response = self.post(time='10:19', weekdays=['mon'], on_conflict='skip')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['conflicts'][0]['reason'], 'course')
+        self.assertEqual(len(response.data['created']), 4)
+
+    def test_class_length(self):
+        # 80-minute classes: 10:20 starts as the 9:00 class ends.
+        self.assertEqual(self.post(time='10:20', weekdays=['mon']).status_code, 201)
+        self.assertEqual(self.post(course=self.courses[1].pk, time='11:39', weekdays=['mon']).status_code, 409)
+
+    def test_conflicts_are_batched(self):
+        with mock.patch.object(ScheduleRecurrenceSerializer, 'batch_size', 3), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.post(time='16:00', weekdays=['mon', 'tue', 'wed', 'thu', 'fri'])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 22)
+        lookups = [query for query in queries.captured_queries if '"core_schedule"."time" >' in query['sql']]
+        self.assertEqual(len(lookups), 8)
+
+    def test_validation(self):
+        self.assertEqual(self.post(weekdays=['someday']).status_code, 400)
+        self.assertEqual(self.post(start='2025-10-01').status_code, 400)
+        self.assertEqual(self.post(weekdays=['sun'], end='2025-09-06').status_code, 400)
+        self.assertEqual(self.post(end='2035-09-01').status_code, 400)
+        student = self.client_for(self.students[0]).post(reverse('schedule-bulk'), {}, format='json')
+        self.assertEqual(student.status_code, 403)
+
+
+class SearchTests(CoreFixtureMixin, TestCase):
+
+    def search(self, query):
+        response = self.client_for(self.admin).get(reverse('search') + query)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [(row['kind'], row['id']) for row in response.data['results']]
+
+    def test_ranked_prefix_search_across_kinds(self):
+        course = self.courses[0]
+        Event.objects.create(title='Course fair', description='Meet the teacher', date=date(2025, 9, 1))
+        results = self.search('?q=cours')
+        self.assertEqual(len(results), self.rows + 1)
+        self.assertEqual(self.search('?q=course%200'), [('course', course.pk)])
+        # Title matches rank above body matches.
+        self.assertEqual(self.search('?q=teach')[0], ('user', self.teacher.pk))
+        self.assertEqual(self.search('?q=student3%40example&kind=user'), [('user', self.students[3].pk)])
+        self.assertEqual(self.search('?q=%22%2A'), [])
+
+    def test_kept_in_sync(self):
+        student = self.students[0]
+        student.fio = 'Zhanna Omarova'
+        student.save()
+        self.assertEqual(self.search('?q=omarov'), [('user', student.pk)])
+        student.save(update_fields=['last_login'])
+        student.delete()
+        self.assertEqual(self.search('?q=omarov'), [])
+        course = self.courses[1]
+        Course.objects.filter(pk=course.pk).update(name='Quantum Physics')
+        self.assertEqual(self.search('?q=quantum'), [])
+        call_command('rebuild_search_index', kind=['course'], stdout=io.StringIO())
+        self.assertEqual(self.search('?q=quantum'), [('course', course.pk)])
+
+    def test_misspellings(self):
+        student = self.students[0]
+        student.fio = 'Zhanna Omarova'
+        student.save()
+        self.assertEqual(self.search('?q=omarva'), [('user', student.pk)])
+        self.assertEqual(self.search('?q=zhana%20omarova&kind=user'), [('user', student.pk)])
+        self.assertEqual(self.search('?q=qwxyz'), [])
+        # The student list's search filter falls back the same way.
+        response = self.client_for(self.admin).get(reverse('student-list') + '?search=omarva')
+        self.assertEqual([row['id'] for row in response.data['results']], [student.pk])
+
+    def test_substrings_without_a_full_text_index(self):
+        Event.objects.create(title='Course fair', description='Meet the teacher', date=date(2025, 9, 1))
+        with mock.patch('core.search.connection', vendor='mysql'):
+            self.assertEqual(self.search('?q=ourse%200'), [('course', self.courses[0].pk)])
+            self.assertEqual(self.search('?q=fair%20teach')[0][0], 'event')
+            self.assertEqual(list(matching_ids('student3', 'user', limit=5)), [self.students[3].pk])
+            self.assertEqual(set(User.objects.filter(pk__in=matching_ids('student', 'user'))), set(self.students))
+
+    def test_migration_backfills_existing_rows(self):
+        backfill = import_module('core.migrations.0007_search_index').BACKFILL
+        expected = set(SearchDocument.objects.values_list('kind', 'object_id', 'title', 'body'))
+        SearchDocument.objects.all().delete()
+        with connection.cursor() as cursor:
+            for statement in backfill:
+                cursor.execute(statement)
+        self.assertEqual(set(SearchDocument.objects.values_list('kind', 'object_id', 'title', 'body')), expected)
+        self.assertEqual(self.search('?q=course%200'), [('course', self.courses[0].pk)])
+
+    def test_validation_and_permissions(self):
+        client = self.client_for(self.admin)
+        self.assertEqual(client.get(reverse('search')).status_code, 400)
+        self.assertEqual(client.get(reverse('search') + '?q=a').status_code, 400)
+        self.assertEqual(client.get(reverse('search') + '?q=ab&kind=grade').status_code, 400)
+        self.assertEqual(self.client_for(self.teacher).get(reverse('search') + '?q=ab').status_code, 403)
+
+    def test_limit(self):
+        self.assertEqual(len(search('student', limit=2)), 2)
+
+
+class JobTests(TemporaryMediaMixin, CoreFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+
+        @task('test-flaky')
+        def flaky(context):
+            self.calls.append(context.job.attempts)
+            raise RuntimeError('boom')
+
+        self.addCleanup(TASKS.pop, 'test-flaky')
+
+    def test_export_job_end_to_end(self):
+        client = self.client_for(self.teacher)
+        course = self.courses[0]
+        response = client.post(reverse('job-list'), {
+            'kind': 'grade-export', 'params': {'course': course.pk, 'format': 'ndjson'},
+        }, format='json')
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertIsNone(response.data['result_url'])
+        self.assertEqual(work(burst=True), 1)
+
+        detail = client.get(reverse('job-detail', args=[response.data['id']])).data
+        self.assertEqual(detail['status'], 'succeeded', detail)
+        self.assertEqual((detail['progress_done'], detail['progress_total']), (self.rows, self.rows))
+        self.assertEqual(detail['result'], {'rows': self.rows})
+        download = client.get(detail['result_url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('grades.ndjson', download['Content-Disposition'])
+        rows = [json.loads(line) for line in b''.join(download.streaming_content).splitlines()]
+        self.assertEqual({row['course'] for row in rows}, {course.pk})
+        self.assertEqual(len(rows), self.rows)
+
+    def test_validation_and_visibility(self):
+        client = self.client_for(self.teacher)
+        url = reverse('job-list')
+        self.assertEqual(client.post(url, {'kind': 'nope'}, format='json').status_code, 400)
+        # Teachers may export, but not rebuild tables.
+        self.assertEqual(client.post(url, {'kind': 'rebuild-transcripts'}, format='json').status_code, 400)
+        bad = client.post(url, {'kind': 'grade-export', 'params': {'format': 'xlsx'}}, format='json')
+        self.assertEqual(bad.status_code, 400)
+        self.assertIn('format', bad.data['params'])
+        self.assertEqual(self.client_for(self.students[0]).get(url).status_code, 403)
+
+        mine = enqueue('grade-export', {}, self.teacher.pk)
+        theirs = enqueue('rebuild-transcripts', user_id=self.admin.pk)
+        self.assertEqual([job['id'] for job in client.get(url).data['results']], [mine.pk])
+        self.assertEqual(client.get(reverse('job-detail', args=[theirs.pk])).status_code, 404)
+        self.assertEqual(client.get(reverse('job-result', args=[mine.pk])).status_code, 404)
+        admin = self.client_for(self.admin).get(url + '?status=queued').data['results']
+        self.assertEqual([job['id'] for job in admin], [theirs.pk, mine.pk])
+
+    def test_retries_with_backoff_then_fails(self):
+        job = enqueue('test-flaky', max_attempts=2)
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_job(claim('test'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.error), ('queued', 1, 'RuntimeError: boom'))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(claim('test'))
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            run_job(claim('test'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(self.calls, [1, 2])
+
+    def test_claim_is_exclusive_and_stale_jobs_recover(self):
+        job = enqueue('rebuild-transcripts')
+        claimed = claim('worker-a')
+        self.assertEqual((claimed.pk, claimed.status, claimed.worker), (job.pk, 'running', 'worker-a'))
+        self.assertIsNone(claim('worker-b'))
+
+        self.assertEqual(recover_stale(), 0)
+        Job.objects.filter(pk=job.pk).update(heartbeat=timezone.now() - timedelta(hours=1))
+        self.assertEqual(recover_stale(), 1)
+        self.assertEqual(claim('worker-b').attempts, 2)
+
+    def test_stateless_tokens_list_and_queue_jobs(self):
+        def call(user, method, data=None):
+            access = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+            factory = getattr(APIRequestFactory(), method)
+            request = factory('/', data, format='json', HTTP_AUTHORIZATION=f'Bearer {access}')
+            return JobListCreateView.as_view(authentication_classes=[ClaimsJWTAuthentication])(request)
+
+        mine = enqueue('grade-export', {}, self.teacher.pk)
+        enqueue('rebuild-transcripts', user_id=self.admin.pk)
+        listed = call(self.teacher, 'get')
+        self.assertEqual(listed.status_code, 200, listed.data)
+        self.assertEqual([job['id'] for job in listed.data['results']], [mine.pk])
+        queued = call(self.admin, 'post', {'kind': 'rebuild-transcripts'})
+        self.assertEqual(queued.status_code, 202, queued.data)
+        self.assertEqual(Job.objects.get(pk=queued.data['id']).created_by_id, self.admin.pk)
+
+    def test_outcome_of_a_job_taken_back_is_dropped(self):
+        @task('test-taken')
+        def taken(context):
+            # Another worker recovered the job while this one was still running it.
+            Job.objects.filter(pk=context.job.pk).update(status='running', worker='worker-b')
+            return 'late'
+
+        self.addCleanup(TASKS.pop, 'test-taken')
+        job = enqueue('test-taken')
+        with self.assertLogs('core.jobs', 'WARNING'):
+            job = run_job(claim('worker-a'))
+        self.assertEqual((job.status, job.worker, job.result), ('running', 'worker-b', None))
+
+    def test_progress_is_throttled(self):
+        job = enqueue('rebuild-transcripts')
+        context = JobContext(job)
+        with CaptureQueriesContext(connection) as queries:
+            for done in range(100):
+                context.progress(done, 100)
+            context.progress(100, 100)
+        self.assertEqual(len(queries), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.progress_done, job.progress_total), (100, 100))
+
+    def test_event_fanout(self):
+        event = Event.objects.create(title='Exam week', description='', date=date(2025, 12, 1))
+        event.recipients.add(self.students[0])
+        enqueue('event-fanout', {'event': event.pk, 'direction': self.direction.pk, 'course': 1})
+        work(burst=True)
+        job = Job.objects.get(kind='event-fanout')
+        self.assertEqual((job.status, job.result), ('succeeded', {'event': event.pk, 'recipients': self.rows}))
+        self.assertEqual(set(event.recipients.all()), set(self.students))
+
+
+class JobHeartbeatTests(TransactionTestCase):
+
+    @override_settings(JOB_STALE_SECONDS=0.2)
+    def test_running_job_sends_heartbeats(self):
+        @task('test-quiet')
+        def quiet(context):
+            # Reports no progress for longer than a job may go without a heartbeat.
+            sleep(0.5)
+
+        self.addCleanup(TASKS.pop, 'test-quiet')
+        enqueue('test-quiet')
+        job = claim('worker-a')
+        run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'succeeded')
+        self.assertGreater(job.heartbeat, job.started_at)
+
+
+class RolloverTests(CoreFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.second_year = User.objects.create_user(
+            username='sophomore', email='sophomore@example.com', fio='Sophomore', role='student',
+            direction=self.direction, course=2,
+        )
+        self.final_year = User.objects.create_user(
+            username='senior', email='senior@example.com', fio='Senior', role='student',
+            direction=self.direction, course=4,
+        )
+
+    def rollover(self, *args):
+        output = io.StringIO()
+        call_command('rollover_year', *args, stdout=output)
+        return output.getvalue()
+
+    def test_dry_run_changes_nothing(self):
+        output = self.rollover('--dry-run')
+        self.assertIn(f'year 1 -> 2: {self.rows} student(s)', output)
+        self.assertIn('year 4 -> graduated: 1 student(s)', output)
+        self.assertIn('+ semester 3 cloned from semester 1', output)
+        self.assertIn('! semester 2 is missing', output)
+        self.assertEqual(User.objects.filter(role='student', course=1).count(), self.rows)
+        self.assertEqual(Semester.objects.count(), 1)
+
+    def test_promotes_graduates_and_clones(self):
+        with self.assertNumQueries(18):
+            self.rollover()
+        self.assertEqual(User.objects.filter(role='student', course=2, is_active=True).count(), self.rows)
+        self.second_year.refresh_from_db()
+        self.final_year.refresh_from_db()
+        self.assertEqual(self.second_year.course, 3)
+        self.assertEqual((self.final_year.course, self.final_year.is_active), (4, False))
+        # Semesters 3 and 5 copy semester 1; 2, 4 and 6 have nothing to copy.
+        self.assertEqual(sorted(Semester.objects.values_list('number', flat=True)), [1, 3, 5])
+        for number in (3, 5):
+            self.assertEqual(
+                sorted(Course.objects.filter(semester__number=number).values_list('name', flat=True)),
+                sorted(course.name for course in self.courses),
+            )
+        self.assertEqual(search('course 0', kind='course')[0]['kind'], 'course')
+        self.assertEqual(len(search('course 0', kind='course')), 3)
+
+    def test_runs_once_per_academic_year(self):
+        self.rollover('--year', '2025')
+        with self.assertRaisesMessage(CommandError, 'Already rolled over for 2025/2026'):
+            self.rollover('--year', '2025')
+        self.second_year.refresh_from_db()
+        self.assertEqual(self.second_year.course, 3)
+        self.assertEqual(sorted(Semester.objects.values_list('number', flat=True)), [1, 3, 5])
+        self.rollover('--year', '2026')
+        self.second_year.refresh_from_db()
+        self.assertEqual(self.second_year.course, 4)
+
+    def test_repeated_job_is_refused(self):
+        first, second = enqueue('year-rollover'), enqueue('year-rollover')
+        self.assertEqual(work(burst=True), 2)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.result['promoted'], self.rows + 1)
+        self.assertEqual((second.status, second.result['refused']), (
+            'succeeded', f'Already rolled over for {academic_year()}/{academic_year() + 1}: {self.direction.name}.',
+        ))
+        self.assertEqual(second.params['year'], academic_year())
+        self.assertEqual(User.objects.filter(role='student', course=2).count(), self.rows)
+
+    def test_tokens_of_moved_students_are_revoked(self):
+        student = self.students[0]
+        student.set_password('secret')
+        student.save()
+        tokens = APIClient().post(reverse('token'), {'username': student.username, 'password': 'secret'}).data
+        self.rollover()
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        view = StudentScheduleListView.as_view(authentication_classes=[ClaimsJWTAuthentication])
+        self.assertEqual(view(request).status_code, 401)
+        refreshed = APIClient().post(reverse('token_refresh'), {'refresh': tokens['refresh']})
+        self.assertEqual(refreshed.status_code, 200, refreshed.content)
+
+
+class AttendanceArchiveTests(CoreFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.student, self.course = self.students[0], self.courses[0]
+        Attendance.objects.create(student=self.student, course=self.course, date=date(2025, 9, 3), status=False)
+        Attendance.objects.create(student=self.student, course=self.course, date=date(2026, 2, 2), status=True)
+
+    def records(self):
+        return sorted(Attendance.objects.values_list('student_id', 'course_id', 'date', 'status'))
+
+    def rates(self, query):
+        response = self.client_for(self.admin).get(reverse('attendance-analytics') + query)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['results']
+
+    def archive(self, *args):
+        output = io.StringIO()
+        call_command('archive_attendance', *args, stdout=output)
+        return output.getvalue()
+
+    def test_archive_keeps_history_visible_and_restores(self):
+        original = self.records()
+        queries = ['?scope=student', '?scope=course&from=2025-09-02', '?scope=direction&to=2025-09-01']
+        expected = [self.rates(query) for query in queries]
+
+        self.assertIn('Would archive 26 record(s)', self.archive('--before', '2026-01-01', '--dry-run'))
+        self.archive('--before', '2026-01-01')
+        self.assertEqual(Attendance.objects.count(), 1)
+        archive = AttendanceArchive.objects.get(student=self.student, course=self.course)
+        self.assertEqual((archive.total, archive.present, len(bytes(archive.days))), (2, 1, 2))
+        self.assertEqual(AttendanceArchive.objects.count(), self.rows * self.rows)
+        self.assertEqual([self.rates(query) for query in queries], expected)
+
+        transcript = self.client_for(self.student).get(reverse('transcript')).data
+        course = next(row for row in transcript['semesters'][0]['courses'] if row['course'] == self.course.pk)
+        self.assertEqual((course['classes'], course['attended']), (3, 2))
+
+        self.archive('--restore')
+        self.assertEqual(self.records(), original)
+        self.assertFalse(AttendanceArchive.objects.exists())
+
+    def test_archiving_again_merges(self):
+        archive_attendance(date(2025, 9, 2), courses=[self.course.pk])
+        archive_attendance(date(2025, 9, 4), courses=[self.course.pk])
+        archive = AttendanceArchive.objects.get(student=self.student, course=self.course)
+        self.assertEqual(list(unpack(archive)), [(date(2025, 9, 1), True), (date(2025, 9, 3), False)])
+        self.assertEqual(count_between(archive, date(2025, 9, 2)), (1, 0))
+
+    def test_restore_keeps_live_records(self):
+        moved, _ = archive_attendance(date(2026, 1, 1))
+        Attendance.objects.create(student=self.student, course=self.course, date=date(2025, 9, 1), status=False)
+        self.assertEqual(restore_attendance(), moved - 1)
+        self.assertFalse(AttendanceArchive.objects.exists())
+        self.assertEqual(Attendance.objects.count(), moved + 1)
+        self.assertFalse(Attendance.objects.get(student=self.student, course=self.course, date=date(2025, 9, 1)).status)
+
+    def test_failed_restore_changes_nothing(self):
+        archive_attendance(date(2026, 1, 1))
+        AttendanceArchive.objects.filter(student=self.student, course=self.course).update(total=F('total') + 1)
+        with self.assertRaises(ArchiveMismatch):
+            restore_attendance()
+        self.assertEqual(AttendanceArchive.objects.count(), self.rows * self.rows)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+
+class AttendanceBitmapTests(CoreFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Course 0's only session is 2025-09-01, where every student was present.
+        self.student, self.course = self.students[0], self.courses[0]
+
+    def roster(self, course=None):
+        response = self.client_for(self.teacher).get(
+            reverse('attendance-roster'), {'course': (course or self.course).pk}
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data
+
+    def row(self):
+        return next(row for row in self.roster()['results'] if row['student'] == self.student.pk)
+
+    def check(self):
+        call_command('rebuild_attendance_bitmaps', '--check', stdout=io.StringIO())
+
+    def test_roster_reads_one_row_per_student(self):
+        with self.assertNumQueries(3):
+            data = self.roster()
+        self.assertEqual(data['sessions'], [date(2025, 9, 1)])
+        self.assertEqual([row['student_name'] for row in data['results']], [s.fio for s in self.students])
+        self.assertEqual(data['results'][0], {
+            'student': self.student.pk, 'student_name': self.student.fio,
+            'marks': 'P', 'total': 1, 'present': 1, 'rate': 100.0,
+        })
+        # Course 1 meets on 2025-09-02, so the 2025-09-01 records count without a session.
+        self.assertEqual(self.roster(self.courses[1])['results'][0]['marks'], '-')
+        self.assertEqual(self.roster(self.courses[1])['results'][0]['total'], 1)
+        response = self.client_for(self.teacher).get(reverse('attendance-roster'), {'course': 0})
+        self.assertEqual(response.status_code, 400)
+
+    def test_signals_follow_attendance_and_schedule_changes(self):
+        record = Attendance.objects.create(student=self.student, course=self.course, date=date(2025, 9, 3), status=False)
+        self.assertEqual((self.row()['marks'], self.row()['total'], self.row()['present']), ('P', 2, 1))
+        lesson = Schedule.objects.create(course=self.course, date=date(2025, 9, 3), time=time(9, 0), topic='Extra')
+        self.assertEqual(self.row()['marks'], 'PA')
+        record.status = True
+        record.save()
+        self.assertEqual(self.row()['marks'], 'PP')
+        record.delete()
+        self.assertEqual(self.row()['marks'], 'P-')
+        lesson.delete()
+        self.assertEqual(self.row()['marks'], 'P')
+        Attendance.objects.filter(student=self.student, course=self.course).delete()
+        self.assertFalse(AttendanceBitmap.objects.filter(student=self.student, course=self.course).exists())
+        self.check()
+
+    def test_deletes_refresh_once_and_cascade_fast(self):
+        def queries(queryset):
+            with CaptureQueriesContext(connection) as captured:
+                queryset.delete()
+            return len(captured)
+
+        one = queries(Attendance.objects.filter(student=self.student, course=self.course))
+        self.assertEqual(queries(Attendance.objects.filter(course=self.courses[1])), one)
+        self.assertTrue(Collector('default').can_fast_delete(Attendance.objects.all()))
+        self.check()
+
+    def test_migration_backfills_the_cache(self):
+        AttendanceBitmap.objects.all().delete()
+        import_module('core.migrations.0010_attendance_bitmap').backfill(apps, None)
+        self.check()
+        self.assertEqual(self.row()['marks'], 'P')
+
+    def test_check_reports_drift_and_rebuild_repairs_it(self):
+        self.check()
+        # A queryset update sends no signals.
+        Attendance.objects.filter(course=self.course).update(status=False)
+        with self.assertRaises(CommandError):
+            self.check()
+        call_command('rebuild_attendance_bitmaps', '--course', str(self.course.pk), stdout=io.StringIO())
+        self.check()
+        self.assertEqual(self.row()['marks'], 'A')
+
+    def test_archived_attendance_stays_in_the_bitmaps(self):
+        Attendance.objects.create(student=self.student, course=self.course, date=date(2026, 2, 2), status=True)
+        expected = self.roster()
+        archive_attendance(date(2026, 1, 1))
+        self.assertEqual(self.roster(), expected)
+        self.check()
+        transcript = self.client_for(self.student).get(reverse('transcript')).data
+        course = next(row for row in transcript['semesters'][0]['courses'] if row['course'] == self.course.pk)
+        self.assertEqual((course['classes'], course['attended']), (2, 2))
\ No newline at end of file
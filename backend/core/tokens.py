@@ -0,0 +1,115 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User, semester_numbers_for_year
+
+# Fields copied into every token. Changing any of them on a user revokes
+# that user's outstanding access tokens (see core.signals).
+CLAIM_FIELDS = ('role', 'direction_id', 'course', 'fio')
+
+# When the claims were read, with sub-second precision: ``iat`` is whole
+# seconds, too coarse to tell a token revoked in the same second from one
+# refreshed just after the revocation.
+ISSUED_CLAIM = 'claims_issued_at'
+
+
+def add_user_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+    token[ISSUED_CLAIM] = time.time()
+    return token
+
+
+def _revocation_key(user_id):
+    return f'jwt:revoked-at:{user_id}'
+
+
+def revoke_tokens(*user_ids):
+    """
+    Reject access tokens issued to these users up to now. Refresh still
+    works and re-reads the user, so clients pick up the new claims on their
+    next refresh. The marker only has to outlive the access token lifetime;
+    it lives in the cache, which settings require to be shared between
+    workers when stateless auth is on.
+    """
+    now = time.time()
+    timeout = int(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+    cache.set_many({_revocation_key(pk): now for pk in user_ids}, timeout=timeout)
+
+
+class ClaimsUser(TokenUser):
+    """
+    A user built from token claims alone, with the attributes the permission
+    classes and student views read. Views needing the full row must load it.
+    """
+
+    @cached_property
+    def role(self):
+        return self.token.get('role')
+
+    @cached_property
+    def direction_id(self):
+        return self.token.get('direction_id')
+
+    @cached_property
+    def course(self):
+        return self.token.get('course')
+
+    @cached_property
+    def fio(self):
+        return self.token.get('fio', '')
+
+    @property
+    def current_semester_numbers(self):
+        return semester_numbers_for_year(self.course)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Re-reads the user on refresh so new access tokens carry current claims."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        access = add_user_claims(refresh.access_token, user)
+        # access_token copies ``iat`` from the refresh token; keep it fresh too
+        # (the revocation check itself reads ISSUED_CLAIM).
+        access.set_iat()
+        return {'access': str(access)}
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication without the per-request User lookup: ``request.user``
+    is a ClaimsUser. The only shared state consulted is the revocation marker
+    in the cache. Enable with ``JWT_STATELESS_AUTH=1``.
+    """
+
+    def get_user(self, validated_token):
+        if any(field not in validated_token for field in CLAIM_FIELDS):
+            raise InvalidToken('Token has no role claims; obtain a new token.')
+        user = super().get_user(validated_token)
+        revoked_at = cache.get(_revocation_key(user.pk))
+        issued_at = validated_token.get(ISSUED_CLAIM, validated_token['iat'])
+        if revoked_at is not None and issued_at <= revoked_at:
+            raise InvalidToken('Token claims are out of date; refresh the token.')
+        return user
@@ -0,0 +1,104 @@
+from collections import defaultdict
+
+from django.db.models import Count, F, Sum
+
+from .models import Course, CourseResult, Grade, SemesterResult
+
+
+def _replace(model, keys, fields, rows, update_fields):
+    """
+    Make ``model`` hold exactly ``rows`` for the given ``(a_id, b_id)`` keys:
+    upsert the rows that have data and delete the keys that no longer do.
+    """
+    present = {(getattr(row, fields[0] + '_id'), getattr(row, fields[1] + '_id')) for row in rows}
+    stale = defaultdict(list)
+    for first, second in keys - present:
+        stale[second].append(first)
+    for second, firsts in stale.items():
+        model.objects.filter(**{f'{fields[1]}_id': second, f'{fields[0]}_id__in': firsts}).delete()
+    if rows:
+        model.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=list(fields), update_fields=update_fields,
+        )
+
+
+def refresh_course_results(keys):
+    """Recompute CourseResult (and the SemesterResult above it) for ``(student_id, course_id)`` keys."""
+    keys = set(keys)
+    if not keys:
+        return
+    students = {student for student, _ in keys}
+    courses = {course for _, course in keys}
+    totals = (
+        Grade.objects.filter(student_id__in=students, course_id__in=courses)
+        .values_list('student_id', 'course_id')
+        .annotate(total=Sum('score'), count=Count('id'))
+    )
+    rows = [
+        CourseResult(student_id=student, course_id=course, total_score=total, grade_count=count)
+        for student, course, total, count in totals
+        if (student, course) in keys
+    ]
+    _replace(CourseResult, keys, ('student', 'course'), rows, ['total_score', 'grade_count'])
+
+    semesters = dict(Course.objects.filter(pk__in=courses).values_list('pk', 'semester_id'))
+    refresh_semester_results({(student, semesters[course]) for student, course in keys if course in semesters})
+
+
+def refresh_semester_results(keys):
+    """Recompute SemesterResult for ``(student_id, semester_id)`` keys from CourseResult."""
+    keys = set(keys)
+    if not keys:
+        return
+    students = {student for student, _ in keys}
+    semesters = {semester for _, semester in keys}
+    totals = (
+        CourseResult.objects.filter(student_id__in=students, course__semester_id__in=semesters)
+        .values_list('student_id', 'course__semester_id')
+        .annotate(
+            courses=Count('id'),
+            credits=Sum('course__credits'),
+            weighted=Sum(F('total_score') * F('course__credits')),
+        )
+    )
+    rows = [
+        SemesterResult(
+            student_id=student, semester_id=semester,
+            course_count=courses, credits=credits, weighted_score=weighted,
+        )
+        for student, semester, courses, credits, weighted in totals
+        if (student, semester) in keys
+    ]
+    _replace(SemesterResult, keys, ('student', 'semester'), rows, ['course_count', 'credits', 'weighted_score'])
+
+
+def expected_course_results():
+    """Yield CourseResult rows as they should be, computed from scratch from Grade."""
+    totals = (
+        Grade.objects.values_list('student_id', 'course_id')
+        .annotate(total=Sum('score'), count=Count('id'))
+        .order_by('student_id', 'course_id')
+    )
+    for student, course, total, count in totals.iterator():
+        yield CourseResult(student_id=student, course_id=course, total_score=total, grade_count=count)
+
+
+def expected_semester_results():
+    """Yield SemesterResult rows as they should be, computed from scratch from Grade."""
+    per_course = (
+        Grade.objects.values_list('student_id', 'course__semester_id', 'course_id', 'course__credits')
+        .annotate(total=Sum('score'))
+        .order_by('student_id', 'course__semester_id')
+    )
+    current, row = None, None
+    for student, semester, _, credits, total in per_course.iterator():
+        if (student, semester) != current:
+            if row is not None:
+                yield row
+            current = (student, semester)
+            row = SemesterResult(student_id=student, semester_id=semester)
+        row.course_count += 1
+        row.credits += credits
+        row.weighted_score += total * credits
+    if row is not None:
+        yield row
@@ -1,22 +1,30 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-from core.views.attendance import AttendanceListCreateView, AttendanceDetailView
-from core.views.auth import CreateUserView, MeView
-from core.views.courses import CourseListCreateView, CourseDetailView
+from core.views.analytics import AttendanceAnalyticsView
+from core.views.attendance import AttendanceListCreateView, AttendanceDetailView, AttendanceBulkView, AttendanceRosterView, AttendanceExportView
+from core.views.auth import CreateUserView, AsyncMeView
+from core.views.courses import AsyncCourseListView, CourseDetailView
 from core.views.directions import DirectionListCreateView, DirectionDetailView
-from core.views.events import EventListCreateView, EventDetailView
-from core.views.grades import GradeListCreateView, GradeDetailView
-from core.views.schedules import ScheduleListCreateView, ScheduleDetailView, StudentScheduleListView
+from core.views.events import AsyncEventListView, EventDetailView, AsyncInboxEventListView
+from core.views.grades import GradeListCreateView, GradeDetailView, GradeImportView, GradeExportView
+from core.views.jobs import JobListCreateView, JobDetailView, JobResultView
+from core.views.metrics import metrics
+from core.views.schedules import (
+    ScheduleListCreateView, ScheduleDetailView, ScheduleBulkView, AsyncStudentScheduleListView,
+    StudentScheduleFeedView, schedule_feed,
+)
+from core.views.search import SearchView
 from core.views.semesters import SemesterListCreateView, SemesterDetailView
 from core.views.students import StudentListCreateView, StudentDetailView
+from core.views.transcripts import TranscriptView, StudentTranscriptView
 
 urlpatterns = [
     # Authentication
     path('register/', CreateUserView.as_view(), name='register'),
     path('token/', TokenObtainPairView.as_view(), name='token'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('me/', MeView.as_view(), name='me'),
+    path('me/', AsyncMeView.as_view(), name='me'),
 
     # Directions
     path('directions/', DirectionListCreateView.as_view(), name='direction-list'),
@@ -29,25 +37,50 @@ urlpatterns = [
     # Students
     path('students/', StudentListCreateView.as_view(), name='student-list'),
     path('students/<int:pk>/', StudentDetailView.as_view(), name='student-detail'),
+    path('students/<int:pk>/transcript/', StudentTranscriptView.as_view(), name='student-transcript'),
 
     # Courses
-    path('courses/', CourseListCreateView.as_view(), name='course-list'),
+    path('courses/', AsyncCourseListView.as_view(), name='course-list'),
     path('courses/<int:pk>/', CourseDetailView.as_view(), name='course-detail'),
 
     # Attendance
     path('attendance/', AttendanceListCreateView.as_view(), name='attendance-list'),
     path('attendance/<int:pk>/', AttendanceDetailView.as_view(), name='attendance-detail'),
+    path('attendance/bulk/', AttendanceBulkView.as_view(), name='attendance-bulk'),
+    path('attendance/roster/', AttendanceRosterView.as_view(), name='attendance-roster'),
+    path('attendance/export/<str:fmt>/', AttendanceExportView.as_view(), name='attendance-export'),
 
     # Grades
     path('grades/', GradeListCreateView.as_view(), name='grade-list'),
     path('grades/<int:pk>/', GradeDetailView.as_view(), name='grade-detail'),
+    path('grades/import/', GradeImportView.as_view(), name='grade-import'),
+    path('grades/export/<str:fmt>/', GradeExportView.as_view(), name='grade-export'),
+    path('transcript/', TranscriptView.as_view(), name='transcript'),
+
+    # Analytics
+    path('analytics/attendance/', AttendanceAnalyticsView.as_view(), name='attendance-analytics'),
 
     # Schedules
     path('schedules/', ScheduleListCreateView.as_view(), name='schedule-list'),
     path('schedules/<int:pk>/', ScheduleDetailView.as_view(), name='schedule-detail'),
-    path('student/schedules/', StudentScheduleListView.as_view(), name='student-schedule-list'),
+    path('schedules/bulk/', ScheduleBulkView.as_view(), name='schedule-bulk'),
+    path('student/schedules/', AsyncStudentScheduleListView.as_view(), name='student-schedule-list'),
+    path('student/schedules/feed/', StudentScheduleFeedView.as_view(), name='student-schedule-feed'),
+    path('schedules/feed/<str:token>.ics', schedule_feed, name='schedule-feed'),
 
     # Events
-    path('events/', EventListCreateView.as_view(), name='event-list'),
+    path('events/', AsyncEventListView.as_view(), name='event-list'),
     path('events/<int:pk>/', EventDetailView.as_view(), name='event-detail'),
+    path('events/inbox/', AsyncInboxEventListView.as_view(), name='event-inbox'),
+
+    # Search
+    path('search/', SearchView.as_view(), name='search'),
+
+    # Background jobs
+    path('jobs/', JobListCreateView.as_view(), name='job-list'),
+    path('jobs/<int:pk>/', JobDetailView.as_view(), name='job-detail'),
+    path('jobs/<int:pk>/result/', JobResultView.as_view(), name='job-result'),
+
+    # Monitoring
+    path('metrics/', metrics, name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,21 @@
+from rest_framework import generics
+from rest_framework.response import Response
+from ..analytics import attendance_rates
+from ..serializers import AttendanceAnalyticsQuerySerializer
+from ..permissions import IsTeacherOrAdmin
+
+class AttendanceAnalyticsView(generics.GenericAPIView):
+    """
+    Attendance rates grouped by ``scope`` (student, course or direction).
+    Filters: ``course``, ``direction``, ``from``, ``to``; ``below`` keeps only
+    rows under that percentage.
+    """
+    permission_classes = [IsTeacherOrAdmin]
+
+    def get(self, request):
+        params = AttendanceAnalyticsQuerySerializer.from_query(request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response({
+            **params.data,
+            'results': attendance_rates(**params.validated_data),
+        })
\ No newline at end of file
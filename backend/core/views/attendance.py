@@ -1,14 +1,89 @@
-from rest_framework import generics
-from ..models import Attendance
-from ..serializers import AttendanceSerializer
-from ..permissions import IsTeacher
+from rest_framework import generics, status
+from rest_framework.response import Response
+from ..bitmaps import counts, marks, session_dates
+from ..exports import ATTENDANCE, StreamingExportView
+from ..fastpath import ValuesListMixin
+from ..fieldsets import SparseFieldsViewMixin
+from ..filters import QueryFilterBackend, in_courses
+from ..models import Attendance, AttendanceBitmap
+from ..serializers import (
+    AttendanceSerializer, AttendanceBulkSerializer, AttendanceFilterSerializer, AttendanceRosterQuerySerializer,
+)
+from ..pagination import DateKeysetPagination
+from ..permissions import IsTeacher, IsTeacherOrAdmin
 
-class AttendanceListCreateView(generics.ListCreateAPIView):
-    queryset = Attendance.objects.all()
+class AttendanceListCreateView(ValuesListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
+    queryset = Attendance.objects.select_related('student', 'course')
     serializer_class = AttendanceSerializer
     permission_classes = [IsTeacher]
+    pagination_class = DateKeysetPagination
+    filter_backends = [QueryFilterBackend]
+    filter_serializer_class = AttendanceFilterSerializer
+    filter_lookups = {
+        'student': 'student_id',
+        'course': 'course_id',
+        'semester': in_courses('semester_id'),
+        'direction': in_courses('semester__direction_id'),
+        'status': 'status',
+        'date_from': 'date__gte',
+        'date_to': 'date__lte',
+    }
+    orderings = {'date': ('date', 'id'), '-date': ('-date', '-id')}
 
-class AttendanceDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Attendance.objects.all()
+class AttendanceDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Attendance.objects.select_related('student', 'course')
     serializer_class = AttendanceSerializer
-    permission_classes = [IsTeacher]
\ No newline at end of file
+    permission_classes = [IsTeacher]
+
+class AttendanceBulkView(generics.GenericAPIView):
+    serializer_class = AttendanceBulkSerializer
+    permission_classes = [IsTeacher]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        return Response({
+            'course': serializer.validated_data['course'].pk,
+            'date': serializer.validated_data['date'],
+            'results': results,
+        }, status=status.HTTP_200_OK)
+
+class AttendanceRosterView(generics.GenericAPIView):
+    """
+    A course's attendance grid: its session dates and, per student, one mark
+    per session (``P`` present, ``A`` absent, ``-`` no record) with totals,
+    read from the roster cache (core.bitmaps) in one row per student.
+    """
+    permission_classes = [IsTeacher]
+
+    def get(self, request):
+        params = AttendanceRosterQuerySerializer.from_query(request.query_params)
+        params.is_valid(raise_exception=True)
+        course = params.validated_data['course']
+        bitmaps = (
+            AttendanceBitmap.objects.filter(course=course)
+            .select_related('student').only('student__fio', 'sessions', 'recorded', 'present',
+                                             'unscheduled_total', 'unscheduled_present')
+            .order_by('student__fio', 'student_id')
+        )
+        results = []
+        for bitmap in bitmaps:
+            total, present = counts(bitmap)
+            results.append({
+                'student': bitmap.student_id,
+                'student_name': bitmap.student.fio,
+                'marks': marks(bitmap),
+                'total': total,
+                'present': present,
+                'rate': round(present * 100.0 / total, 2) if total else None,
+            })
+        return Response({
+            'course': course.pk,
+            'sessions': session_dates([course.pk])[course.pk],
+            'results': results,
+        })
+
+class AttendanceExportView(StreamingExportView):
+    permission_classes = [IsTeacherOrAdmin]
+    export = ATTENDANCE
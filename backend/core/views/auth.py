@@ -1,6 +1,8 @@
+from django.shortcuts import aget_object_or_404
 from rest_framework import generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from ..asyncviews import AsyncAPIView
 from ..models import User
 from ..serializers import UserSerializer
 from ..permissions import IsAdmin
@@ -10,10 +12,11 @@ class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
 
-class MeView(generics.GenericAPIView):
+class AsyncMeView(AsyncAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = UserSerializer
 
-    def get(self, request):
-        serializer = self.get_serializer(request.user)
-        return Response(serializer.data)
\ No newline at end of file
+    async def get(self, request):
+        # Reloaded even after a DB-backed auth so direction is joined, not lazily fetched.
+        user = await aget_object_or_404(self.sparse(User.objects.select_related('direction')), pk=request.user.pk)
+        return Response(self.get_serializer(user).data)
\ No newline at end of file
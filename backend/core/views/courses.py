@@ -1,14 +1,32 @@
 from rest_framework import generics
+from ..asyncviews import AsyncAPIView
+from ..caching import CachedReferenceListMixin
+from ..fieldsets import SparseFieldsViewMixin
 from ..models import Course
 from ..serializers import CourseSerializer
 from ..permissions import IsAdmin, IsTeacherOrAdmin
 
-class CourseListCreateView(generics.ListCreateAPIView):
-    queryset = Course.objects.all()
+class CourseListCreateView(CachedReferenceListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
+    queryset = Course.objects.select_related('semester', 'professor')
     serializer_class = CourseSerializer
     permission_classes = [IsTeacherOrAdmin]
+    reference_scope = 'courses'
 
-class CourseDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Course.objects.all()
+class CourseDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Course.objects.select_related('semester', 'professor')
     serializer_class = CourseSerializer
-    permission_classes = [IsTeacherOrAdmin]
\ No newline at end of file
+    permission_classes = [IsTeacherOrAdmin]
+
+class AsyncCourseListView(CachedReferenceListMixin, AsyncAPIView):
+    """Course list served natively under ASGI; creation goes to CourseListCreateView."""
+    serializer_class = CourseSerializer
+    permission_classes = [IsTeacherOrAdmin]
+    reference_scope = 'courses'
+    sync_view = CourseListCreateView
+
+    async def get(self, request):
+        return await self.alist(request)
+
+    async def alist_data(self, request):
+        courses = [course async for course in self.sparse(CourseListCreateView.queryset.all())]
+        return self.get_serializer(courses, many=True).data
\ No newline at end of file
@@ -1,12 +1,15 @@
 from rest_framework import generics
+from ..caching import CachedReferenceListMixin
+from ..fieldsets import SparseFieldsViewMixin
 from ..models import Direction
 from ..serializers import DirectionSerializer
 from ..permissions import IsAdmin
 
-class DirectionListCreateView(generics.ListCreateAPIView):
+class DirectionListCreateView(CachedReferenceListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
     queryset = Direction.objects.all()
     serializer_class = DirectionSerializer
     permission_classes = [IsAdmin]
+    reference_scope = 'directions'
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -15,7 +18,7 @@ class DirectionListCreateView(generics.ListCreateAPIView):
             queryset = queryset.filter(name__icontains=search)
         return queryset
 
-class DirectionDetailView(generics.RetrieveUpdateDestroyAPIView):
+class DirectionDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Direction.objects.all()
     serializer_class = DirectionSerializer
     permission_classes = [IsAdmin]
\ No newline at end of file
@@ -1,14 +1,52 @@
+from django.db.models import Prefetch
 from rest_framework import generics
-from ..models import Event
-from ..serializers import EventSerializer
+from rest_framework.permissions import IsAuthenticated
+from ..asyncviews import AsyncAPIView
+from ..fieldsets import SparseFieldsViewMixin
+from ..models import Event, User
+from ..serializers import EventSerializer, InboxEventSerializer
+from ..pagination import DateKeysetPagination
 from ..permissions import IsAdmin
 
-class EventListCreateView(generics.ListCreateAPIView):
-    queryset = Event.objects.all()
+def event_queryset():
+    return Event.objects.prefetch_related(
+        Prefetch('recipients', queryset=User.objects.only('id', 'fio'))
+    )
+
+class EventListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
+    queryset = event_queryset()
     serializer_class = EventSerializer
     permission_classes = [IsAdmin]
+    pagination_class = DateKeysetPagination
+
+class EventDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = event_queryset()
+    serializer_class = EventSerializer
+    permission_classes = [IsAdmin]
+
+class InboxEventListView(SparseFieldsViewMixin, generics.ListAPIView):
+    """Events for the requesting user, explicit or by audience, newest first."""
+    serializer_class = InboxEventSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = DateKeysetPagination
 
-class EventDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Event.objects.all()
+    def get_queryset(self):
+        return Event.visible_to(self.request.user)
+
+class AsyncEventListView(AsyncAPIView):
+    """Event list served natively under ASGI; creation goes to EventListCreateView."""
     serializer_class = EventSerializer
-    permission_classes = [IsAdmin]
\ No newline at end of file
+    permission_classes = [IsAdmin]
+    pagination_class = DateKeysetPagination
+    sync_view = EventListCreateView
+
+    async def get(self, request):
+        return await self.list_response(event_queryset())
+
+class AsyncInboxEventListView(AsyncAPIView):
+    serializer_class = InboxEventSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = DateKeysetPagination
+
+    async def get(self, request):
+        return await self.list_response(Event.visible_to(request.user))
\ No newline at end of file
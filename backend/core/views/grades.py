@@ -1,14 +1,52 @@
 from rest_framework import generics
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+from ..exports import GRADES, StreamingExportView
+from ..fastpath import ValuesListMixin
+from ..fieldsets import SparseFieldsViewMixin
+from ..filters import QueryFilterBackend, in_courses
+from ..importers import GradeCSVImporter
 from ..models import Grade
-from ..serializers import GradeSerializer
-from ..permissions import IsTeacher
+from ..serializers import GradeSerializer, GradeFilterSerializer
+from ..pagination import KeysetPagination
+from ..permissions import IsTeacher, IsTeacherOrAdmin
 
-class GradeListCreateView(generics.ListCreateAPIView):
-    queryset = Grade.objects.all()
+class GradeListCreateView(ValuesListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
+    queryset = Grade.objects.select_related('student', 'course')
     serializer_class = GradeSerializer
     permission_classes = [IsTeacher]
+    pagination_class = KeysetPagination
+    filter_backends = [QueryFilterBackend]
+    filter_serializer_class = GradeFilterSerializer
+    filter_lookups = {
+        'student': 'student_id',
+        'course': 'course_id',
+        'semester': in_courses('semester_id'),
+        'direction': in_courses('semester__direction_id'),
+        'type': 'type',
+    }
+    orderings = {
+        'id': ('id',), '-id': ('-id',),
+        'score': ('score', 'id'), '-score': ('-score', '-id'),
+    }
 
-class GradeDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Grade.objects.all()
+class GradeDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Grade.objects.select_related('student', 'course')
     serializer_class = GradeSerializer
-    permission_classes = [IsTeacher]
\ No newline at end of file
+    permission_classes = [IsTeacher]
+
+class GradeImportView(generics.GenericAPIView):
+    """Upload a CSV (student,course,type,score) as the ``file`` form field."""
+    permission_classes = [IsTeacher]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': ['No file was submitted.']})
+        return Response(GradeCSVImporter().run(upload))
+
+class GradeExportView(StreamingExportView):
+    permission_classes = [IsTeacherOrAdmin]
+    export = GRADES
@@ -0,0 +1,52 @@
+from django.http import FileResponse, Http404
+from rest_framework import generics, status
+from rest_framework.response import Response
+from ..fieldsets import SparseFieldsViewMixin
+from ..filters import QueryFilterBackend
+from ..models import Job
+from ..serializers import JobCreateSerializer, JobFilterSerializer, JobSerializer
+from ..pagination import KeysetPagination
+from ..permissions import IsTeacherOrAdmin
+
+class JobQuerysetMixin:
+    """Admins see every job, teachers only the ones they queued."""
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if self.request.user.role != 'admin':
+            queryset = queryset.filter(created_by_id=self.request.user.pk)
+        return queryset
+
+class JobListCreateView(JobQuerysetMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
+    """
+    Lists jobs, newest first, or queues one: ``{"kind": ..., "params": {...}}``
+    is answered with 202 and the queued job; poll its detail URL for status
+    and progress.
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsTeacherOrAdmin]
+    pagination_class = KeysetPagination
+    filter_backends = [QueryFilterBackend]
+    filter_serializer_class = JobFilterSerializer
+    filter_lookups = {'kind': 'kind', 'status': 'status'}
+
+    def create(self, request, *args, **kwargs):
+        serializer = JobCreateSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save()
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+class JobDetailView(JobQuerysetMixin, SparseFieldsViewMixin, generics.RetrieveAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [IsTeacherOrAdmin]
+
+class JobResultView(JobQuerysetMixin, generics.GenericAPIView):
+    """Downloads the file a finished job wrote."""
+    permission_classes = [IsTeacherOrAdmin]
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != 'succeeded' or not job.result_file:
+            raise Http404('The job has no result file.')
+        filename = job.result_file.name.rsplit('/', 1)[-1]
+        return FileResponse(job.result_file.open('rb'), as_attachment=True, filename=filename)
\ No newline at end of file
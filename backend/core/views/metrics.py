@@ -0,0 +1,33 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from ..permissions import IsAdmin
+from ..profiling import METRICS
+
+def _admin_request(request):
+    """True when ``request`` carries an admin's API token."""
+    request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return IsAdmin().has_permission(request, None)
+    except APIException:
+        return False
+
+@require_GET
+def metrics(request):
+    """
+    Request profiling histograms in the Prometheus text format. When
+    METRICS_TOKEN is set, scrapers must send it as a bearer token; without
+    one only admins can read them, unless DEBUG is on.
+    """
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), expected):
+            return HttpResponse(status=401, headers={'WWW-Authenticate': 'Bearer realm="metrics"'})
+    elif not settings.DEBUG and not _admin_request(request):
+        return HttpResponse(status=403)
+    return HttpResponse(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
\ No newline at end of file
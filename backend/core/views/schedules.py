@@ -1,21 +1,114 @@
-from rest_framework import generics
+from django.core import signing
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+from rest_framework import generics, status
+from rest_framework.response import Response
+from ..asyncviews import AsyncAPIView
+from ..fieldsets import SparseFieldsViewMixin
+from ..filters import QueryFilterBackend
+from ..calendars import direction_calendar, direction_from_token, feed_token
 from ..models import Schedule
-from ..serializers import ScheduleSerializer
+from ..serializers import DateRangeSerializer, ScheduleFilterSerializer, ScheduleRecurrenceSerializer, ScheduleSerializer
+from ..pagination import ScheduleKeysetPagination
 from ..permissions import IsStudent, IsTeacherOrAdmin
 
-class ScheduleListCreateView(generics.ListCreateAPIView):
-    queryset = Schedule.objects.all()
+class ScheduleListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
+    queryset = Schedule.objects.select_related('course__professor')
     serializer_class = ScheduleSerializer
     permission_classes = [IsTeacherOrAdmin]
+    pagination_class = ScheduleKeysetPagination
+    filter_backends = [QueryFilterBackend]
+    filter_serializer_class = ScheduleFilterSerializer
+    filter_lookups = {'course': 'course_id', 'date_from': 'date__gte', 'date_to': 'date__lte'}
+    orderings = {'date': ('date', 'time', 'id'), '-date': ('-date', '-time', '-id')}
 
-class ScheduleDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Schedule.objects.all()
+class ScheduleDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Schedule.objects.select_related('course__professor')
     serializer_class = ScheduleSerializer
     permission_classes = [IsTeacherOrAdmin]
 
-class StudentScheduleListView(generics.ListAPIView):
+class ScheduleBulkView(generics.GenericAPIView):
+    """
+    Creates a course's classes from a weekly rule in one transaction. Clashes
+    with the course's or its professor's classes are reported; unless
+    ``on_conflict`` is ``skip`` they fail the request with 409.
+    """
+    serializer_class = ScheduleRecurrenceSerializer
+    permission_classes = [IsTeacherOrAdmin]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        schedules, conflicts = serializer.save()
+        if conflicts and serializer.validated_data['on_conflict'] == 'fail':
+            return Response({
+                'detail': 'The rule clashes with existing classes.',
+                'conflicts': conflicts,
+            }, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'course': serializer.validated_data['course'].pk,
+            'created': ScheduleSerializer(schedules, many=True).data,
+            'conflicts': conflicts,
+        }, status=status.HTTP_201_CREATED)
+
+def student_schedule_queryset(user, query_params):
+    """The student's classes for their current course year, optionally within ``from`` / ``to``."""
+    params = DateRangeSerializer.from_query(query_params)
+    params.is_valid(raise_exception=True)
+    queryset = Schedule.objects.filter(course__semester__direction_id=user.direction_id)
+    if user.course:
+        queryset = queryset.filter(course__semester__number__in=user.current_semester_numbers)
+    if 'date_from' in params.validated_data:
+        queryset = queryset.filter(date__gte=params.validated_data['date_from'])
+    if 'date_to' in params.validated_data:
+        queryset = queryset.filter(date__lte=params.validated_data['date_to'])
+    return queryset.select_related('course__professor').order_by('date', 'time', 'id')
+
+class StudentScheduleListView(SparseFieldsViewMixin, generics.ListAPIView):
     serializer_class = ScheduleSerializer
     permission_classes = [IsStudent]
 
     def get_queryset(self):
-        return Schedule.objects.filter(course__semester__direction=self.request.user.direction)
\ No newline at end of file
+        return student_schedule_queryset(self.request.user, self.request.query_params)
+
+class AsyncStudentScheduleListView(AsyncAPIView):
+    serializer_class = ScheduleSerializer
+    permission_classes = [IsStudent]
+
+    async def get(self, request):
+        return await self.list_response(student_schedule_queryset(request.user, request.query_params))
+
+class StudentScheduleFeedView(generics.GenericAPIView):
+    """Subscription URL of the iCalendar feed for the student's direction."""
+    permission_classes = [IsStudent]
+
+    def get(self, request):
+        if request.user.direction_id is None:
+            raise Http404
+        url = reverse('schedule-feed', args=[feed_token(request.user.direction_id)])
+        return Response({'url': request.build_absolute_uri(url)})
+
+@require_GET
+def schedule_feed(request, token):
+    """
+    iCalendar feed of a direction's classes. Calendar apps can't send JWTs,
+    so the signed token in the URL is the credential; it names the
+    direction's feed version, so rotating the feed revokes leaked URLs. The
+    document is served from the cache and only rebuilt after one of the
+    direction's classes changes.
+    """
+    try:
+        direction_id, version = direction_from_token(token)
+    except signing.BadSignature:
+        raise Http404
+    ics, etag, current = direction_calendar(direction_id)
+    if version != current:
+        raise Http404
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(ics, content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
\ No newline at end of file
@@ -0,0 +1,21 @@
+from rest_framework import generics
+from rest_framework.response import Response
+from ..search import search
+from ..serializers import SearchQuerySerializer
+from ..permissions import IsAdmin
+
+class SearchView(generics.GenericAPIView):
+    """
+    Ranked full-text search over users, courses and events. Parameters:
+    ``q`` (every word must match, as a word prefix or, when nothing does,
+    misspelled), ``kind`` (user, course or event) and ``limit`` (at most 100).
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        params = SearchQuerySerializer.from_query(request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response({
+            **params.data,
+            'results': search(**params.validated_data),
+        })
\ No newline at end of file
@@ -1,14 +1,17 @@
 from rest_framework import generics
+from ..caching import CachedReferenceListMixin
+from ..fieldsets import SparseFieldsViewMixin
 from ..models import Semester
 from ..serializers import SemesterSerializer
 from ..permissions import IsAdmin
 
-class SemesterListCreateView(generics.ListCreateAPIView):
-    queryset = Semester.objects.all()
+class SemesterListCreateView(CachedReferenceListMixin, SparseFieldsViewMixin, generics.ListCreateAPIView):
+    queryset = Semester.objects.select_related('direction')
     serializer_class = SemesterSerializer
     permission_classes = [IsAdmin]
+    reference_scope = 'semesters'
 
-class SemesterDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Semester.objects.all()
+class SemesterDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Semester.objects.select_related('direction')
     serializer_class = SemesterSerializer
     permission_classes = [IsAdmin]
\ No newline at end of file
@@ -1,14 +1,29 @@
 from rest_framework import generics
+from ..fieldsets import SparseFieldsViewMixin
+from ..filters import QueryFilterBackend, full_text
 from ..models import User
-from ..serializers import UserSerializer
+from ..serializers import StudentFilterSerializer, UserSerializer
+from ..pagination import IdKeysetPagination
 from ..permissions import IsAdmin
 
-class StudentListCreateView(generics.ListCreateAPIView):
-    queryset = User.objects.filter(role='student')
+class StudentListCreateView(SparseFieldsViewMixin, generics.ListCreateAPIView):
+    queryset = User.objects.filter(role='student').select_related('direction')
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
+    pagination_class = IdKeysetPagination
+    filter_backends = [QueryFilterBackend]
+    filter_serializer_class = StudentFilterSerializer
+    filter_lookups = {
+        'direction': 'direction_id',
+        'course': 'course',
+        'search': full_text('user'),
+    }
+    orderings = {
+        'id': ('id',), '-id': ('-id',),
+        'fio': ('fio', 'id'), '-fio': ('-fio', '-id'),
+    }
 
-class StudentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = User.objects.filter(role='student')
+class StudentDetailView(SparseFieldsViewMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = User.objects.filter(role='student').select_related('direction')
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
\ No newline at end of file
@@ -0,0 +1,45 @@
+from collections import defaultdict
+from django.shortcuts import get_object_or_404
+from rest_framework import generics
+from rest_framework.response import Response
+from ..analytics import student_course_attendance
+from ..fieldsets import sparse_queryset
+from ..models import User, CourseResult, SemesterResult
+from ..serializers import SemesterResultSerializer
+from ..permissions import IsStudent, IsTeacherOrAdmin
+
+class TranscriptView(generics.GenericAPIView):
+    """The requesting student's transcript, read from the maintained summary tables."""
+    serializer_class = SemesterResultSerializer
+    permission_classes = [IsStudent]
+
+    def get_student(self):
+        return self.request.user
+
+    def get(self, request, *args, **kwargs):
+        student = self.get_student()
+        serializer = self.get_serializer()
+        semesters = list(sparse_queryset(serializer, (
+            SemesterResult.objects.filter(student_id=student.pk)
+            .select_related('semester__direction')
+            .order_by('semester__number')
+        )))
+        if 'courses' in serializer.fields:
+            attendance = student_course_attendance(student.pk)
+            courses = defaultdict(list)
+            for result in CourseResult.objects.filter(student_id=student.pk).select_related('course').order_by('course__name'):
+                result.classes, result.attended = attendance.get(result.course_id, (0, 0))
+                courses[result.course.semester_id].append(result)
+            for semester in semesters:
+                semester.course_list = courses[semester.semester_id]
+        return Response({
+            'student': student.pk,
+            'student_name': student.fio,
+            'semesters': self.get_serializer(semesters, many=True).data,
+        })
+
+class StudentTranscriptView(TranscriptView):
+    permission_classes = [IsTeacherOrAdmin]
+
+    def get_student(self):
+        return get_object_or_404(User, pk=self.kwargs['pk'], role='student')
\ No newline at end of file